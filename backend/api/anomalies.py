@@ -0,0 +1,98 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database import get_db
+from utils.responses import FastJSONResponse
+
+router = APIRouter(prefix="/api", tags=["anomalies"])
+
+# Floor on the baseline standard deviation, so a cell whose history is
+# constant does not get an infinite z-score for a one-crime change
+MIN_STD = 1.0
+
+# Each cell of the month is scored against its seasonal norm: the other
+# years of the same month-of-year. The series of a cell spans every year its
+# neighbourhood has rows for that month (crime_count_years), with 0 for years
+# where the cell itself has no row or a 0 count; crime_count_stats holds
+# Welford n / mean / M2 of the non-zero counts only. The implied zeros are
+# added back (same sum, N years instead of n), then the cell's own count is
+# taken out (reverse Welford step) before computing z. One stats row per
+# cell: the query reads the month's cells, never the history.
+_ANOMALIES_SQL = text("""
+    WITH covered AS (
+        SELECT neighborhood_id, COUNT(*) AS years
+        FROM crime_count_years
+        WHERE month = :month
+        GROUP BY neighborhood_id
+    ),
+    cells AS (
+        SELECT c.neighborhood_id, c.classification_id, c.crime_count AS x,
+               y.years - 1 AS n_hist,
+               s.n * s.mean / y.years AS mean_all,
+               s.m2 + s.n * s.mean * s.mean * (1 - s.n::float8 / y.years) AS m2_all,
+               (s.n * s.mean - c.crime_count) / (y.years - 1) AS mean_hist
+        FROM crime_monthly_counts c
+        JOIN covered y ON y.neighborhood_id = c.neighborhood_id
+        JOIN crime_count_stats s
+          ON s.neighborhood_id = c.neighborhood_id
+         AND s.classification_id = c.classification_id
+         AND s.month = c.month
+        WHERE c.year = :year AND c.month = :month AND y.years - 1 >= :min_history
+    ),
+    scored AS (
+        SELECT *,
+               SQRT(GREATEST(m2_all - (x - mean_all) * (x - mean_hist), 0) / (n_hist - 1)) AS std_hist
+        FROM cells
+    )
+    SELECT sc.neighborhood_id, n.name AS neighborhood,
+           sc.classification_id, cc.name AS classification,
+           sc.x AS crime_count, sc.n_hist, sc.mean_hist, sc.std_hist,
+           (sc.x - sc.mean_hist) / GREATEST(sc.std_hist, :min_std) AS z
+    FROM scored sc
+    JOIN neighborhoods n ON n.id = sc.neighborhood_id
+    JOIN crime_classifications cc ON cc.id = sc.classification_id
+    WHERE (sc.x - sc.mean_hist) / GREATEST(sc.std_hist, :min_std) >= :min_z
+    ORDER BY z DESC, sc.neighborhood_id, sc.classification_id
+    LIMIT :limit
+""")
+
+
+# GET /api/anomalies - cells of one month far above their seasonal norm, by z-score
+@router.get("/anomalies")
+def get_anomalies(
+    year: int = Query(..., description="Year of the month to scan"),
+    month: int = Query(..., ge=1, le=12),
+    min_z: float = Query(3.0, description="Flag cells at least this many std above the norm"),
+    min_history: int = Query(3, ge=2, description="Other years of the same month required"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    rows = db.execute(_ANOMALIES_SQL, {
+        "year": year,
+        "month": month,
+        "min_z": min_z,
+        "min_history": min_history,
+        "min_std": MIN_STD,
+        "limit": limit,
+    }).fetchall()
+
+    return FastJSONResponse({
+        "year": year,
+        "month": month,
+        "min_z": min_z,
+        "anomalies": [
+            {
+                "neighborhood_id": r.neighborhood_id,
+                "neighborhood": r.neighborhood,
+                "classification_id": r.classification_id,
+                "classification": r.classification,
+                "crime_count": r.crime_count,
+                "history_years": r.n_hist,
+                "baseline_mean": round(r.mean_hist, 2),
+                "baseline_std": round(r.std_hist, 2),
+                "z": round(r.z, 2),
+            }
+            for r in rows
+        ],
+    })
@@ -1,59 +1,285 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy import select, text, func, delete
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, date
+from typing import Optional
+import json
 
-from database import get_db
-from models import User, CrimeCategory, CrimeWeight, CrimeFormData
+from database import get_db, engine
+from models import User, CrimeCategory, CrimeFormData, CrimeFormSubcategory
 from auth import get_current_user
+from utils.aggregation import incident_of, apply_incident_changes
+from utils.export import ENCODERS, EXPORT_FORMATS
+from utils import crime_meta
+from utils.lookups import neighborhood_id, neighborhood_ids
 
 router = APIRouter(prefix="/api", tags=["Crimes"])
 
-# GET /api/crime-forms - Returns all crime records from database
-# Ordered by ID descending (newest first)
+# Filters shared by the crime-forms list (and any other listing of
+# crime_form_data). Every filter is optional; all given filters are ANDed.
+# Neighbourhood and category names are resolved to integer ids up front so the
+# filters hit the integer (id, id) indexes; a name that does not resolve falls
+# back to matching the stored name string.
+
+class CrimeFormFilters(BaseModel):
+    neighbourhood: Optional[str] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    main_category: Optional[str] = None
+    climate: Optional[str] = None
+    time_of_year: Optional[str] = None
+    subcategory: Optional[str] = None
+    # Resolved from neighbourhood / main_category
+    neighborhood_id: Optional[int] = None
+    category_id: Optional[int] = None
+
+    def is_empty(self) -> bool:
+        return all(v is None for v in self.model_dump().values())
+
+    def apply(self, stmt):
+        if self.neighborhood_id is not None:
+            stmt = stmt.where(CrimeFormData.neighborhood_id == self.neighborhood_id)
+        elif self.neighbourhood is not None:
+            stmt = stmt.where(CrimeFormData.neighbourhood_name == self.neighbourhood)
+        if self.date_from is not None:
+            stmt = stmt.where(CrimeFormData.date >= self.date_from)
+        if self.date_to is not None:
+            stmt = stmt.where(CrimeFormData.date <= self.date_to)
+        if self.category_id is not None:
+            stmt = stmt.where(CrimeFormData.category_id == self.category_id)
+        elif self.main_category is not None:
+            stmt = stmt.where(CrimeFormData.main_category == self.main_category)
+        if self.climate is not None:
+            stmt = stmt.where(CrimeFormData.climate == self.climate)
+        if self.time_of_year is not None:
+            stmt = stmt.where(CrimeFormData.time_of_year == self.time_of_year)
+        if self.subcategory is not None:
+            # Semi-join through the (category_id, crime_form_id) index
+            stmt = stmt.where(CrimeFormData.id.in_(
+                select(CrimeFormSubcategory.crime_form_id)
+                .join(CrimeCategory, CrimeCategory.id == CrimeFormSubcategory.category_id)
+                .where(CrimeCategory.subcategory == self.subcategory)
+            ))
+        return stmt
+
+
+def crime_form_filters(
+    neighbourhood: Optional[str] = Query(None, description="Exact neighbourhood name"),
+    date_from: Optional[date] = Query(None, description="Inclusive lower bound (YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, description="Inclusive upper bound (YYYY-MM-DD)"),
+    main_category: Optional[str] = Query(None),
+    climate: Optional[str] = Query(None),
+    time_of_year: Optional[str] = Query(None),
+    subcategory: Optional[str] = Query(None, description="Exact subcategory name, e.g. Vehicle Theft"),
+    db: Session = Depends(get_db),
+) -> CrimeFormFilters:
+    """FastAPI dependency collecting the crime_form_data filter query params."""
+    _, meta = crime_meta.get_crime_meta(db)
+    return CrimeFormFilters(
+        neighbourhood=neighbourhood,
+        date_from=date_from,
+        date_to=date_to,
+        main_category=main_category,
+        climate=climate,
+        time_of_year=time_of_year,
+        subcategory=subcategory,
+        neighborhood_id=neighborhood_id(db, neighbourhood) if neighbourhood is not None else None,
+        category_id=meta.category_ids_by_name.get(main_category) if main_category is not None else None,
+    )
+
+
+def _crime_form_to_dict(r) -> dict:
+    return {
+        "id": r.id,
+        "main_category": r.main_category,
+        "crime_weight": r.crime_weight,
+        "subcategories": r.subcategories,
+        "neighbourhood_name": r.neighbourhood_name,
+        "date": r.date.isoformat(),
+        "offender_income_level": r.offender_income_level,
+        "climate": r.climate,
+        "time_of_year": r.time_of_year,
+    }
+
+
+def _estimate_total(db: Session, filters: CrimeFormFilters) -> Optional[int]:
+    """
+    Row-count estimate without a full COUNT(*):
+    - no filters: the planner's table statistics (pg_class.reltuples)
+    - with filters: the planner's row estimate for the filtered scan
+    Returns None if the planner has no statistics yet.
+    """
+    if filters.is_empty():
+        est = db.execute(text(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = 'crime_form_data'::regclass"
+        )).scalar()
+        return int(est) if est is not None and est >= 0 else None
+
+    stmt = filters.apply(select(CrimeFormData.id))
+    compiled = stmt.compile(dialect=db.get_bind().dialect)
+    plan = db.connection().exec_driver_sql(
+        "EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+# GET /api/crime-forms - Returns one page of crime records, newest first
+# Keyset pagination on id: pass the returned next_cursor as ?cursor= to get
+# the following page (null when there are no more rows)
+# Optional filters: neighbourhood, date_from/date_to, main_category, climate, time_of_year
+# total is a planner estimate, not an exact count (first page only)
 # Requires authentication via get_current_user dependency
 
 @router.get("/crime-forms")
-async def list_crime_forms(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    """List crime form records."""
-    rows = db.query(CrimeFormData).order_by(CrimeFormData.id.desc()).all()
+async def list_crime_forms(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    filters: CrimeFormFilters = Depends(crime_form_filters),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """List crime form records, one keyset page at a time."""
+    stmt = filters.apply(select(CrimeFormData))
+    if cursor is not None:
+        stmt = stmt.where(CrimeFormData.id < cursor)
+    # Fetch one extra row to know whether another page exists
+    stmt = stmt.order_by(CrimeFormData.id.desc()).limit(limit + 1)
+
+    rows = db.execute(stmt).scalars().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "items": [_crime_form_to_dict(r) for r in rows],
+        "next_cursor": rows[-1].id if has_more else None,
+        "total": _estimate_total(db, filters) if cursor is None else None,
+    }
+
+# GET /api/crime-forms/export - Streams every matching crime record as a file
+# format: csv | ndjson | parquet; same filters as GET /api/crime-forms
+# Rows come from a server-side cursor in batches of EXPORT_BATCH_ROWS and are
+# encoded batch by batch, so memory use does not grow with the table size
+
+EXPORT_BATCH_ROWS = 5000
+
+EXPORT_COLUMNS = [
+    CrimeFormData.id,
+    CrimeFormData.main_category,
+    CrimeFormData.crime_weight,
+    CrimeFormData.subcategories,
+    CrimeFormData.neighbourhood_name,
+    CrimeFormData.date,
+    CrimeFormData.offender_income_level,
+    CrimeFormData.climate,
+    CrimeFormData.time_of_year,
+]
+
+
+def _stream_crime_form_batches(filters: CrimeFormFilters):
+    # Own connection: the request's Session is closed before the body streams
+    stmt = filters.apply(select(*EXPORT_COLUMNS)).order_by(CrimeFormData.id)
+    with engine.connect() as conn:
+        result = conn.execution_options(
+            stream_results=True, yield_per=EXPORT_BATCH_ROWS
+        ).execute(stmt)
+        for batch in result.partitions():
+            yield batch
+
+
+@router.get("/crime-forms/export")
+async def export_crime_forms(
+    format: str = Query("csv", description="csv, ndjson or parquet"),
+    filters: CrimeFormFilters = Depends(crime_form_filters),
+    current_user: User = Depends(get_current_user),
+):
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {list(EXPORT_FORMATS)}")
+    if format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=400, detail="Parquet export is not available (pyarrow not installed)")
+
+    media_type, ext = EXPORT_FORMATS[format]
+    columns = [c.key for c in EXPORT_COLUMNS]
+    body = ENCODERS[format](columns, _stream_crime_form_batches(filters), [c.type for c in EXPORT_COLUMNS])
+
+    filename = f"crime_forms_{datetime.utcnow():%Y%m%d_%H%M%S}.{ext}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+# GET /api/crime-forms/subcategory-counts - Incidents per subcategory
+# Accepts the same filters as GET /api/crime-forms
+# Without filters this is an index-only scan of crime_form_subcategories
+
+@router.get("/crime-forms/subcategory-counts")
+async def subcategory_counts(
+    filters: CrimeFormFilters = Depends(crime_form_filters),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    n = func.count().label("crime_count")
+    stmt = (
+        select(CrimeCategory.main_category, CrimeCategory.subcategory, n)
+        .select_from(CrimeFormSubcategory)
+        .join(CrimeCategory, CrimeCategory.id == CrimeFormSubcategory.category_id)
+    )
+    if not filters.is_empty():
+        stmt = stmt.join(CrimeFormData, CrimeFormData.id == CrimeFormSubcategory.crime_form_id)
+        stmt = filters.apply(stmt)
+    stmt = stmt.group_by(CrimeCategory.main_category, CrimeCategory.subcategory).order_by(
+        n.desc(), CrimeCategory.main_category, CrimeCategory.subcategory
+    )
+
     return [
-        {
-            "id": r.id,
-            "main_category": r.main_category,
-            "crime_weight": r.crime_weight,
-            "subcategories": r.subcategories,
-            "neighbourhood_name": r.neighbourhood_name,
-            "date": r.date.isoformat(),
-            "offender_income_level": r.offender_income_level,
-            "climate": r.climate,
-            "time_of_year": r.time_of_year,
-        }
-        for r in rows
+        {"main_category": r.main_category, "subcategory": r.subcategory, "crime_count": int(r.crime_count)}
+        for r in db.execute(stmt)
     ]
 
+
+def _subcategory_ids(meta, main_category: str, subcategories: list[str]) -> list[int]:
+    """Resolve subcategory names of one main category to crime_categories ids."""
+    ids: list[int] = []
+    for name in subcategories:
+        cid = meta.category_ids.get((main_category, name))
+        if cid is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid subcategory '{name}' for main category '{main_category}'",
+            )
+        if cid not in ids:
+            ids.append(cid)
+    return ids
+
+
+def _link_subcategories(db: Session, crime_form_id: int, category_ids: list[int]) -> None:
+    db.add_all(
+        CrimeFormSubcategory(crime_form_id=crime_form_id, category_id=cid) for cid in category_ids
+    )
+
 # GET /api/crime/meta - Returns available crime categories and their weights
 # Also includes subcategories for each main category
 # Used to populate dropdown menus in the frontend form
+# Served from the process-wide metadata cache; the ETag is the data version,
+# so browsers revalidate with If-None-Match and get 304 until the tables change
 
 @router.get("/crime/meta")
-async def get_crime_meta(db: Session = Depends(get_db)):
+async def get_crime_meta(request: Request, db: Session = Depends(get_db)):
     """Return main categories, their weights, and subcategories."""
-    weights = db.query(CrimeWeight).all()
-    categories = db.query(CrimeCategory).all()
-
-    subs_by_main: dict[str, list[str]] = {}
-    for c in categories:
-        subs_by_main.setdefault(c.main_category, []).append(c.subcategory)
+    version, meta = crime_meta.get_crime_meta(db)
+    etag = f'"crime-meta-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
 
-    result = []
-    for w in weights:
-        result.append({
-            "main_category": w.main_category,
-            "weight": w.weight,
-            "subcategories": subs_by_main.get(w.main_category, []),
-        })
-    return result
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(meta.as_list(), headers=headers)
 
 
 class CrimeFormCreate(BaseModel):
@@ -80,9 +306,11 @@ async def create_crime_form(
     if current_user.role not in ["general_statistic", "administrator"]:
         raise HTTPException(status_code=403, detail="Not authorized to insert crime data")
 
-    weight_row = db.query(CrimeWeight).filter_by(main_category=payload.main_category).first()
-    if not weight_row:
+    _, meta = crime_meta.get_crime_meta(db)
+    weight = meta.weight(payload.main_category)
+    if weight is None:
         raise HTTPException(status_code=400, detail="Invalid main category: no weight defined")
+    category_ids = _subcategory_ids(meta, payload.main_category, payload.subcategories)
 
     try:
         crime_date = datetime.fromisoformat(payload.date).date()
@@ -91,21 +319,86 @@ async def create_crime_form(
 
     record = CrimeFormData(
         main_category=payload.main_category,
-        crime_weight=weight_row.weight,
+        crime_weight=weight,
         subcategories=", ".join(payload.subcategories),
         neighbourhood_name=payload.neighbourhood_name,
+        neighborhood_id=neighborhood_id(db, payload.neighbourhood_name),
+        category_id=meta.category_ids_by_name[payload.main_category],
         date=crime_date,
         offender_income_level=payload.offender_income_level,
         climate=payload.climate,
         time_of_year=payload.time_of_year,
     )
     db.add(record)
+    db.flush()
+    _link_subcategories(db, record.id, category_ids)
+
+    # Fold the new incident into the aggregates in the same transaction
+    apply_incident_changes(db, [(None, incident_of(record))])
+
     db.commit()
     db.refresh(record)
 
     return {"id": record.id, "message": "Data saved successfully"}
 
 
+# POST /api/crime-forms/bulk - Inserts many crime records in one transaction
+# Same roles and validation as POST /api/crime-form
+# Aggregate deltas are summed per cell and applied with one upsert per table
+
+@router.post("/crime-forms/bulk", status_code=201)
+async def create_crime_forms_bulk(
+    payload: list[CrimeFormCreate],
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    if current_user.role not in ["general_statistic", "administrator"]:
+        raise HTTPException(status_code=403, detail="Not authorized to insert crime data")
+
+    _, meta = crime_meta.get_crime_meta(db)
+    weights = meta.weights
+    nids = neighborhood_ids(db)
+
+    records = []
+    links = []
+    for i, item in enumerate(payload):
+        if item.main_category not in weights:
+            raise HTTPException(status_code=400, detail=f"Row {i}: invalid main category: no weight defined")
+        try:
+            links.append(_subcategory_ids(meta, item.main_category, item.subcategories))
+        except HTTPException as e:
+            raise HTTPException(status_code=400, detail=f"Row {i}: {e.detail}")
+        try:
+            crime_date = datetime.fromisoformat(item.date).date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Row {i}: invalid date format; expected YYYY-MM-DD")
+
+        records.append(CrimeFormData(
+            main_category=item.main_category,
+            crime_weight=weights[item.main_category],
+            subcategories=", ".join(item.subcategories),
+            neighbourhood_name=item.neighbourhood_name,
+            neighborhood_id=nids.get(item.neighbourhood_name),
+            category_id=meta.category_ids_by_name[item.main_category],
+            date=crime_date,
+            offender_income_level=item.offender_income_level,
+            climate=item.climate,
+            time_of_year=item.time_of_year,
+        ))
+
+    db.add_all(records)
+    db.flush()
+    for record, category_ids in zip(records, links):
+        _link_subcategories(db, record.id, category_ids)
+
+    apply_incident_changes(db, [(None, incident_of(r)) for r in records])
+
+    ids = [r.id for r in records]
+    db.commit()
+
+    return {"ids": ids, "inserted": len(ids), "message": "Data saved successfully"}
+
+
 class CrimeFormUpdate(BaseModel):
     main_category: str
     subcategories: list[str]
@@ -118,6 +411,7 @@ class CrimeFormUpdate(BaseModel):
 # PUT /api/crime-form/{crime_id} - Updates existing crime record
 # Multiple roles can update (general_statistic, hr, civil_status, ministry_of_justice, administrator)
 # Validates the record exists and updates all fields
+# Subcategory links are replaced wholesale
 
 @router.put("/crime-form/{crime_id}")
 async def update_crime_form(
@@ -134,24 +428,36 @@ async def update_crime_form(
     if not record:
         raise HTTPException(status_code=404, detail="Record not found")
 
-    weight_row = db.query(CrimeWeight).filter_by(main_category=payload.main_category).first()
-    if not weight_row:
+    _, meta = crime_meta.get_crime_meta(db)
+    weight = meta.weight(payload.main_category)
+    if weight is None:
         raise HTTPException(status_code=400, detail="Invalid main category: no weight defined")
+    category_ids = _subcategory_ids(meta, payload.main_category, payload.subcategories)
 
     try:
         crime_date = datetime.fromisoformat(payload.date).date()
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format; expected YYYY-MM-DD")
 
+    old = incident_of(record)
+
     record.main_category = payload.main_category
-    record.crime_weight = weight_row.weight
+    record.category_id = meta.category_ids_by_name[payload.main_category]
+    record.crime_weight = weight
     record.subcategories = ", ".join(payload.subcategories)
     record.neighbourhood_name = payload.neighbourhood_name
+    record.neighborhood_id = neighborhood_id(db, payload.neighbourhood_name)
     record.date = crime_date
     record.offender_income_level = payload.offender_income_level
     record.climate = payload.climate
     record.time_of_year = payload.time_of_year
 
+    db.execute(delete(CrimeFormSubcategory).where(CrimeFormSubcategory.crime_form_id == record.id))
+    _link_subcategories(db, record.id, category_ids)
+
+    # Move the incident between monthly cells (no-op if the cell is unchanged)
+    apply_incident_changes(db, [(old, incident_of(record))])
+
     db.commit()
     db.refresh(record)
 
@@ -174,6 +480,8 @@ async def delete_crime_form(
     if not record:
         raise HTTPException(status_code=404, detail="Record not found")
 
+    apply_incident_changes(db, [(incident_of(record), None)])
+
     db.delete(record)
     db.commit()
     return
\ No newline at end of file
@@ -0,0 +1,129 @@
+from typing import Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from api.risk_new import MAP_DATA_VERSIONS, SCORE_COLS
+from database import get_db
+from utils.cache import KeyedVersionCache
+from utils.crime_meta import get_crime_meta
+from utils.forecast import fit_series
+from utils.responses import FastJSONResponse
+from utils.scoring import formula_scores, label_names, r2_score
+
+router = APIRouter(prefix="/api", tags=["forecast"])
+
+MAX_HORIZON = 24
+
+# One fit of every (neighborhood, classification) series; refitted when the
+# counts, classifications or neighborhoods change
+_fit_cache = KeyedVersionCache(MAP_DATA_VERSIONS, max_entries=1)
+
+
+def _month_label(index: int) -> str:
+    """Month index (year * 12 + month - 1) as 'YYYY-MM'."""
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _fit_history(db: Session) -> Optional[dict]:
+    _, meta = get_crime_meta(db)
+
+    r = db.execute(text(f"""
+        SELECT id, name, {", ".join(SCORE_COLS)}
+        FROM neighborhoods
+        ORDER BY id
+    """))
+    nb = r.fetchall()
+
+    rows = db.execute(text("""
+        SELECT neighborhood_id, classification_id, year * 12 + month - 1 AS t,
+               SUM(crime_count) AS crime_count
+        FROM crime_monthly_counts
+        GROUP BY neighborhood_id, classification_id, year, month
+    """)).fetchall()
+    if not rows or not nb:
+        return None
+
+    nid, cid, t, count = (np.asarray(c) for c in zip(*rows))
+    ids = np.array([row[0] for row in nb], dtype=np.int64)
+    class_ids = np.array(sorted(set(meta.classifications) | set(cid.tolist())), dtype=np.int64)
+    t0, t1 = int(t.min()), int(t.max())
+
+    # (neighborhood, classification) series x months, zero where no row
+    ni = np.searchsorted(ids, nid)
+    known = (ni < len(ids)) & (ids[np.minimum(ni, len(ids) - 1)] == nid)
+    ci = np.searchsorted(class_ids, cid)
+    y = np.zeros((len(ids) * len(class_ids), t1 - t0 + 1))
+    np.add.at(y, (ni[known] * len(class_ids) + ci[known], t[known] - t0), count[known].astype(np.float64))
+
+    scores = np.array([row[2:] for row in nb], dtype=np.float64)
+    return {
+        "ids": ids,
+        "names": [row[1] for row in nb],
+        "class_ids": class_ids,
+        "weights": np.array([meta.classifications.get(int(c), {}).get("weight", 1) for c in class_ids],
+                            dtype=np.float64),
+        "r2": r2_score(np.nan_to_num(scores)),
+        "first": t0,
+        "last": t1,
+        "fit": fit_series(y),
+    }
+
+
+# GET /api/forecast - monthly crime counts, R and labels for the next months
+@router.get("/forecast")
+def get_forecast(
+    horizon: int = Query(3, ge=1, le=MAX_HORIZON, description="Months after the last month with data"),
+    neighborhood_id: Optional[int] = Query(None, description="Only this neighborhood"),
+    db: Session = Depends(get_db),
+):
+    hist = _fit_cache.get(db, "fit", lambda: _fit_history(db))
+    if hist is None:
+        raise HTTPException(status_code=404, detail="No crime history to forecast from")
+
+    ids, class_ids, fit = hist["ids"], hist["class_ids"], hist["fit"]
+    counts = fit.forecast(horizon).reshape(len(ids), len(class_ids), horizon)
+
+    # ── Projected R per month, as in training: each month scored as a whole
+    #    city (R1 against the month's max weighted sum)
+    r1, r, codes = formula_scores(counts.transpose(2, 0, 1), hist["weights"], hist["r2"])
+    r1, r, labels = r1.T, r.T, label_names(codes.T)
+
+    rows = np.arange(len(ids))
+    if neighborhood_id is not None:
+        rows = np.flatnonzero(ids == neighborhood_id)
+        if not len(rows):
+            raise HTTPException(status_code=404, detail=f"Neighborhood id={neighborhood_id} not found")
+
+    months = [_month_label(hist["last"] + h) for h in range(1, horizon + 1)]
+    keys = [f"crime_c{int(c)}" for c in class_ids]
+    counts = counts.round(2)
+    totals = counts.sum(axis=1).round(2)
+
+    return FastJSONResponse({
+        "horizon": horizon,
+        "method": fit.method,
+        "history": {"from": _month_label(hist["first"]), "to": _month_label(hist["last"])},
+        "months": months,
+        "neighborhoods": [
+            {
+                "id": int(ids[i]),
+                "name": hist["names"][i],
+                "forecast": [
+                    {
+                        "month": months[h],
+                        "crime_counts": dict(zip(keys, counts[i, :, h].tolist())),
+                        "total": float(totals[i, h]),
+                        "r1": round(float(r1[i, h]), 2),
+                        "r2": round(float(hist["r2"][i]), 2),
+                        "r": round(float(r[i, h]), 2),
+                        "label": labels[i, h],
+                    }
+                    for h in range(horizon)
+                ],
+            }
+            for i in rows
+        ],
+    })
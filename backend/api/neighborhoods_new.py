@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from pydantic import BaseModel, Field
@@ -9,35 +9,91 @@ import os
 
 from database import get_db, engine
 from models import Neighborhood, CrimeMonthlyCount, CrimeClassification
+from utils.responses import FastJSONResponse, check_layout, columnar
+from utils.spatial import get_spatial_index, parse_bbox
 
 router = APIRouter(prefix="/api", tags=["neighborhoods"])
 
+# neighborhoods score column -> key used in API responses
+SCORE_KEYS = {
+    "population_density_score": "population_density",
+    "divorce_ratio_score": "divorce_ratio",
+    "unmarried_over_30_score": "unmarried_over_30",
+    "university_education_score": "university_education",
+    "unemployment_score": "unemployment",
+    "income_score": "income",
+    "vitality_score": "vitality",
+}
+
 
 # ─────────────────────────────────────────────
 # GET /api/neighborhoods  – list all
 # ─────────────────────────────────────────────
 @router.get("/neighborhoods")
-def list_neighborhoods(db: Session = Depends(get_db)):
-    rows = db.query(Neighborhood).order_by(Neighborhood.name).all()
-    return [
+def list_neighborhoods(
+    layout: str = Query("records", description="records or columnar"),
+    bbox: Optional[str] = Query(None, description="Viewport: min_lng,min_lat,max_lng,max_lat"),
+    db: Session = Depends(get_db),
+):
+    check_layout(layout)
+    box = parse_bbox(bbox)
+
+    where, params = "", {}
+    if box is not None:
+        # Resolved against the in-memory spatial index, not a table scan
+        where = "WHERE id = ANY(:ids)"
+        params["ids"] = get_spatial_index(db).ids_within(box).tolist()
+
+    result = db.execute(text(f"""
+        SELECT id, name, latitude::float8 AS lat, longitude::float8 AS lng, is_core,
+               population_density_score, divorce_ratio_score,
+               unmarried_over_30_score, university_education_score,
+               unemployment_score, income_score, vitality_score
+        FROM neighborhoods
+        {where}
+        ORDER BY name
+    """), params)
+    columns = [SCORE_KEYS.get(c, c) for c in result.keys()]
+    rows = result.fetchall()
+
+    if layout == "columnar":
+        return FastJSONResponse(columnar(columns, rows))
+
+    return FastJSONResponse([
+        {
+            "id": r.id,
+            "name": r.name,
+            "lat": r.lat,
+            "lng": r.lng,
+            "is_core": r.is_core,
+            "scores": dict(zip(columns[5:], r[5:])),
+        }
+        for r in rows
+    ])
+
+
+# ─────────────────────────────────────────────
+# GET /api/neighborhoods/nearest  – k nearest to a point
+# ─────────────────────────────────────────────
+@router.get("/neighborhoods/nearest")
+def nearest_neighborhoods(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    k: int = Query(5, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    index = get_spatial_index(db)
+    pos, dist = index.nearest(lat, lng, k)
+    return FastJSONResponse([
         {
-            "id": n.id,
-            "name": n.name,
-            "lat": float(n.latitude),
-            "lng": float(n.longitude),
-            "is_core": getattr(n, "is_core", True),
-            "scores": {
-                "population_density": n.population_density_score,
-                "divorce_ratio": n.divorce_ratio_score,
-                "unmarried_over_30": n.unmarried_over_30_score,
-                "university_education": n.university_education_score,
-                "unemployment": n.unemployment_score,
-                "income": n.income_score,
-                "vitality": n.vitality_score,
-            },
+            "id": int(index.ids[p]),
+            "name": index.names[p],
+            "lat": float(index.lat[p]),
+            "lng": float(index.lng[p]),
+            "distance_km": round(float(d), 3),
         }
-        for n in rows
-    ]
+        for p, d in zip(pos, dist)
+    ])
 
 
 # ─────────────────────────────────────────────
@@ -1,26 +1,124 @@
-from fastapi import APIRouter, Depends
+from datetime import date
+from typing import Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from database import get_db
 from models import Neighbourhood
+from api.risk_new import LABEL_ORDER
+from utils.cache import TTLCache
+from utils.responses import FastJSONResponse, check_layout, columnar
+from utils.scoring import scores_from_sums
+from utils.lookups import neighborhood_id
 
 router = APIRouter(prefix="/api", tags=["Neighbourhoods"])
 
-# Calculates total number of neighbourhoods and total population
-# Sums population across all neighbourhoods for overview stats
+# Every dashboard tile in one SQL round-trip:
+#   totals       - neighbourhoods, population, recorded crimes and incidents
+#   by_category  - incidents per main category (neighbourhood histograms)
+#   by_month     - crimes and incidents per month of the year
+#   risk_labels  - formula risk label distribution for the year: the SQL
+#                  returns each neighborhood's weighted crime sum and R2, and
+#                  utils.scoring normalizes and labels them as for /api/risk
+# Memoized for a few seconds: the tiles tolerate brief staleness and the
+# dashboard is the most frequently loaded page.
+
+DASHBOARD_TTL_SECONDS = 30
+_dashboard_cache = TTLCache(ttl=DASHBOARD_TTL_SECONDS)
+
+_DASHBOARD_SQL = text("""
+    WITH
+    legacy AS (
+        SELECT COUNT(*) AS n, COALESCE(SUM(population), 0) AS population
+        FROM neighbourhood
+    ),
+    monthly AS (
+        SELECT month,
+               SUM(crime_count)    AS crime_count,
+               SUM(incident_count) AS incident_count
+        FROM crime_monthly_counts
+        WHERE year = :year
+        GROUP BY month
+    ),
+    categories AS (
+        SELECT cw.main_category, SUM(h.crime_count) AS crime_count
+        FROM neighborhood_category_counts h
+        JOIN crime_weights cw ON cw.id = h.category_id
+        WHERE h.crime_count > 0
+        GROUP BY cw.main_category
+    ),
+    weighted AS (
+        SELECT n.id,
+               (n.population_density_score + n.divorce_ratio_score
+                + n.unmarried_over_30_score + n.university_education_score
+                + n.unemployment_score + n.income_score
+                + n.vitality_score) / 7.0 * 20.0 AS r2,
+               COALESCE(SUM(m.crime_count * cc.weight), 0)::float8 AS weighted_sum
+        FROM neighborhoods n
+        LEFT JOIN crime_monthly_counts m
+               ON m.neighborhood_id = n.id AND m.year = :year
+        LEFT JOIN crime_classifications cc ON cc.id = m.classification_id
+        GROUP BY n.id
+    ),
+    scored AS (
+        SELECT COALESCE(array_agg(weighted_sum ORDER BY id), '{}') AS weighted_sums,
+               COALESCE(array_agg(r2::float8 ORDER BY id), '{}')   AS r2
+        FROM weighted
+    )
+    SELECT
+        (SELECT COUNT(*) FROM neighborhoods)  AS total_neighborhoods,
+        (SELECT n FROM legacy)                AS total_neighbourhoods,
+        (SELECT population FROM legacy)       AS total_population,
+        (SELECT COUNT(*) FROM crime_form_data) AS total_incidents,
+        (SELECT COALESCE(SUM(crime_count), 0) FROM monthly) AS total_crimes,
+        (SELECT COALESCE(json_object_agg(main_category, crime_count), '{}')
+           FROM categories)                   AS by_category,
+        (SELECT COALESCE(json_agg(json_build_object(
+                    'month', month,
+                    'crime_count', crime_count,
+                    'incident_count', incident_count) ORDER BY month), '[]')
+           FROM monthly)                      AS by_month,
+        (SELECT weighted_sums FROM scored)    AS weighted_sums,
+        (SELECT r2 FROM scored)               AS r2
+""")
 
-@router.get("/dashboard-summary")
-async def dashboard_summary(db: Session = Depends(get_db)):
-    """Basic summary for the dashboard based on neighbourhood data."""
-    total_neighbourhoods = db.query(Neighbourhood).count()
-    total_population = sum(float(n.population) for n in db.query(Neighbourhood).all())
+
+def _dashboard_summary(db: Session, year: int) -> dict:
+    row = db.execute(_DASHBOARD_SQL, {"year": year}).mappings().one()
+    by_month = {m: {"crime_count": 0, "incident_count": 0} for m in range(1, 13)}
+    for m in row["by_month"]:
+        by_month[m["month"]] = {
+            "crime_count": int(m["crime_count"]),
+            "incident_count": int(m["incident_count"]),
+        }
+    _, _, codes = scores_from_sums(np.array(row["weighted_sums"]), np.array(row["r2"]))
+    label_counts = np.bincount(codes, minlength=len(LABEL_ORDER))
 
     return {
-        "total_neighbourhoods": total_neighbourhoods,
-        "total_population": total_population,
+        "year": year,
+        "total_neighbourhoods": int(row["total_neighbourhoods"]),
+        "total_population": float(row["total_population"]),
+        "total_neighborhoods": int(row["total_neighborhoods"]),
+        "total_crimes": int(row["total_crimes"]),
+        "total_incidents": int(row["total_incidents"]),
+        "incidents_by_category": {k: int(v) for k, v in row["by_category"].items()},
+        "crimes_by_month": [{"month": m, **v} for m, v in by_month.items()],
+        "risk_label_distribution": dict(zip(LABEL_ORDER, label_counts.tolist())),
     }
 
+
+@router.get("/dashboard-summary")
+async def dashboard_summary(
+    year: Optional[int] = Query(None, description="Defaults to the current year"),
+    db: Session = Depends(get_db),
+):
+    """All dashboard tiles (totals, category/month breakdowns, risk labels)."""
+    year = year or date.today().year
+    return _dashboard_cache.get(year, lambda: _dashboard_summary(db, year))
+
 # Returns all neighbourhood data for charts and tables
 # Converts Numeric database types to float for JSON serialization
 
@@ -45,23 +143,74 @@ async def list_neighbourhoods(db: Session = Depends(get_db)):
 # Used specifically for the map visualization page
 
 @router.get("/neighbourhoods-with-coords")
-async def list_neighbourhoods_with_coords(db: Session = Depends(get_db)):
+async def list_neighbourhoods_with_coords(
+    layout: str = Query("records", description="records or columnar"),
+    db: Session = Depends(get_db),
+):
     """Return all neighbourhoods with their coordinates for map display."""
-    rows = db.query(Neighbourhood).order_by(Neighbourhood.name).all()
-    return [
-        {
-            "id": n.id,
-            "name": n.name,
-            "latitude": float(n.latitude) if n.latitude is not None else None,
-            "longitude": float(n.longitude) if n.longitude is not None else None,
-            "population": float(n.population) if n.population is not None else None,
-        }
-        for n in rows
-    ]
+    check_layout(layout)
+    result = db.execute(text("""
+        SELECT id, name, latitude::float8 AS latitude, longitude::float8 AS longitude,
+               population::float8 AS population
+        FROM neighbourhood
+        ORDER BY name
+    """))
+    columns = list(result.keys())
+    rows = result.fetchall()
+
+    # Numeric columns are cast to float8 above: Decimal values would each
+    # go through FastJSONResponse's Python fallback
+    if layout == "columnar":
+        return FastJSONResponse(columnar(columns, rows))
+    return FastJSONResponse([dict(zip(columns, r)) for r in rows])
+
+# Neutral/medium weight reported for neighbourhoods with no crime data
+NEUTRAL_CRIME_WEIGHT = 5
+
+# Returns the dominant crime category, its weight and incident counts for
+# every neighbourhood in one response (replaces one crime-weight call per
+# neighbourhood). Reads the incrementally maintained
+# neighborhood_category_counts histograms, never crime_form_data itself.
+
+@router.get("/neighbourhoods/crime-weights")
+async def list_neighbourhood_crime_weights(db: Session = Depends(get_db)):
+    """Dominant category and its weight for every neighbourhood."""
+    rows = db.execute(text("""
+        SELECT n.id, n.name, cw.main_category, cw.weight, h.crime_count
+        FROM neighborhoods n
+        LEFT JOIN neighborhood_category_counts h
+               ON h.neighborhood_id = n.id AND h.crime_count > 0
+        LEFT JOIN crime_weights cw ON cw.id = h.category_id
+        ORDER BY n.name, h.crime_count DESC NULLS LAST, cw.main_category
+    """)).fetchall()
+
+    out = {}
+    for nid, name, category, weight, cnt in rows:
+        entry = out.get(nid)
+        if entry is None:
+            # First row per neighbourhood is its dominant category
+            entry = out[nid] = {
+                "neighbourhood_id": nid,
+                "neighbourhood_name": name,
+                "crime_weight": int(weight) if weight is not None else NEUTRAL_CRIME_WEIGHT,
+                "main_category": category,
+                "crime_count": int(cnt or 0),
+                "total_count": 0,
+                "category_counts": {},
+            }
+        if category is not None:
+            entry["category_counts"][category] = int(cnt)
+            entry["total_count"] += int(cnt)
+
+    return list(out.values())
 
 # Calculates average crime weight for a specific neighbourhood
 # Finds the most common crime category in that area
-# Uses raw SQL query to join crime_form_data with crime_weights
+# The name is resolved to neighborhoods.id once (cached), then the dominant
+# category is read from the neighborhood_category_counts histogram.
+# Names with no neighborhoods row (or no histogram counts) fall back to
+# counting crime_form_data by name, which also sees incidents whose
+# neighborhood_id could not be resolved when they were written
 # Returns neutral weight (5) if no crime data exists for the neighbourhood
 
 @router.get("/neighbourhood/{neighbourhood_name}/crime-weight")
@@ -75,22 +224,36 @@ async def get_neighbourhood_crime_weight(
     This is computed by finding the most common crime category in this neighbourhood
     and returning its weight.
     """
+    nid = neighborhood_id(db, neighbourhood_name)
+
     # Get the most common crime category in this neighbourhood
-    result = db.execute(text("""
-        SELECT c.main_category, cw.weight, COUNT(*) as cnt
-        FROM crime_form_data c
-        JOIN crime_weights cw ON cw.main_category = c.main_category
-        WHERE c.neighbourhood_name = :neighbourhood_name
-        GROUP BY c.main_category, cw.weight
-        ORDER BY cnt DESC, c.main_category
-        LIMIT 1
-    """), {"neighbourhood_name": neighbourhood_name}).mappings().first()
+    result = None
+    if nid is not None:
+        result = db.execute(text("""
+            SELECT cw.main_category, cw.weight, h.crime_count AS cnt
+            FROM neighborhood_category_counts h
+            JOIN crime_weights cw ON cw.id = h.category_id
+            WHERE h.neighborhood_id = :nid AND h.crime_count > 0
+            ORDER BY h.crime_count DESC, cw.main_category
+            LIMIT 1
+        """), {"nid": nid}).mappings().first()
+
+    if not result:
+        result = db.execute(text("""
+            SELECT c.main_category, cw.weight, COUNT(*) AS cnt
+            FROM crime_form_data c
+            JOIN crime_weights cw ON cw.main_category = c.main_category
+            WHERE c.neighbourhood_name = :neighbourhood_name
+            GROUP BY c.main_category, cw.weight
+            ORDER BY cnt DESC, c.main_category
+            LIMIT 1
+        """), {"neighbourhood_name": neighbourhood_name}).mappings().first()
     
     if not result:
         # No crime data for this neighbourhood, return neutral weight
         return {
             "neighbourhood_name": neighbourhood_name,
-            "crime_weight": 5,  # Neutral/medium weight
+            "crime_weight": NEUTRAL_CRIME_WEIGHT,
             "main_category": None,
             "crime_count": 0
         }
@@ -1,10 +1,14 @@
 import joblib
 import pandas as pd
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
+from api.risk_new import yearly_spatial_lag
 from database import get_db, engine
+from utils.batch_predict import bundle_version
+from utils.explain import bundle_explanation, contributions, top_contributions
+from utils.spatial import LAG_K, LAG_PREFIX
 
 router = APIRouter(prefix="/api", tags=["predict"])
 
@@ -12,15 +16,22 @@ MODEL_PATH = "risk_model.joblib"
 
 def load_bundle():
     bundle = joblib.load(MODEL_PATH)
-    return bundle["model"], bundle["feature_cols"], bundle.get("year", 2025)
+    return (
+        bundle["model"],
+        bundle["feature_cols"],
+        bundle.get("year", 2025),
+        bundle.get("spatial_lag_k", LAG_K),
+        bundle,
+    )
 
 @router.get("/predict")
 def predict(
     neighborhood_id: int = Query(..., description="Neighborhood ID to predict"),
     year: int = Query(2025, description="Year to use for crime totals (default 2025)"),
+    explain: bool = Query(False, description="Add per-feature contributions to the predicted class"),
     db: Session = Depends(get_db),
 ):
-    model, feature_cols, trained_year = load_bundle()
+    model, feature_cols, trained_year, lag_k, bundle = load_bundle()
 
     # 1) Fetch neighborhood demographics
     n = db.execute(
@@ -70,6 +81,13 @@ def predict(
         **crime_features,
     }
 
+    # Spatial-lag features (models trained with --spatial-lag) come from the
+    # neighbours' yearly counts and R, cached per data version
+    if any(c.startswith(LAG_PREFIX) for c in feature_cols):
+        lag = yearly_spatial_lag(db, year, lag_k)
+        if neighborhood_id in lag.index:
+            row.update(lag.loc[neighborhood_id].to_dict())
+
     X = pd.DataFrame([row])
 
     # Ensure missing crime columns exist as 0
@@ -90,10 +108,26 @@ def predict(
         proba = {classes[i]: float(probs[i]) for i in range(len(classes))}
         confidence = float(max(probs))
 
-    return {
+    out = {
         "neighborhood_id": neighborhood_id,
         "year": year,
         "predicted_label": pred,
         "confidence": confidence,
         "probabilities": proba,
-    }
\ No newline at end of file
+    }
+
+    # 5) Tree path decomposition: bias + contributions = probabilities
+    if explain:
+        explanation = bundle_explanation(bundle, bundle_version(MODEL_PATH), MODEL_PATH)
+        if explanation is None:
+            raise HTTPException(status_code=400, detail="The current model does not support explanations")
+        k = list(model.classes_).index(pred)
+        contrib = contributions(model, explanation, X)[0, :, k]
+        out["explanation"] = {
+            "class": pred,
+            "bias": round(float(explanation["bias"][k]), 4),
+            "contributions": top_contributions(feature_cols, X.iloc[0].to_numpy(dtype=float), contrib),
+            "global_importance": explanation.get("global_importance"),
+        }
+
+    return out
\ No newline at end of file
@@ -1,24 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
+import threading
+import zipfile
+from functools import partial
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from io import BytesIO
+import numpy as np
 import pandas as pd
 import joblib
 
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import (
-    SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
+    SimpleDocTemplate, Paragraph, Spacer, PageBreak
 )
 from reportlab.lib.units import inch
 
-from database import get_db, engine
+from core.config import REPORT_CACHE_DIR, REPORT_CACHE_MAX_MB, REPORT_JOB_WORKERS
+from database import get_db, engine, SessionLocal
+from utils.batch_predict import bundle_version
+from utils.cache import KeyedVersionCache, data_versions
+from utils.chart_generator import chart_flowable, chart_spec, render_charts, svg_available
+from utils.crime_meta import get_crime_meta
+from utils.export import dataframe_response, negotiate_table_format
+from utils.jobs import JobQueue, JobQueueFull
+from utils.pdf_tables import chunked_tables, format_fixed, format_text
+from utils.report_cache import DiskLRUCache, cache_key
+from utils.responses import FastJSONResponse, check_layout
+from utils.scoring import formula_scores, label_names, r2_score
+from utils.spatial import LAG_K, add_spatial_lag
+from utils.uncertainty import MAX_UNCERTAINTY_SAMPLES, UNCERTAINTY_SAMPLES, uncertainty_frame
 
 router = APIRouter(prefix="/api/reports", tags=["Reports"])
 
@@ -33,60 +49,8 @@ SEASONS = {
 
 LABEL_ORDER = ["safe", "moderate", "dangerous", "very_dangerous"]
 
-# ── Fixed threshold labelling (matching the images) ───────────────────────────
-def label_by_threshold(r_value: float) -> str:
-    if r_value > 80:
-        return "very_dangerous"
-    if r_value >= 60:
-        return "dangerous"
-    if r_value >= 40:
-        return "moderate"
-    return "safe"
-
-
-def _label_series_by_threshold(values: pd.Series) -> pd.Series:
-    return values.apply(label_by_threshold)
-
-
-def _make_pie(labels, values, title: str) -> BytesIO:
-    buf = BytesIO()
-    fig = plt.figure(figsize=(6, 4))
-    plt.title(title)
-    plt.pie(values, labels=labels, autopct="%1.0f%%", startangle=90)
-    plt.tight_layout()
-    fig.savefig(buf, format="png", dpi=150)
-    plt.close(fig)
-    buf.seek(0)
-    return buf
-
-
-def _make_bar(x_labels, y_values, title: str, y_label: str) -> BytesIO:
-    buf = BytesIO()
-    fig = plt.figure(figsize=(8, 4))
-    plt.title(title)
-    plt.bar(x_labels, y_values)
-    plt.ylabel(y_label)
-    plt.xticks(rotation=45, ha="right")
-    plt.tight_layout()
-    fig.savefig(buf, format="png", dpi=150)
-    plt.close(fig)
-    buf.seek(0)
-    return buf
-
-
-def _make_line(x_labels, y_values, title: str, y_label: str) -> BytesIO:
-    buf = BytesIO()
-    fig = plt.figure(figsize=(8, 4))
-    plt.title(title)
-    plt.plot(x_labels, y_values, marker="o")
-    plt.ylabel(y_label)
-    plt.xticks(rotation=45, ha="right")
-    plt.tight_layout()
-    fig.savefig(buf, format="png", dpi=150)
-    plt.close(fig)
-    buf.seek(0)
-    return buf
-
+# Tables report results are derived from
+REPORT_DATA_VERSIONS = ("neighborhoods", "crime_meta", "crime_counts")
 
 def _load_model_bundle():
     bundle = joblib.load(MODEL_PATH)
@@ -104,8 +68,8 @@ def _build_season_df(db: Session, year: int, season: str) -> pd.DataFrame:
             SELECT
               id AS neighborhood_id,
               name,
-              latitude,
-              longitude,
+              latitude::float8 AS latitude,
+              longitude::float8 AS longitude,
               population_density_score,
               divorce_ratio_score,
               unmarried_over_30_score,
@@ -160,39 +124,29 @@ def _build_season_df(db: Session, year: int, season: str) -> pd.DataFrame:
         "vitality_score",
     ]
 
-    def weighted_sum(row) -> float:
-        s = 0.0
-        for cid, w in wmap.items():
-            col = f"crime_c{int(cid)}"
-            s += float(row.get(col, 0.0)) * float(w)
-        return s
-
-    df["weighted_sum"] = df.apply(weighted_sum, axis=1)
-
-    # ── R1: normalize against the neighborhood with the highest weighted crime
-    #        sum so that R1 ∈ [0, 100]
-    max_ws = df["weighted_sum"].max()
-    if max_ws > 0:
-        df["r1"] = (df["weighted_sum"] / max_ws) * 100.0
-    else:
-        df["r1"] = 0.0
-
-    # ── R2: mean of 7 demographic scores (each 1/3/5) scaled so that
-    #        score=1 → 20, score=3 → 60, score=5 → 100  (i.e. × 20)
-    df["r2"] = df[demo_cols].mean(axis=1) * 20.0
-
-    # ── R: simple average of R1 and R2
-    df["r"] = (df["r1"] + df["r2"]) / 2.0
-
-    # ── Formula label uses fixed thresholds from the project spec
-    df["formula_label"] = _label_series_by_threshold(df["r"])
+    # ── R1 against the neighborhood with the highest weighted crime sum, R2
+    #    from the 7 demographic scores, R and the fixed-threshold label
+    #    (utils.scoring); classifications without a weight count 0
+    crime_cols = [c for c in df.columns if c.startswith("crime_c")]
+    weights = np.array([float(wmap.get(int(c[len("crime_c"):]), 0)) for c in crime_cols])
+    counts = df[crime_cols].to_numpy(dtype=np.float64).reshape(len(df), len(crime_cols))
+    df["weighted_sum"] = counts @ weights
+    r2 = r2_score(df[demo_cols].to_numpy(dtype=np.float64))
+    r1, r, codes = formula_scores(counts, weights, r2)
+    df["r1"] = r1
+    df["r2"] = r2
+    df["r"] = r
+    df["formula_label"] = label_names(codes)
 
     return df
 
 
-def _apply_ml_predictions(df: pd.DataFrame) -> pd.DataFrame:
+def _apply_ml_predictions(df: pd.DataFrame, db: Session) -> pd.DataFrame:
     model, feature_cols, bundle = _load_model_bundle()
 
+    # Lag features are averaged over the season's own counts and R
+    add_spatial_lag(db, df, feature_cols, bundle.get("spatial_lag_k", LAG_K), id_col="neighborhood_id")
+
     for col in feature_cols:
         if col not in df.columns:
             df[col] = 0
@@ -201,47 +155,81 @@ def _apply_ml_predictions(df: pd.DataFrame) -> pd.DataFrame:
 
     df["predicted_label"] = None
     df["confidence"] = None
-    df["probabilities"] = None
 
+    # Class probabilities are kept as one p_<label> column per class;
+    # _probability_dicts() builds the per-row JSON objects when needed
     if hasattr(model, "predict_proba"):
         probs = model.predict_proba(X)
         classes = list(model.classes_)
 
         pred_idx = probs.argmax(axis=1)
-        df["predicted_label"] = [classes[i] for i in pred_idx]
+        df["predicted_label"] = np.asarray(classes)[pred_idx]
         df["confidence"] = probs.max(axis=1)
-        df["probabilities"] = [
-            {classes[i]: float(p[i]) for i in range(len(classes))}
-            for p in probs
-        ]
+        for i, c in enumerate(classes):
+            df[f"p_{c}"] = probs[:, i]
     else:
         preds = model.predict(X)
         df["predicted_label"] = [str(p) for p in preds]
         df["confidence"] = None
-        df["probabilities"] = None
 
     return df
 
 
+def _probability_columns(df: pd.DataFrame) -> list:
+    return [c for c in df.columns if c.startswith("p_")]
+
+
+def _probability_dicts(df: pd.DataFrame) -> list:
+    cols = _probability_columns(df)
+    if not cols:
+        return [None] * len(df)
+    classes = [c[2:] for c in cols]
+    return [dict(zip(classes, p)) for p in df[cols].to_numpy().tolist()]
+
+
 def _counts_in_order(labels_series: pd.Series) -> dict:
     vc = labels_series.value_counts().to_dict() if labels_series is not None else {}
     return {k: int(vc.get(k, 0)) for k in LABEL_ORDER}
 
 
+# Monte Carlo intervals of the season's formula scores, per (year, season,
+# sample count); redrawn when counts, weights or neighborhoods change
+_uncertainty_cache = KeyedVersionCache(REPORT_DATA_VERSIONS, max_entries=16)
+
+
+def _season_uncertainty(db: Session, df: pd.DataFrame, year: int, season: str, samples: int) -> pd.DataFrame:
+    """utils.uncertainty columns for a _build_season_df() frame, on its index."""
+    def load():
+        _, meta = get_crime_meta(db)
+        weight_map = {cid: c["weight"] for cid, c in meta.classifications.items()}
+        return uncertainty_frame(df, weight_map, samples)
+
+    return _uncertainty_cache.get(db, (year, season, samples), load)
+
+
 @router.get("/season")
 def season_report(
+    request: Request,
     year: int = Query(2025),
     season: str = Query("ramadan"),
     mode: str = Query("ml", description="ml or formula"),
+    layout: str = Query("records", description="records or columnar"),
+    format: Optional[str] = Query(None, description="json, arrow or parquet (or use the Accept header)"),
+    uncertainty: bool = Query(False, description="Add Monte Carlo intervals of R1/R and formula label stability"),
+    samples: int = Query(UNCERTAINTY_SAMPLES, ge=10, le=MAX_UNCERTAINTY_SAMPLES, description="Draws for uncertainty"),
     db: Session = Depends(get_db),
 ):
+    check_layout(layout)
+    fmt = negotiate_table_format(request, format)
     df = _build_season_df(db, year, season)
+    # Intervals are for the formula scores, in either mode
+    unc = _season_uncertainty(db, df, year, season, samples) if uncertainty else None
 
     if mode not in {"ml", "formula"}:
         raise HTTPException(status_code=400, detail="mode must be 'ml' or 'formula'")
 
     if mode == "ml":
-        df = _apply_ml_predictions(df)
+        df = _apply_ml_predictions(df, db)
         label_col = "predicted_label"
     else:
         label_col = "formula_label"
@@ -260,44 +248,67 @@ def season_report(
     if mode == "ml":
         table["predicted_label"] = df["predicted_label"]
         table["confidence"] = df["confidence"]
-        table["probabilities"] = df["probabilities"]
 
-    return {
+    if unc is not None:
+        table = pd.concat([table, unc], axis=1)
+
+    if fmt != "json":
+        # The unrounded table, with p_<label> probability columns
+        table = pd.concat([df[["neighborhood_id"]], table, df[_probability_columns(df)]], axis=1)
+        return dataframe_response(table, fmt, f"season_{season}_{year}_{mode}")
+
+    if mode == "ml":
+        table["probabilities"] = _probability_dicts(df)
+
+    # Coordinates are returned at full precision
+    table = table.round({c: 3 for c in ("r1", "r2", "r", "confidence") if c in table.columns})
+    if unc is not None:
+        table = table.round({c: 3 for c in unc.columns})
+    if layout == "columnar":
+        rows = {c: table[c].to_numpy() for c in table.columns}
+    else:
+        rows = table.to_dict(orient="records")
+
+    return FastJSONResponse({
         "year": year,
         "season": season,
         "months": SEASONS[season],
         "mode": mode,
         "label_counts": label_counts,
         "avg_r": float(df["r"].mean()) if len(df) else 0.0,
-        "top_risk": [{"name": r["name"], "r": float(r["r"])} for _, r in top.iterrows()],
-        "rows": table.round(3).to_dict(orient="records"),
-    }
+        "top_risk": [{"name": n, "r": r} for n, r in zip(top["name"], top["r"])],
+        "rows": rows,
+    })
 
 
-@router.get("/export")
-def export_season_pdf(
-    year: int = Query(2025),
-    season: str = Query("ramadan"),
-    mode: str = Query("ml", description="ml or formula"),
-    neighbourhoods: str = Query("", description="Comma-separated neighbourhood names to include; empty = all"),
-    db: Session = Depends(get_db),
-):
+def _season_frame(db: Session, year: int, season: str, mode: str) -> pd.DataFrame:
+    """Season DataFrame, with ML predictions applied in ml mode."""
     df = _build_season_df(db, year, season)
+    if mode == "ml":
+        df = _apply_ml_predictions(df, db)
+    return df
 
-    if mode not in {"ml", "formula"}:
-        raise HTTPException(status_code=400, detail="mode must be 'ml' or 'formula'")
 
+def _render_season_pdf(
+    db: Session, year: int, season: str, mode: str, selected: list, chart_format: str = "png",
+) -> bytes:
+    df = _season_frame(db, year, season, mode)
+    return _season_pdf_from_df(df, year, season, mode, selected, chart_format)
+
+
+def _season_pdf_from_df(
+    df: pd.DataFrame, year: int, season: str, mode: str, selected: list, chart_format: str = "png",
+) -> bytes:
+    """Lay out the season PDF from a _season_frame() result (not modified)."""
     title_mode = "Formula"
     label_col = "formula_label"
 
     if mode == "ml":
-        df = _apply_ml_predictions(df)
         title_mode = "ML"
         label_col = "predicted_label"
 
     # ── Apply neighbourhood filter (mirrors what the frontend does) ───────────
-    if neighbourhoods.strip():
-        selected = [n.strip() for n in neighbourhoods.split(",") if n.strip()]
+    if selected:
         df = df[df["name"].isin(selected)].copy()
 
     if df.empty:
@@ -305,27 +316,30 @@ def export_season_pdf(
 
     label_counts_dict = _counts_in_order(df[label_col])
 
-    pie_buf = _make_pie(
-        labels=list(label_counts_dict.keys()),
-        values=[int(x) for x in label_counts_dict.values()],
-        title=f"{title_mode} Label Distribution"
-    )
-
+    # All three charts are rendered together (in parallel, cached by content)
     top = df.sort_values("r", ascending=False).head(10)
-    bar_buf = _make_bar(
-        x_labels=list(top["name"]),
-        y_values=[float(x) for x in top["r"]],
-        title="Top 10 Neighborhoods by Risk (R)",
-        y_label="Risk (R)"
-    )
-
     sorted_df = df.sort_values("r", ascending=True)
-    line_buf = _make_line(
-        x_labels=list(sorted_df["name"]),
-        y_values=[float(x) for x in sorted_df["r"]],
-        title="Risk Score Trend (sorted low → high)",
-        y_label="Risk (R)"
-    )
+    pie_img, bar_img, line_img = render_charts([
+        chart_spec(
+            "pie",
+            labels=list(label_counts_dict.keys()),
+            values=list(label_counts_dict.values()),
+            title=f"{title_mode} Label Distribution",
+            size=(6, 4), fmt=chart_format,
+        ),
+        chart_spec(
+            "bar",
+            labels=top["name"], values=top["r"],
+            title="Top 10 Neighborhoods by Risk (R)", y_label="Risk (R)",
+            fmt=chart_format,
+        ),
+        chart_spec(
+            "line",
+            labels=sorted_df["name"], values=sorted_df["r"],
+            title="Risk Score Trend (sorted low → high)", y_label="Risk (R)",
+            fmt=chart_format,
+        ),
+    ])
 
     # ── Build PDF (landscape for wide table) ─────────────────────────────────
     buffer = BytesIO()
@@ -350,24 +364,24 @@ def export_season_pdf(
 
     story.append(Paragraph("<b>1) Label Distribution</b>", styles["Heading2"]))
     story.append(Spacer(1, 0.1 * inch))
-    story.append(Image(pie_buf, width=5.5 * inch, height=3.5 * inch))
+    story.append(chart_flowable(pie_img, chart_format, 5.5 * inch, 3.5 * inch))
 
     story.append(PageBreak())
     story.append(Paragraph("<b>2) Top Risk Neighborhoods</b>", styles["Heading2"]))
     story.append(Spacer(1, 0.1 * inch))
-    story.append(Image(bar_buf, width=7.5 * inch, height=3.5 * inch))
+    story.append(chart_flowable(bar_img, chart_format, 7.5 * inch, 3.5 * inch))
 
     story.append(PageBreak())
     story.append(Paragraph("<b>3) Risk Trend</b>", styles["Heading2"]))
     story.append(Spacer(1, 0.1 * inch))
-    story.append(Image(line_buf, width=7.5 * inch, height=3.5 * inch))
+    story.append(chart_flowable(line_img, chart_format, 7.5 * inch, 3.5 * inch))
 
     story.append(PageBreak())
     story.append(Paragraph(f"<b>4) Full Report Table ({len(df)} neighbourhoods)</b>", styles["Heading2"]))
     story.append(Spacer(1, 0.1 * inch))
 
     # ALL rows, sorted by R descending (same as frontend table)
-    show = df.sort_values("r", ascending=False).copy()
+    show = df.sort_values("r", ascending=False)
 
     cols = ["name", "r1", "r2", "r", "formula_label"]
     if mode == "ml":
@@ -375,7 +389,17 @@ def export_season_pdf(
     cols += ["unemployment_score", "income_score", "vitality_score"]
 
     header = [c.replace("_", " ").title() for c in cols]
-    table_data = [header]
+
+    # Cell text, formatted a column at a time
+    columns = []
+    for c in cols:
+        if c in {"r1", "r2", "r"}:
+            columns.append(format_fixed(show[c].to_numpy(), "%.2f"))
+        elif c == "confidence":
+            columns.append(format_fixed(show[c].to_numpy(), "%.1f%%", scale=100.0))
+        else:
+            columns.append(format_text(show[c].to_numpy()))
+    label_cols = [i for i, c in enumerate(cols) if c in {"formula_label", "predicted_label"}]
 
     LABEL_BG = {
         "very_dangerous": colors.HexColor("#ef4444"),
@@ -384,30 +408,13 @@ def export_season_pdf(
         "safe":           colors.HexColor("#22c55e"),
     }
 
-    label_cell_indices = []  # (row_idx, col_idx) for coloured cells
-    for row_i, (_, r) in enumerate(show.iterrows(), start=1):
-        row = []
-        for col_i, c in enumerate(cols):
-            v = r.get(c)
-            if c in {"r1", "r2", "r"}:
-                row.append(f"{float(v):.2f}")
-            elif c == "confidence" and v is not None:
-                row.append(f"{float(v) * 100:.1f}%")
-            elif c in {"formula_label", "predicted_label"}:
-                row.append(str(v) if v is not None else "—")
-                label_cell_indices.append((row_i, col_i))
-            else:
-                row.append(str(v) if v is not None else "—")
-        table_data.append(row)
-
     # Column widths — distribute across landscape A4 width (~10.27 inch usable)
     usable = 10.27
     n_cols = len(cols)
     base_w = usable / n_cols
     col_widths = [base_w * inch] * n_cols
 
-    tbl = Table(table_data, repeatRows=1, colWidths=col_widths)
-    tbl_style = TableStyle([
+    base_style = [
         ("BACKGROUND",   (0, 0), (-1, 0),  colors.HexColor("#374151")),
         ("TEXTCOLOR",    (0, 0), (-1, 0),  colors.whitesmoke),
         ("FONTNAME",     (0, 0), (-1, 0),  "Helvetica-Bold"),
@@ -419,25 +426,257 @@ def export_season_pdf(
         ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f9fafb")]),
         ("TOPPADDING",   (0, 0), (-1, -1), 3),
         ("BOTTOMPADDING",(0, 0), (-1, -1), 3),
-    ])
-
-    # Colour label cells
-    for (ri, ci) in label_cell_indices:
-        raw_label = table_data[ri][ci]
-        bg = LABEL_BG.get(raw_label, colors.HexColor("#94a3b8"))
-        tbl_style.add("BACKGROUND", (ci, ri), (ci, ri), bg)
-        tbl_style.add("TEXTCOLOR",  (ci, ri), (ci, ri), colors.white)
-        tbl_style.add("FONTNAME",   (ci, ri), (ci, ri), "Helvetica-Bold")
+    ]
 
-    tbl.setStyle(tbl_style)
-    story.append(tbl)
+    # Fixed-size chunks with label colours as per-run ranges (utils.pdf_tables)
+    story.extend(chunked_tables(
+        header, columns, col_widths, base_style,
+        label_cols=label_cols, label_bg=LABEL_BG,
+    ))
 
     doc.build(story)
-    buffer.seek(0)
+    return buffer.getvalue()
 
+
+# ── Rendered PDF cache ───────────────────────────────────────────────────────
+# A finished report is a pure function of its parameters, the data it was
+# built from and (in ML mode) the model, so it is cached on disk under a key
+# covering all of them. Any write to the source tables bumps a data version
+# and any retrain changes the model file, which changes the key: stale PDFs
+# are never served, they just age out of the LRU.
+
+_pdf_cache = DiskLRUCache(REPORT_CACHE_DIR, REPORT_CACHE_MAX_MB * 1024 * 1024, suffix=".pdf")
+
+
+def _season_pdf_key(
+    db: Session, year: int, season: str, mode: str, selected: list, chart_format: str,
+) -> str:
+    return cache_key(
+        "season_pdf", year, season, mode, selected, chart_format,
+        data_versions(db, REPORT_DATA_VERSIONS),
+        bundle_version(MODEL_PATH) if mode == "ml" else None,
+    )
+
+
+def _check_report_params(season: str, mode: str, chart_format: str) -> str:
+    """Validate export parameters; returns the chart format actually used."""
+    if season not in SEASONS:
+        raise HTTPException(status_code=400, detail=f"Invalid season. Use one of: {list(SEASONS.keys())}")
+    if mode not in {"ml", "formula"}:
+        raise HTTPException(status_code=400, detail="mode must be 'ml' or 'formula'")
+    if chart_format not in {"png", "svg"}:
+        raise HTTPException(status_code=400, detail="chart_format must be 'png' or 'svg'")
+    if chart_format == "svg" and not svg_available():
+        # svglib is optional; without it charts are embedded as PNG
+        return "png"
+    return chart_format
+
+
+def _normalize_selection(names) -> list:
+    """Order and duplicates in the neighbourhood filter do not change the report."""
+    return sorted({n.strip() for n in names if n.strip()})
+
+
+@router.get("/export")
+def export_season_pdf(
+    request: Request,
+    year: int = Query(2025),
+    season: str = Query("ramadan"),
+    mode: str = Query("ml", description="ml or formula"),
+    neighbourhoods: str = Query("", description="Comma-separated neighbourhood names to include; empty = all"),
+    chart_format: str = Query("png", description="png or svg (vector charts: smaller PDFs)"),
+    db: Session = Depends(get_db),
+):
+    chart_format = _check_report_params(season, mode, chart_format)
+    selected = _normalize_selection(neighbourhoods.split(","))
+
+    key = _season_pdf_key(db, year, season, mode, selected, chart_format)
+    etag = f'"{key}"'
     filename = f"season_{season}_{year}_{mode}.pdf"
-    return StreamingResponse(
-        buffer,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"inline; filename={filename}"},
-    )
\ No newline at end of file
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Content-Disposition": f"inline; filename={filename}",
+    }
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    pdf = _pdf_cache.get(key)
+    if pdf is None:
+        pdf = _render_season_pdf(db, year, season, mode, selected, chart_format)
+        _pdf_cache.put(key, pdf)
+
+    return Response(content=pdf, media_type="application/pdf", headers=headers)
+
+
+# ── Background report jobs ───────────────────────────────────────────────────
+# POST /api/reports/jobs queues one or many season reports and returns at
+# once; each report is rendered on the bounded job pool (REPORT_JOB_WORKERS),
+# reusing the PDF cache. Within a job every (year, season) DataFrame and its
+# ML predictions are computed once and shared by all reports that need them.
+# A job keeps only the PDF cache keys; downloads read the files back from the
+# cache, re-rendering any report evicted in the meantime.
+
+MAX_REPORTS_PER_JOB = 32
+
+_report_jobs = JobQueue(workers=REPORT_JOB_WORKERS)
+
+
+class ReportSpec(BaseModel):
+    year: int = 2025
+    season: str = "ramadan"
+    mode: str = "ml"
+    neighbourhoods: List[str] = Field(default_factory=list, description="Empty = all")
+    chart_format: str = "png"
+
+
+class ReportJobCreate(BaseModel):
+    reports: List[ReportSpec] = Field(..., min_length=1, max_length=MAX_REPORTS_PER_JOB)
+
+
+class _SeasonFrames:
+    """Per-job memo of _season_frame() results, safe to share between tasks."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, db: Session, year: int, season: str, mode: str) -> pd.DataFrame:
+        with self._lock:
+            entry = self._entries.setdefault((year, season, mode), [threading.Lock(), None])
+        with entry[0]:
+            if entry[1] is None:
+                if mode == "ml":
+                    # ML frames extend the formula frame of the same season
+                    base = self.get(db, year, season, "formula")
+                    entry[1] = _apply_ml_predictions(base.copy(), db)
+                else:
+                    entry[1] = _build_season_df(db, year, season)
+            return entry[1]
+
+
+def _report_filename(spec: ReportSpec) -> str:
+    return f"season_{spec.season}_{spec.year}_{spec.mode}.pdf"
+
+
+def _render_job_report(frames: _SeasonFrames, spec: ReportSpec) -> Tuple[str, bytes]:
+    """(PDF cache key, PDF) of one report, rendered unless already cached."""
+    db = SessionLocal()
+    try:
+        key = _season_pdf_key(
+            db, spec.year, spec.season, spec.mode, spec.neighbourhoods, spec.chart_format,
+        )
+        pdf = _pdf_cache.get(key)
+        if pdf is None:
+            df = frames.get(db, spec.year, spec.season, spec.mode)
+            pdf = _season_pdf_from_df(
+                df, spec.year, spec.season, spec.mode, spec.neighbourhoods, spec.chart_format,
+            )
+            _pdf_cache.put(key, pdf)
+        return key, pdf
+    finally:
+        db.close()
+
+
+def _job_task(frames: _SeasonFrames, spec: ReportSpec) -> str:
+    return _render_job_report(frames, spec)[0]
+
+
+def _job_pdf(job, i: int) -> bytes:
+    """PDF of a job's report i from the cache; re-rendered if it was evicted."""
+    pdf = _pdf_cache.get(job.results[i])
+    if pdf is None:
+        pdf = _render_job_report(_SeasonFrames(), job.meta[i])[1]
+    return pdf
+
+
+def _get_report_job(job_id: str):
+    job = _report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+
+# POST /api/reports/jobs - queue one or many season reports
+@router.post("/jobs", status_code=202)
+def create_report_job(payload: ReportJobCreate):
+    specs = []
+    for spec in payload.reports:
+        spec = spec.model_copy(update={
+            "chart_format": _check_report_params(spec.season, spec.mode, spec.chart_format),
+            "neighbourhoods": _normalize_selection(spec.neighbourhoods),
+        })
+        specs.append(spec)
+
+    frames = _SeasonFrames()
+    try:
+        job = _report_jobs.submit(
+            [partial(_job_task, frames, spec) for spec in specs],
+            meta=specs,
+        )
+    except JobQueueFull:
+        raise HTTPException(status_code=429, detail="Too many report jobs are running; try again later")
+    return {"job_id": job.id, "status": job.status, "total": job.total}
+
+
+# GET /api/reports/jobs/{job_id} - progress and per-report status
+@router.get("/jobs/{job_id}")
+def get_report_job(job_id: str):
+    job = _get_report_job(job_id)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "total": job.total,
+        "completed": job.completed,
+        "reports": [
+            {
+                "index": i,
+                **spec.model_dump(),
+                "status": status,
+                "error": error,
+                "filename": _report_filename(spec),
+            }
+            for i, (spec, status, error) in enumerate(zip(job.meta, job.task_status, job.errors))
+        ],
+    }
+
+
+# GET /api/reports/jobs/{job_id}/download - one PDF, or a ZIP of all of them
+@router.get("/jobs/{job_id}/download")
+def download_report_job(
+    job_id: str,
+    index: Optional[int] = Query(None, description="Download only this report"),
+):
+    job = _get_report_job(job_id)
+    if not job.finished:
+        raise HTTPException(status_code=409, detail="Report job is still running")
+
+    if index is not None:
+        if not 0 <= index < job.total:
+            raise HTTPException(status_code=404, detail="Report index out of range")
+        picked = [index]
+    else:
+        picked = range(job.total)
+    ready = [i for i in picked if job.results[i] is not None]
+    if not ready:
+        raise HTTPException(status_code=404, detail="No report in this job was rendered")
+
+    if len(picked) == 1:
+        i = ready[0]
+        return Response(
+            content=_job_pdf(job, i),
+            media_type="application/pdf",
+            headers={"Content-Disposition": f"attachment; filename={_report_filename(job.meta[i])}"},
+        )
+
+    buf = BytesIO()
+    # PDFs are already compressed: store them as-is
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_STORED) as zf:
+        for i in ready:
+            zf.writestr(f"{i + 1:02d}_{_report_filename(job.meta[i])}", _job_pdf(job, i))
+    return Response(
+        content=buf.getvalue(),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=reports_{job.id}.zip"},
+    )
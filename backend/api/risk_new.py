@@ -1,26 +1,37 @@
+from typing import Dict, List, Optional
+
 import joblib
+import numpy as np
 import pandas as pd
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from api.reports import SEASONS, _season_frame
 from database import get_db
-from models import Neighborhood, CrimeMonthlyCount, CrimeClassification
+from utils.batch_predict import bundle_version
+from utils.cache import KeyedVersionCache
+from utils.clusters import ClusterPyramid
+from utils.crime_meta import get_crime_meta
+from utils.explain import bundle_explanation, contributions, top_contributions
+from utils.export import dataframe_response, negotiate_table_format
+from utils.heatmap import encode_png, quantize, risk_surface
+from utils.responses import FastJSONResponse, check_layout
+from utils.scoring import LABELS, formula_scores, label_names, r2_score
+from utils.uncertainty import MAX_UNCERTAINTY_SAMPLES, PERCENTILES, UNCERTAINTY_SAMPLES, uncertainty_frame
+from utils.spatial import (
+    LAG_K, add_spatial_lag, get_spatial_index, lag_sources, parse_bbox, spatial_lag,
+)
 
 router = APIRouter(prefix="/api", tags=["risk"])
 
 MODEL_PATH = "risk_model.joblib"
-LABEL_ORDER = ["safe", "moderate", "dangerous", "very_dangerous"]
-
+LABEL_ORDER = list(LABELS)
 
-def label_by_threshold(r_value: float) -> str:
-    """Fixed threshold labels matching the project specification."""
-    if r_value > 80:
-        return "very_dangerous"
-    if r_value >= 60:
-        return "dangerous"
-    if r_value >= 40:
-        return "moderate"
-    return "safe"
+# Tables risk results are derived from
+MAP_DATA_VERSIONS = ("neighborhoods", "crime_meta", "crime_counts")
 
 
 def label_quantiles(values: pd.Series) -> pd.Series:
@@ -45,133 +56,580 @@ def label_quantiles(values: pd.Series) -> pd.Series:
     return values.apply(f)
 
 
-@router.get("/risk")
-def get_risk(year: int = Query(2025), db: Session = Depends(get_db)):
+SCORE_COLS = [
+    "population_density_score",
+    "divorce_ratio_score",
+    "unmarried_over_30_score",
+    "university_education_score",
+    "unemployment_score",
+    "income_score",
+    "vitality_score",
+]
+
+SEVERITY_INDEX = {"safe": 0, "moderate": 1, "dangerous": 2, "very_dangerous": 3}
+
+
+def build_formula_df(db: Session, year: int) -> pd.DataFrame:
+    """
+    One row per neighborhood: id, name, lat, lng, demographic scores,
+    crime_c{cid} counts, r1/r2/r and formula_label.
+    """
+    _, meta = get_crime_meta(db)
+    weight_map = {cid: c["weight"] for cid, c in meta.classifications.items()}
+
+    r = db.execute(text(f"""
+        SELECT id, name, latitude::float8 AS lat, longitude::float8 AS lng,
+               {", ".join(SCORE_COLS)}
+        FROM neighborhoods
+        ORDER BY id
+    """))
+    df = pd.DataFrame(r.fetchall(), columns=list(r.keys()))
+
+    r = db.execute(
+        text("""
+            SELECT neighborhood_id, classification_id, SUM(crime_count) AS crime_count
+            FROM crime_monthly_counts
+            WHERE year = :year
+            GROUP BY neighborhood_id, classification_id
+        """),
+        {"year": year},
+    )
+    cdf = pd.DataFrame(r.fetchall(), columns=list(r.keys()))
+
+    # neighborhoods x classifications count matrix
+    class_ids = sorted(set(weight_map) | set(cdf["classification_id"].astype(int)))
+    counts = (
+        cdf.pivot_table(index="neighborhood_id", columns="classification_id",
+                        values="crime_count", aggfunc="sum", fill_value=0)
+        .reindex(index=df["id"], columns=class_ids, fill_value=0)
+        .to_numpy(dtype=np.int64)
+    ) if len(cdf) else np.zeros((len(df), len(class_ids)), dtype=np.int64)
+
+    for j, cid in enumerate(class_ids):
+        if cid in weight_map:
+            df[f"crime_c{cid}"] = counts[:, j]
+
+    weights = np.array([weight_map.get(cid, 1) for cid in class_ids], dtype=np.float64)
+
+    # ── R1 against the neighborhood with the max weighted crimes, R2, R and
+    #    the fixed-threshold label (utils.scoring)
+    r2 = r2_score(df[SCORE_COLS].to_numpy(dtype=np.float64))
+    r1, r, codes = formula_scores(counts, weights, r2)
+    df["r1"] = r1
+    df["r2"] = r2
+    df["r"] = r
+    df["formula_label"] = label_names(codes)
+    return df
+
+
+def build_risk_df(db: Session, year: int) -> pd.DataFrame:
+    """
+    build_formula_df() plus predicted_label, confidence and one p_<label>
+    probability column per model class.
+    """
     bundle = joblib.load(MODEL_PATH)
     model = bundle["model"]
     feature_cols = bundle["feature_cols"]
 
-    classifications = db.query(CrimeClassification).all()
-    weight_map = {c.id: c.weight for c in classifications}
-
-    neighborhoods = db.query(Neighborhood).all()
-
-    temp = []
-    feature_rows = []
-    for n in neighborhoods:
-        rows = (
-            db.query(CrimeMonthlyCount)
-            .filter(
-                CrimeMonthlyCount.year == year,
-                CrimeMonthlyCount.neighborhood_id == n.id
-            )
-            .all()
-        )
+    df = build_formula_df(db, year)
+
+    # ── ML predictions
+    add_spatial_lag(db, df, feature_cols, bundle.get("spatial_lag_k", LAG_K))
+    X = df.reindex(columns=feature_cols, fill_value=0)
+
+    if hasattr(model, "predict_proba"):
+        probs = model.predict_proba(X)
+        classes = list(model.classes_)
+        for j, c in enumerate(classes):
+            df[f"p_{c}"] = probs[:, j]
+        df["confidence"] = probs.max(axis=1)
+
+        severity_scores = np.zeros(len(df))
+        for k, v in SEVERITY_INDEX.items():
+            if k in classes:
+                severity_scores = severity_scores + probs[:, classes.index(k)] * v
+        df["predicted_label"] = label_quantiles(pd.Series(severity_scores)).to_numpy()
+    else:
+        df["predicted_label"] = [str(p) for p in model.predict(X)]
+        df["confidence"] = None
+
+    return df
+
+
+_lag_cache = KeyedVersionCache(MAP_DATA_VERSIONS, max_entries=8)
+
 
-        weighted_sum = 0
-        crime_by_class = {}
-        for r in rows:
-            w = weight_map.get(r.classification_id, 1)
-            weighted_sum += r.crime_count * w
-            crime_by_class[r.classification_id] = crime_by_class.get(r.classification_id, 0) + r.crime_count
-
-        demo_avg = (
-            n.population_density_score
-            + n.divorce_ratio_score
-            + n.unmarried_over_30_score
-            + n.university_education_score
-            + n.unemployment_score
-            + n.income_score
-            + n.vitality_score
-        ) / 7.0
-        r2 = demo_avg * 20.0
-
-        temp.append({
-            "n": n,
-            "weighted_sum": weighted_sum,
+def yearly_spatial_lag(db: Session, year: int, k: int = LAG_K) -> pd.DataFrame:
+    """lag_<col> of every crime count column and R for the year, indexed by neighborhood id."""
+    def load():
+        df = build_formula_df(db, year)
+        W = get_spatial_index(db).lag_weights(df["id"].to_numpy(), k)
+        return spatial_lag(W, df, lag_sources(df)).set_index(df["id"])
+
+    return _lag_cache.get(db, (year, k), load)
+
+
+def _risk_records(df: pd.DataFrame) -> list:
+    prob_cols = [c for c in df.columns if c.startswith("p_")]
+    classes = [c[2:] for c in prob_cols]
+    probs = df[prob_cols].to_numpy().tolist() if prob_cols else [None] * len(df)
+    rounded = df[["r1", "r2", "r"]].round(2).to_numpy().tolist()
+    scores = df[SCORE_COLS].to_numpy().tolist()
+    keys = [c[: -len("_score")] for c in SCORE_COLS]
+
+    return [
+        {
+            "id": nid,
+            "name": name,
+            "lat": lat,
+            "lng": lng,
+            "r1": r1,
             "r2": r2,
-            "crime_by_class": crime_by_class,
-        })
+            "r": r,
+            "formula_label": formula_label,
+            "predicted_label": predicted_label,
+            "confidence": confidence,
+            "probabilities": dict(zip(classes, p)) if prob_cols else None,
+            "scores": dict(zip(keys, sc)),
+        }
+        for nid, name, lat, lng, (r1, r2, r), formula_label, predicted_label,
+            confidence, p, sc in zip(
+            df["id"].tolist(), df["name"], df["lat"].tolist(), df["lng"].tolist(),
+            rounded, df["formula_label"], df["predicted_label"],
+            df["confidence"].tolist(), probs, scores,
+        )
+    ]
 
-        row = {
-            "population_density_score": n.population_density_score,
-            "divorce_ratio_score": n.divorce_ratio_score,
-            "unmarried_over_30_score": n.unmarried_over_30_score,
-            "university_education_score": n.university_education_score,
-            "unemployment_score": n.unemployment_score,
-            "income_score": n.income_score,
-            "vitality_score": n.vitality_score,
+
+# Monte Carlo intervals per (year, sample count); redrawn when counts,
+# weights or neighborhoods change
+_uncertainty_cache = KeyedVersionCache(MAP_DATA_VERSIONS, max_entries=16)
+
+
+def yearly_uncertainty(db: Session, year: int, samples: int) -> pd.DataFrame:
+    """utils.uncertainty columns for the year's formula scores, indexed by neighborhood id."""
+    def load():
+        _, meta = get_crime_meta(db)
+        weight_map = {cid: c["weight"] for cid, c in meta.classifications.items()}
+        df = build_formula_df(db, year)
+        return uncertainty_frame(df, weight_map, samples).set_index(df["id"])
+
+    return _uncertainty_cache.get(db, (year, samples), load)
+
+
+def _uncertainty_dicts(df: pd.DataFrame) -> list:
+    """Nested uncertainty objects of the records layout."""
+    bands = {
+        name: df[[f"{name}_p{p}" for p in PERCENTILES]].round(2).to_numpy().tolist()
+        for name in ("r1", "r")
+    }
+    keys = [f"p{p}" for p in PERCENTILES]
+    shares = df[[f"share_{label}" for label in LABELS]].round(3).to_numpy().tolist()
+    return [
+        {
+            "r1": dict(zip(keys, r1)),
+            "r": dict(zip(keys, r)),
+            "label_stability": stability,
+            "label_share": dict(zip(LABELS, share)),
         }
-        for cid in weight_map.keys():
-            row[f"crime_c{cid}"] = int(crime_by_class.get(cid, 0))
-        feature_rows.append(row)
+        for r1, r, stability, share in zip(
+            bands["r1"], bands["r"], df["label_stability"].round(3).tolist(), shares,
+        )
+    ]
 
-    # ── R1: normalize against the neighborhood with the max weighted crimes
-    max_ws = max((x["weighted_sum"] for x in temp), default=1) or 1
-    for x in temp:
-        x["r1"] = (x["weighted_sum"] / max_ws) * 100.0
-        x["r"] = (x["r1"] + x["r2"]) / 2.0
 
-    # ── Formula label: fixed thresholds
-    formula_labels = [label_by_threshold(x["r"]) for x in temp]
+# Model explanations of every neighborhood's yearly inputs, per (year, model
+# version): the tree paths are walked once, not per request
+_explain_cache = KeyedVersionCache(MAP_DATA_VERSIONS, max_entries=8)
 
-    # ── ML predictions
-    X = pd.DataFrame(feature_rows)
-    for col in feature_cols:
-        if col not in X.columns:
-            X[col] = 0
-    X = X[feature_cols]
+# Features listed per neighborhood in the records layout
+EXPLAIN_TOP_FEATURES = 5
 
-    predicted_labels = []
-    confidences = []
-    prob_maps = []
 
-    if hasattr(model, "predict_proba"):
-        probs = model.predict_proba(X)
-        classes = list(model.classes_)
+def yearly_contributions(db: Session, year: int) -> dict:
+    """
+    ids, feature_cols, classes, bias and contributions (neighborhoods x
+    features x classes) for the year; None if the model is not a forest.
+    """
+    def load():
+        bundle = joblib.load(MODEL_PATH)
+        model, feature_cols = bundle["model"], bundle["feature_cols"]
+        df = build_formula_df(db, year)
+        add_spatial_lag(db, df, feature_cols, bundle.get("spatial_lag_k", LAG_K))
+        X = df.reindex(columns=feature_cols, fill_value=0)
+        explanation = bundle_explanation(bundle, version, MODEL_PATH)
+        if explanation is None:
+            return None
+        return {
+            "ids": df["id"].to_numpy(),
+            "feature_cols": list(feature_cols),
+            "classes": list(model.classes_),
+            "bias": explanation["bias"],
+            "contributions": contributions(model, explanation, X),
+        }
+
+    version = bundle_version(MODEL_PATH)
+    return _explain_cache.get(db, (year, version), load)
+
+
+def _add_explanations(db: Session, df: pd.DataFrame, year: int) -> pd.DataFrame:
+    """
+    explained_class (predicted_label, or the most probable class if the
+    model never saw it), explain_bias and one contrib_<feature> column each.
+    """
+    ex = yearly_contributions(db, year)
+    if ex is None:
+        raise HTTPException(status_code=400, detail="The current model does not support explanations")
+    classes = ex["classes"]
+    rows = pd.Index(ex["ids"]).get_indexer(df["id"])
+    k = np.array([classes.index(lbl) if lbl in classes else -1 for lbl in df["predicted_label"]])
+    if (k < 0).any():
+        k = np.where(k < 0, ex["contributions"][rows].sum(axis=1).argmax(axis=1), k)
+
+    contrib = ex["contributions"][rows, :, k]
+    out = pd.DataFrame(contrib, columns=[f"contrib_{c}" for c in ex["feature_cols"]], index=df.index)
+    out.insert(0, "explained_class", np.asarray(classes, dtype=object)[k])
+    out.insert(1, "explain_bias", ex["bias"][k])
+    return pd.concat([df, out], axis=1)
+
+
+def _explanation_dicts(df: pd.DataFrame) -> list:
+    """Nested explanation objects of the records layout."""
+    contrib_cols = [c for c in df.columns if c.startswith("contrib_")]
+    features = [c[len("contrib_"):] for c in contrib_cols]
+    contrib = df[contrib_cols].to_numpy()
+    # Model inputs, as build_risk_df fed them
+    values = df.reindex(columns=features, fill_value=0).to_numpy(dtype=np.float64)
+    return [
+        {
+            "class": cls,
+            "bias": round(float(bias), 4),
+            "contributions": top_contributions(features, values[i], contrib[i], EXPLAIN_TOP_FEATURES),
+        }
+        for i, (cls, bias) in enumerate(zip(df["explained_class"], df["explain_bias"]))
+    ]
+
 
-        for i in range(len(probs)):
-            p = probs[i]
-            pmap = {classes[j]: float(p[j]) for j in range(len(classes))}
-            prob_maps.append(pmap)
-            confidences.append(float(max(p)))
-
-        severity_index = {"safe": 0, "moderate": 1, "dangerous": 2, "very_dangerous": 3}
-        severity_scores = pd.Series([
-            sum(float(pmap.get(k, 0.0)) * v for k, v in severity_index.items())
-            for pmap in prob_maps
-        ])
-        predicted_labels = label_quantiles(severity_scores).tolist()
+@router.get("/risk")
+def get_risk(
+    request: Request,
+    year: int = Query(2025),
+    layout: str = Query("records", description="records or columnar"),
+    format: Optional[str] = Query(None, description="json, arrow or parquet (or use the Accept header)"),
+    bbox: Optional[str] = Query(None, description="Viewport: min_lng,min_lat,max_lng,max_lat"),
+    uncertainty: bool = Query(False, description="Add Monte Carlo intervals of R1/R and formula label stability"),
+    samples: int = Query(UNCERTAINTY_SAMPLES, ge=10, le=MAX_UNCERTAINTY_SAMPLES, description="Draws for uncertainty"),
+    explain: bool = Query(False, description="Add per-feature model contributions to predicted_label"),
+    db: Session = Depends(get_db),
+):
+    check_layout(layout)
+    fmt = negotiate_table_format(request, format)
+    box = parse_bbox(bbox)
+    df = build_risk_df(db, year)
+    unc_cols = []
+    if uncertainty:
+        unc = yearly_uncertainty(db, year, samples)
+        unc_cols = list(unc.columns)
+        df = df.join(unc, on="id")
+
+    if box is not None:
+        # R1 and the ML labels are relative to the whole city, so scores are
+        # computed for every neighborhood and only the output is clipped
+        df = df[df["id"].isin(get_spatial_index(db).ids_within(box))].reset_index(drop=True)
+
+    contrib_cols = []
+    if explain:
+        df = _add_explanations(db, df, year)
+        contrib_cols = [c for c in df.columns if c.startswith("contrib_")]
+
+    if fmt != "json":
+        return dataframe_response(df, fmt, f"risk_{year}")
+
+    if layout == "columnar":
+        # Parallel arrays of the flat fields (map page); nested scores and
+        # probabilities are only returned in the records layout
+        return FastJSONResponse({
+            "id": df["id"].to_numpy(),
+            "name": df["name"].to_numpy(),
+            "lat": df["lat"].to_numpy(),
+            "lng": df["lng"].to_numpy(),
+            "r1": df["r1"].round(2).to_numpy(),
+            "r2": df["r2"].round(2).to_numpy(),
+            "r": df["r"].round(2).to_numpy(),
+            "formula_label": df["formula_label"].to_numpy(),
+            "predicted_label": df["predicted_label"].to_numpy(),
+            "confidence": df["confidence"].to_numpy(),
+            # Percentile bands to 2 places, label shares to 3
+            **{c: df[c].round(2 if c.startswith("r") else 3).to_numpy() for c in unc_cols},
+            **({
+                "explained_class": df["explained_class"].to_numpy(),
+                "explain_bias": df["explain_bias"].round(4).to_numpy(),
+            } if explain else {}),
+            **{c: df[c].round(4).to_numpy() for c in contrib_cols},
+        })
+
+    records = _risk_records(df)
+    if uncertainty:
+        for rec, u in zip(records, _uncertainty_dicts(df)):
+            rec["uncertainty"] = u
+    if explain:
+        for rec, e in zip(records, _explanation_dicts(df)):
+            rec["explanation"] = e
+    return FastJSONResponse(records)
+
+
+# ── Map clusters and heatmap ───────────────────────────────────────────────
+
+# Cluster label -> _map_frame mode; only "ml" frames (and cache keys) depend
+# on the model, so formula clusters build without the model file
+CLUSTER_LABELS = {"formula": "formula", "predicted": "ml"}
+HEATMAP_FORMATS = {"png": "image/png", "uint8": "application/octet-stream"}
+
+# One pyramid per (year, season, label source); rebuilt when neighborhoods,
+# crime weights or counts change, or (predicted labels) the model file does
+_cluster_cache = KeyedVersionCache(MAP_DATA_VERSIONS, max_entries=16)
+
+# Encoded rasters per (year, season, resolution, format)
+_heatmap_cache = KeyedVersionCache(MAP_DATA_VERSIONS, max_entries=32)
+
+
+def _check_season(season: Optional[str]) -> None:
+    if season is not None and season not in SEASONS:
+        raise HTTPException(status_code=400, detail=f"Invalid season. Use one of: {list(SEASONS.keys())}")
+
+
+def _map_frame(db: Session, year: int, season: Optional[str], mode: str) -> pd.DataFrame:
+    """
+    Risk frame with lat/lng columns: the whole year, or one season. Only
+    mode "ml" loads the model; "formula" frames carry r and formula_label.
+    """
+    if season is None:
+        return build_risk_df(db, year) if mode == "ml" else build_formula_df(db, year)
+    df = _season_frame(db, year, season, mode)
+    return df.rename(columns={"latitude": "lat", "longitude": "lng"})
+
+
+def _build_clusters(db: Session, year: int, season: Optional[str], label: str) -> ClusterPyramid:
+    df = _map_frame(db, year, season, CLUSTER_LABELS[label])
+    return ClusterPyramid(df["lat"], df["lng"], df["r"], df[f"{label}_label"], LABEL_ORDER)
+
+
+def _build_heatmap(db: Session, year: int, season: Optional[str], resolution: int, fmt: str):
+    df = _map_frame(db, year, season, "formula")
+    surface, bounds = risk_surface(df["lat"], df["lng"], df["r"], resolution)
+    q = quantize(surface)
+    content = encode_png(q) if fmt == "png" else q.tobytes()
+    return content, bounds, q.shape
+
+
+# GET /api/risk/clusters - risk aggregated per map tile for one zoom level
+@router.get("/risk/clusters")
+def get_risk_clusters(
+    year: int = Query(2025),
+    season: Optional[str] = Query(None, description="ramadan, hajj, summer or school; whole year if omitted"),
+    zoom: int = Query(..., ge=0, description="Map zoom; levels above 18 return zoom-18 tiles"),
+    bbox: Optional[str] = Query(None, description="Viewport: min_lng,min_lat,max_lng,max_lat"),
+    label: str = Query("formula", description="formula or predicted"),
+    db: Session = Depends(get_db),
+):
+    if label not in CLUSTER_LABELS:
+        raise HTTPException(status_code=400, detail=f"label must be one of {list(CLUSTER_LABELS)}")
+    _check_season(season)
+    box = parse_bbox(bbox)
+
+    key = (year, season, label, bundle_version(MODEL_PATH) if CLUSTER_LABELS[label] == "ml" else None)
+    pyramid = _cluster_cache.get(db, key, lambda: _build_clusters(db, year, season, label))
+    clusters = pyramid.query(zoom, box)
+    return FastJSONResponse({
+        "year": year,
+        "season": season,
+        "zoom": min(zoom, pyramid.max_zoom),
+        "label": label,
+        "clusters": clusters,
+    })
+
+
+# GET /api/risk/heatmap - kernel-smoothed R surface as a PNG overlay or uint8 raster
+@router.get("/risk/heatmap")
+def get_risk_heatmap(
+    year: int = Query(2025),
+    season: Optional[str] = Query(None, description="ramadan, hajj, summer or school; whole year if omitted"),
+    resolution: int = Query(256, ge=16, le=2048, description="Pixels along the longer side"),
+    format: str = Query("png", description="png or uint8"),
+    db: Session = Depends(get_db),
+):
+    if format not in HEATMAP_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {list(HEATMAP_FORMATS)}")
+    _check_season(season)
+
+    key = (year, season, resolution, format)
+    content, bounds, (h, w) = _heatmap_cache.get(
+        db, key, lambda: _build_heatmap(db, year, season, resolution, format),
+    )
+    # uint8 rasters are row-major from the north-west corner; values 0..254
+    # encode R = v * 100 / 254 and 255 is no data
+    return Response(
+        content=content,
+        media_type=HEATMAP_FORMATS[format],
+        headers={
+            "X-Heatmap-Bounds": ",".join(f"{v:.6f}" for v in bounds),
+            "X-Heatmap-Size": f"{w},{h}",
+        },
+    )
+
+
+# ── Weight preview ─────────────────────────────────────────────────────────
+
+
+class WeightPreview(BaseModel):
+    weights: Dict[int, float] = Field(
+        ..., description="classification_id -> candidate weight; others keep their current weight",
+    )
+    years: Optional[List[int]] = Field(None, description="Only these years; every year with counts if omitted")
+
+
+# Yearly per-classification totals of every neighborhood, with the scores
+# under the current weights; rebuilt when counts, weights or neighborhoods change
+_totals_cache = KeyedVersionCache(MAP_DATA_VERSIONS, max_entries=1)
+
+
+_LABEL_NAMES = np.array(LABEL_ORDER, dtype=object)
+
+
+def _load_year_totals(db: Session) -> dict:
+    _, meta = get_crime_meta(db)
+
+    r = db.execute(text(f"""
+        SELECT id, name, {", ".join(SCORE_COLS)}
+        FROM neighborhoods
+        ORDER BY id
+    """))
+    nb = r.fetchall()
+    ids = np.array([row[0] for row in nb], dtype=np.int64)
+
+    rows = db.execute(text("""
+        SELECT year, neighborhood_id, classification_id, SUM(crime_count)
+        FROM crime_monthly_counts
+        GROUP BY year, neighborhood_id, classification_id
+    """)).fetchall()
+    year, nid, cid, count = (np.asarray(c) for c in zip(*rows)) if rows else ([np.empty(0, np.int64)] * 4)
+
+    years = np.unique(year).astype(np.int64)
+    class_ids = np.array(sorted(set(meta.classifications) | set(cid.tolist())), dtype=np.int64)
+
+    # Rows of neighborhoods that no longer exist are dropped, as in build_formula_df
+    if len(ids):
+        ni = np.minimum(np.searchsorted(ids, nid), len(ids) - 1)
+        known = ids[ni] == nid
     else:
-        preds = model.predict(X)
-        predicted_labels = [str(p) for p in preds]
-        confidences = [None] * len(predicted_labels)
-        prob_maps = [None] * len(predicted_labels)
-
-    out = []
-    for idx, x in enumerate(temp):
-        n = x["n"]
-        out.append({
-            "id": n.id,
-            "name": n.name,
-            "lat": float(n.latitude),
-            "lng": float(n.longitude),
-            "r1": round(x["r1"], 2),
-            "r2": round(x["r2"], 2),
-            "r":  round(x["r"],  2),
-            "formula_label": formula_labels[idx],
-            "predicted_label": predicted_labels[idx],
-            "confidence": confidences[idx],
-            "probabilities": prob_maps[idx],
-            "scores": {
-                "population_density":    n.population_density_score,
-                "divorce_ratio":         n.divorce_ratio_score,
-                "unmarried_over_30":     n.unmarried_over_30_score,
-                "university_education":  n.university_education_score,
-                "unemployment":          n.unemployment_score,
-                "income":                n.income_score,
-                "vitality":              n.vitality_score,
-            },
+        ni, known = np.zeros(len(nid), dtype=np.int64), np.zeros(len(nid), dtype=bool)
+    counts = np.zeros((len(years), len(ids), len(class_ids)))
+    np.add.at(counts, (np.searchsorted(years, year[known]), ni[known], np.searchsorted(class_ids, cid[known])),
+              count[known].astype(np.float64))
+
+    weights = np.array([meta.classifications[c]["weight"] if c in meta.classifications else 1
+                        for c in class_ids.tolist()], dtype=np.float64)
+    scores = np.array([row[2:] for row in nb], dtype=np.float64).reshape(len(ids), len(SCORE_COLS))
+    r2 = r2_score(scores)
+    return {
+        "years": years,
+        "ids": ids,
+        "names": [row[1] for row in nb],
+        "class_ids": class_ids,
+        "counts": counts,
+        "weights": weights,
+        "r2": r2,
+        "current": formula_scores(counts, weights, r2),
+    }
+
+
+def _label_transitions(old: np.ndarray, new: np.ndarray) -> dict:
+    """{"old->new": count} over the cells whose label code changed."""
+    k = len(LABEL_ORDER)
+    changed = old != new
+    pairs = np.bincount(old[changed].astype(np.int64) * k + new[changed], minlength=k * k)
+    return {
+        f"{LABEL_ORDER[p // k]}->{LABEL_ORDER[p % k]}": int(pairs[p])
+        for p in np.flatnonzero(pairs)
+    }
+
+
+def preview_response(totals: dict, body: WeightPreview, layout: str) -> dict:
+    class_pos = {int(c): i for i, c in enumerate(totals["class_ids"])}
+    unknown = sorted(set(body.weights) - set(class_pos))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown classification ids: {unknown}")
+    if any(w < 0 for w in body.weights.values()):
+        raise HTTPException(status_code=400, detail="Weights must not be negative")
+
+    weights = totals["weights"].copy()
+    for cid, w in body.weights.items():
+        weights[class_pos[cid]] = w
+
+    years = totals["years"]
+    sel = np.arange(len(years))
+    if body.years is not None:
+        sel = np.flatnonzero(np.isin(years, body.years))
+    counts = totals["counts"][sel]
+    _, cur_r, cur_codes = (a[sel] for a in totals["current"])
+
+    r1, r, codes = formula_scores(counts, weights, totals["r2"])
+    changed = codes != cur_codes
+    # Object arrays of the LABEL_ORDER strings: tolist() shares the 4 strings
+    labels, cur_labels = _LABEL_NAMES[codes], _LABEL_NAMES[cur_codes]
+
+    out = {
+        "years": years[sel],
+        "weights": dict(zip(totals["class_ids"].tolist(), weights.tolist())),
+        "summary": {
+            "cells": int(codes.size),
+            "changed": int(changed.sum()),
+            "changed_by_year": dict(zip(years[sel].tolist(), changed.sum(axis=1).tolist())),
+            "transitions": _label_transitions(cur_codes, codes),
+        },
+    }
+
+    if layout == "columnar":
+        # Neighborhood arrays once; score arrays are years x neighborhoods
+        out.update({
+            "id": totals["ids"],
+            "name": totals["names"],
+            "r1": r1.round(2),
+            "r": r.round(2),
+            "label": labels.tolist(),
+            "current_r": cur_r.round(2),
+            "current_label": cur_labels.tolist(),
         })
+        return out
+
+    names, ids = totals["names"], totals["ids"].tolist()
+    out["results"] = [
+        {
+            "id": ids[j],
+            "name": names[j],
+            "year": year,
+            "r1": r1_,
+            "r": r_,
+            "label": label,
+            "current_r": cur_r_,
+            "current_label": cur_label,
+        }
+        for i, year in enumerate(years[sel].tolist())
+        for j, (r1_, r_, label, cur_r_, cur_label) in enumerate(zip(
+            r1[i].round(2).tolist(), r[i].round(2).tolist(), labels[i].tolist(),
+            cur_r[i].round(2).tolist(), cur_labels[i].tolist(),
+        ))
+    ]
+    return out
+
 
-    return out
\ No newline at end of file
+# POST /api/risk/preview-weights - R and labels of every year under candidate weights
+@router.post("/risk/preview-weights")
+def preview_weights(
+    body: WeightPreview,
+    layout: str = Query("columnar", description="columnar (years x neighborhoods arrays) or records"),
+    db: Session = Depends(get_db),
+):
+    check_layout(layout)
+    totals = _totals_cache.get(db, "totals", lambda: _load_year_totals(db))
+    return FastJSONResponse(preview_response(totals, body, layout))
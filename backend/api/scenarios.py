@@ -0,0 +1,170 @@
+import os
+from typing import Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+
+from api.risk_new import LABEL_ORDER, MODEL_PATH, SCORE_COLS, build_formula_df
+from database import get_db
+from utils.batch_predict import bundle_version, predict_proba
+from utils.crime_meta import get_crime_meta
+from utils.responses import FastJSONResponse
+from utils.scoring import formula_scores, r2_score
+from utils.spatial import LAG_K, LAG_PREFIX, get_spatial_index
+
+router = APIRouter(prefix="/api", tags=["scenarios"])
+
+MAX_SCENARIOS = 1000
+SCORE_MIN, SCORE_MAX = 1.0, 5.0
+
+
+class Scenario(BaseModel):
+    name: Optional[str] = None
+    neighborhood_ids: List[int] = Field(default_factory=list, description="Empty = all")
+    scores: Dict[str, float] = Field(default_factory=dict, description="score column -> new value")
+    score_deltas: Dict[str, float] = Field(default_factory=dict, description="score column -> change")
+    crime_factors: Dict[int, float] = Field(default_factory=dict, description="classification_id -> count multiplier")
+    crime_deltas: Dict[int, float] = Field(default_factory=dict, description="classification_id -> count change")
+
+
+class ScenarioBatch(BaseModel):
+    year: int = 2025
+    scenarios: List[Scenario] = Field(..., min_length=1, max_length=MAX_SCENARIOS)
+
+
+def _check_scenarios(batch: ScenarioBatch, ids: np.ndarray, class_ids: List[int]) -> None:
+    known_ids, known_classes = set(ids.tolist()), set(class_ids)
+    for i, sc in enumerate(batch.scenarios):
+        bad_cols = sorted((set(sc.scores) | set(sc.score_deltas)) - set(SCORE_COLS))
+        if bad_cols:
+            raise HTTPException(status_code=400, detail=f"Scenario {i}: unknown score columns {bad_cols}")
+        bad_classes = sorted((set(sc.crime_factors) | set(sc.crime_deltas)) - known_classes)
+        if bad_classes:
+            raise HTTPException(status_code=400, detail=f"Scenario {i}: unknown classification ids {bad_classes}")
+        bad_ids = sorted(set(sc.neighborhood_ids) - known_ids)
+        if bad_ids:
+            raise HTTPException(status_code=400, detail=f"Scenario {i}: unknown neighborhood ids {bad_ids}")
+        if any(f < 0 for f in sc.crime_factors.values()):
+            raise HTTPException(status_code=400, detail=f"Scenario {i}: crime factors must not be negative")
+
+
+def _apply_scenarios(scenarios, ids, class_ids, scores0, counts0):
+    """
+    Stacked inputs, block 0 being the unchanged baseline: scores
+    (1 + S, N, score cols) and counts (1 + S, N, classifications).
+    """
+    s = len(scenarios) + 1
+    scores = np.repeat(scores0[None], s, axis=0)
+    counts = np.repeat(counts0[None], s, axis=0)
+    score_idx = {c: i for i, c in enumerate(SCORE_COLS)}
+    class_idx = {c: i for i, c in enumerate(class_ids)}
+
+    for b, sc in enumerate(scenarios, start=1):
+        rows = np.isin(ids, sc.neighborhood_ids) if sc.neighborhood_ids else slice(None)
+        for col, v in sc.scores.items():
+            scores[b, rows, score_idx[col]] = v
+        for col, d in sc.score_deltas.items():
+            scores[b, rows, score_idx[col]] += d
+        for cid, f in sc.crime_factors.items():
+            counts[b, rows, class_idx[cid]] *= f
+        for cid, d in sc.crime_deltas.items():
+            counts[b, rows, class_idx[cid]] += d
+
+    np.clip(scores, SCORE_MIN, SCORE_MAX, out=scores)
+    np.maximum(counts, 0.0, out=counts)
+    return scores, counts
+
+
+def _feature_frame(db, feature_cols, lag_k, ids, crime_cols, scores, counts, r) -> pd.DataFrame:
+    """The model's feature matrix for every (block, neighborhood), blocks stacked."""
+    blocks, n = r.shape
+    source = {c: scores[..., i] for i, c in enumerate(SCORE_COLS)}
+    source.update({c: counts[..., j] for j, c in enumerate(crime_cols)})
+    source["r"] = r
+
+    W = None
+    columns = {}
+    for col in feature_cols:
+        if col.startswith(LAG_PREFIX):
+            if W is None:
+                W = get_spatial_index(db).lag_weights(ids, lag_k)
+            values = source.get(col[len(LAG_PREFIX):])
+            columns[col] = (W @ values.T).T.ravel() if values is not None else np.zeros(blocks * n)
+        elif col in source:
+            columns[col] = source[col].ravel()
+        else:
+            # e.g. "month": not known for yearly totals, as in /api/risk
+            columns[col] = np.zeros(blocks * n)
+    return pd.DataFrame(columns, columns=list(feature_cols))
+
+
+# POST /api/scenarios - formula and model labels under many what-if changes, in one pass
+@router.post("/scenarios")
+def run_scenarios(batch: ScenarioBatch, db: Session = Depends(get_db)):
+    base = build_formula_df(db, batch.year)
+    ids = base["id"].to_numpy()
+    crime_cols = [c for c in base.columns if c.startswith("crime_c")]
+    class_ids = [int(c[len("crime_c"):]) for c in crime_cols]
+    _check_scenarios(batch, ids, class_ids)
+
+    _, meta = get_crime_meta(db)
+    weights = np.array([meta.classifications[c]["weight"] for c in class_ids], dtype=np.float64)
+    scores, counts = _apply_scenarios(
+        batch.scenarios, ids, class_ids,
+        base[SCORE_COLS].to_numpy(dtype=np.float64), base[crime_cols].to_numpy(dtype=np.float64),
+    )
+
+    # ── Formula R for every block; R1 is relative to each block's own max
+    _, r, formula = formula_scores(counts, weights, r2_score(scores))
+
+    # ── One predict_proba over all blocks stacked
+    model_path = os.path.abspath(MODEL_PATH)
+    bundle = joblib.load(model_path)
+    model = bundle["model"]
+    X = _feature_frame(db, bundle["feature_cols"], bundle.get("spatial_lag_k", LAG_K),
+                       ids, crime_cols, scores, counts, r)
+    probs = predict_proba(model, X, model_path, bundle_version(model_path)).reshape(r.shape + (-1,))
+    classes = np.asarray(model.classes_, dtype=object)
+    predicted = probs.argmax(axis=2)
+    confidence = probs.max(axis=2)
+
+    names = base["name"].tolist()
+    labels = np.asarray(LABEL_ORDER, dtype=object)
+    results = []
+    for b, sc in enumerate(batch.scenarios, start=1):
+        f_changed = formula[b] != formula[0]
+        p_changed = predicted[b] != predicted[0]
+        rows = np.flatnonzero(f_changed | p_changed)
+        results.append({
+            "name": sc.name or f"scenario {b}",
+            "summary": {
+                "formula_changed": int(f_changed.sum()),
+                "predicted_changed": int(p_changed.sum()),
+                "mean_r_before": round(float(r[0].mean()), 2),
+                "mean_r_after": round(float(r[b].mean()), 2),
+            },
+            "changes": [
+                {
+                    "id": int(ids[j]),
+                    "name": names[j],
+                    "r_before": round(float(r[0, j]), 2),
+                    "r_after": round(float(r[b, j]), 2),
+                    "formula_label_before": labels[formula[0, j]],
+                    "formula_label_after": labels[formula[b, j]],
+                    "predicted_label_before": classes[predicted[0, j]],
+                    "predicted_label_after": classes[predicted[b, j]],
+                    "confidence_after": round(float(confidence[b, j]), 3),
+                }
+                for j in rows
+            ],
+        })
+
+    return FastJSONResponse({
+        "year": batch.year,
+        "neighborhoods": len(ids),
+        "scenarios": results,
+    })
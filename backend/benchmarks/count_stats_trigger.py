@@ -0,0 +1,101 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+
+# Cost of the crime_count_stats trigger on the full rebuild_incident_counts
+# path: the rebuild timed with the row-level stats trigger enabled, then
+# disabled (ALTER TABLE ... DISABLE TRIGGER, which needs the table owner).
+#
+# Synthetic incidents are added to crime_form_data first, spread over
+# --years years, so the rebuild touches many cells. Each run rebuilds twice:
+# "first" creates the cells; "drift" is the recovery case, after --drift of
+# the synthetic incidents were deleted behind the aggregation's back.
+# Everything runs in a transaction that is rolled back, so the real tables
+# are never changed. Needs DATABASE_URL (Postgres).
+#
+#   python benchmarks/count_stats_trigger.py                      # 200k incidents over 10 years
+#   python benchmarks/count_stats_trigger.py --incidents 1000000 --drift 0.5 --runs 5
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from database import SessionLocal  # noqa: E402
+from utils.aggregation import rebuild_incident_counts  # noqa: E402
+
+TRIGGER = "trg_crime_monthly_counts_stats"
+
+SYNTHETIC_INCIDENTS = """
+    WITH n AS (SELECT id, name, row_number() OVER (ORDER BY id) - 1 AS i FROM neighborhoods),
+         w AS (SELECT id, main_category, weight, row_number() OVER (ORDER BY id) - 1 AS i
+               FROM crime_weights WHERE classification_id IS NOT NULL)
+    INSERT INTO crime_form_data
+      (main_category, crime_weight, subcategories, neighbourhood_name, neighborhood_id, category_id,
+       date, offender_income_level, climate, time_of_year)
+    SELECT w.main_category, w.weight, '', n.name, n.id, w.id,
+           DATE '2025-12-31' - (hashint4(g + 13) & 2147483647) % (:years * 365),
+           'Medium', 'Hot', 'Summer'
+    FROM generate_series(1, :incidents) g
+    JOIN n ON n.i = (hashint4(g) & 2147483647) % (SELECT COUNT(*) FROM n)
+    JOIN w ON w.i = (hashint4(g + 7) & 2147483647) % (SELECT COUNT(*) FROM w)
+    ORDER BY g
+"""
+
+
+def _run(incidents: int, years: int, drift: float, trigger: bool) -> tuple:
+    """((first s, drift s), (cells written first, cells written after drift))."""
+    db = SessionLocal()
+    try:
+        last_id = db.execute(text("SELECT COALESCE(MAX(id), 0) FROM crime_form_data")).scalar()
+        db.execute(text(SYNTHETIC_INCIDENTS), {"incidents": incidents, "years": years})
+        first_id = db.execute(text("SELECT MIN(id) FROM crime_form_data WHERE id > :id"), {"id": last_id}).scalar()
+        if not trigger:
+            db.execute(text(f"ALTER TABLE crime_monthly_counts DISABLE TRIGGER {TRIGGER}"))
+        times, cells = [], []
+        for step in range(2):
+            if step:
+                db.execute(
+                    text("DELETE FROM crime_form_data WHERE id >= :first AND (hashint4(id - :first) & 1023) < :cut"),
+                    {"first": first_id, "cut": int(drift * 1024)},
+                )
+            t0 = time.perf_counter()
+            stats = rebuild_incident_counts(db)
+            times.append(time.perf_counter() - t0)
+            cells.append(stats["cells_reset"] + stats["cells_rebuilt"])
+        return times, cells
+    finally:
+        db.rollback()
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--incidents", type=int, default=200_000)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--drift", type=float, default=0.1,
+                        help="share of the synthetic incidents deleted before the second rebuild")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    for trigger in (True, False):
+        runs = [_run(args.incidents, args.years, args.drift, trigger) for _ in range(args.runs)]
+        results[trigger] = (
+            [statistics.median(t[i] for t, _ in runs) for i in range(2)],
+            runs[0][1],
+        )
+
+    print(f"{args.incidents:,} synthetic incidents over {args.years} years, "
+          f"{args.drift:.0%} drift, median of {args.runs} runs")
+    print(f"{'stats trigger':<14} {'cells':>8} {'first s':>8} {'cells':>8} {'drift s':>8}")
+    for trigger, (times, cells) in results.items():
+        print(f"{'on' if trigger else 'off':<14} {cells[0]:>8,} {times[0]:>8.2f} {cells[1]:>8,} {times[1]:>8.2f}")
+    on, off = results[True][0], results[False][0]
+    print(f"trigger overhead: first {(on[0] / off[0] - 1) * 100:+.0f}%, "
+          f"drift {(on[1] / off[1] - 1) * 100:+.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+# Time of utils.explain on a forest trained on synthetic data shaped like the
+# risk model's (scores, crime counts, 4 classes): building the node table,
+# then contributions for a batch as one sparse product, against walking each
+# row's path through every tree in Python (a sample of rows, extrapolated).
+# Also checks bias + contributions against predict_proba.
+#
+#   python benchmarks/explain.py                           # 700 trees, 1k and 10k rows
+#   python benchmarks/explain.py --trees 200 --rows 100 100000 --loop-sample 20
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from utils.explain import contributions, path_decomposition  # noqa: E402
+
+CLASSES = np.array(["safe", "moderate", "dangerous", "very_dangerous"])
+
+
+def _data(n: int, features: int, rng) -> pd.DataFrame:
+    X = rng.poisson(rng.uniform(1, 60, features), (n, features)).astype(np.float64)
+    return pd.DataFrame(X, columns=[f"f{j}" for j in range(features)])
+
+
+def _labels(X: pd.DataFrame, rng) -> np.ndarray:
+    score = X.to_numpy() @ rng.uniform(0, 1, X.shape[1])
+    score += rng.normal(0, score.std() / 3, len(X))
+    return CLASSES[np.digitize(score, np.quantile(score, [0.25, 0.5, 0.75]))]
+
+
+def _loop_contributions(forest, X: np.ndarray) -> np.ndarray:
+    """Each row down each tree, one node at a time."""
+    out = np.zeros((len(X), X.shape[1], forest.n_classes_))
+    for est in forest.estimators_:
+        t = est.tree_
+        value = t.value[:, 0, :] / t.value[:, 0, :].sum(axis=1, keepdims=True)
+        for i, x in enumerate(X):
+            node = 0
+            while t.children_left[node] >= 0:
+                f = t.feature[node]
+                child = t.children_left[node] if x[f] <= t.threshold[node] else t.children_right[node]
+                out[i, f] += value[child] - value[node]
+                node = child
+    return out / len(forest.estimators_)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trees", type=int, default=700)
+    parser.add_argument("--features", type=int, default=18)
+    parser.add_argument("--train-rows", type=int, default=2000)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--loop-sample", type=int, default=50,
+                        help="rows explained by the Python loop (extrapolated to all)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X_train = _data(args.train_rows, args.features, rng)
+    forest = RandomForestClassifier(
+        n_estimators=args.trees, random_state=1337, class_weight="balanced", min_samples_leaf=2, n_jobs=-1,
+    ).fit(X_train, _labels(X_train, rng))
+
+    t0 = time.perf_counter()
+    decomposition = path_decomposition(forest, args.features)
+    table = decomposition["node_contributions"]
+    print(f"{args.trees} trees, {table.shape[0]:,} nodes: table built in "
+          f"{(time.perf_counter() - t0) * 1000:.0f} ms ({table.nnz:,} non-zeros)")
+
+    print(f"{'rows':>10} {'vector s':>9} {'loop s (est)':>13} {'speedup':>8} {'max |diff|':>11} {'sum err':>9}")
+    for n in args.rows:
+        X = _data(n, args.features, rng)
+        t0 = time.perf_counter()
+        contrib = contributions(forest, decomposition, X)
+        vec_s = time.perf_counter() - t0
+
+        sample = min(args.loop_sample, n)
+        t0 = time.perf_counter()
+        loop = _loop_contributions(forest, X.to_numpy()[:sample])
+        loop_s = (time.perf_counter() - t0) / max(sample, 1) * n
+
+        diff = np.abs(loop - contrib[:sample]).max() if sample else 0.0
+        sum_err = np.abs(decomposition["bias"] + contrib.sum(axis=1) - forest.predict_proba(X)).max()
+        print(f"{n:>10,} {vec_s:>9.2f} {loop_s:>13.1f} {loop_s / vec_s:>7.0f}x {diff:>11.2e} {sum_err:>9.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+# Peak-RSS benchmark for GET /api/crime-forms/export.
+#
+# Each (format, rows) pair runs in a fresh subprocess that streams the export
+# and discards the bytes, then reports peak RSS. A flat "peak MB" column across
+# row counts shows memory is bounded by the batch size, not the table size.
+#
+#   python benchmarks/export_memory.py                          # synthetic rows
+#   python benchmarks/export_memory.py --rows 10000 10000000
+#   python benchmarks/export_memory.py --source db              # real table via DATABASE_URL
+#
+# "synthetic" feeds generated batches straight into the encoders;
+# "db" runs the endpoint's own server-side-cursor generator against the
+# database (row count = whatever crime_form_data holds, --rows is ignored).
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000, 10_000_000]
+FORMATS = ["csv", "ndjson", "parquet"]
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _synthetic_batches(n_rows: int, batch_rows: int):
+    categories = ["Theft", "Assault", "Drugs", "Fraud"]
+    climates = ["hot", "cold", "moderate"]
+    seasons = ["summer", "winter", "spring", "autumn"]
+    start = date(2020, 1, 1)
+    for lo in range(0, n_rows, batch_rows):
+        hi = min(lo + batch_rows, n_rows)
+        yield [
+            (
+                i,
+                categories[i % 4],
+                (i % 10) + 1,
+                "Vehicle Theft, Shoplifting",
+                f"Dammam Area {(i % 40) + 1:02d}",
+                start + timedelta(days=i % 2000),
+                "low",
+                climates[i % 3],
+                seasons[i % 4],
+            )
+            for i in range(lo, hi)
+        ]
+
+
+def _child(fmt: str, n_rows: int, source: str) -> None:
+    from api.crimes import EXPORT_COLUMNS
+    from utils.export import ENCODERS
+
+    columns = [c.key for c in EXPORT_COLUMNS]
+    sql_types = [c.type for c in EXPORT_COLUMNS]
+    if source == "db":
+        from api.crimes import CrimeFormFilters, _stream_crime_form_batches
+        batches = _stream_crime_form_batches(CrimeFormFilters())
+    else:
+        from api.crimes import EXPORT_BATCH_ROWS
+        batches = _synthetic_batches(n_rows, EXPORT_BATCH_ROWS)
+
+    base = _peak_rss_mb()
+    t0 = time.perf_counter()
+    total_bytes = 0
+    for chunk in ENCODERS[fmt](columns, batches, sql_types):
+        total_bytes += len(chunk)
+    elapsed = time.perf_counter() - t0
+
+    print(f"{base:.1f} {_peak_rss_mb():.1f} {elapsed:.2f} {total_bytes}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--formats", nargs="+", default=FORMATS, choices=FORMATS)
+    parser.add_argument("--source", default="synthetic", choices=["synthetic", "db"])
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child[0], int(args.child[1]), args.source)
+        return
+
+    rows = [0] if args.source == "db" else args.rows
+    print(f"{'format':<8} {'rows':>11} {'base MB':>9} {'peak MB':>9} {'seconds':>9} {'MB out':>9}")
+    for fmt in args.formats:
+        for n in rows:
+            out = subprocess.run(
+                [sys.executable, __file__, "--source", args.source, "--child", fmt, str(n)],
+                check=True, capture_output=True, text=True,
+            ).stdout.split()
+            base, peak, secs, nbytes = float(out[0]), float(out[1]), float(out[2]), int(out[3])
+            label = "table" if args.source == "db" else f"{n:,}"
+            print(f"{fmt:<8} {label:>11} {base:>9.1f} {peak:>9.1f} {secs:>9.2f} {nbytes / 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
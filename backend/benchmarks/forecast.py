@@ -0,0 +1,101 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Fit time of utils.forecast.fit_series on synthetic monthly count series
+# (seasonal Poisson counts with a trend), against fitting the same model one
+# series at a time in a Python loop. The loop runs on a sample and is
+# extrapolated; its forecasts are compared with the vectorized ones.
+#
+#   python benchmarks/forecast.py                          # 100k series, 12 and 36 months
+#   python benchmarks/forecast.py --series 10000 --months 24 60 --loop-sample 50
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from utils.forecast import (  # noqa: E402
+    ALPHAS, BETAS, DAMPING, GAMMAS, SEASON, fit_series,
+)
+
+
+def _series(n: int, months: int, rng) -> np.ndarray:
+    t = np.arange(months)
+    base = 5 + 0.05 * t + 3 * np.sin(2 * np.pi * t / SEASON)
+    scale = rng.uniform(0.2, 5.0, (n, 1))
+    return rng.poisson(np.maximum(base, 0.1)[None, :] * scale).astype(np.float64)
+
+
+def _loop_fit(y: np.ndarray, horizon: int) -> np.ndarray:
+    """Same model, one series and one parameter set at a time."""
+    months = len(y)
+    seasonal = months >= 2 * SEASON
+    best_sse, best_fc = np.inf, None
+    for a in ALPHAS:
+        for b in BETAS:
+            for g in (GAMMAS if seasonal else (0.0,)):
+                if seasonal:
+                    level = y[:SEASON].mean()
+                    trend = (y[SEASON:2 * SEASON].mean() - level) / SEASON
+                    season = list(y[:SEASON] - level)
+                else:
+                    level = y[0]
+                    trend = y[1] - y[0] if months > 1 else 0.0
+                    season = [0.0] * SEASON
+                sse = 0.0
+                for t in range(months):
+                    s = season[t % SEASON]
+                    base = level + DAMPING * trend
+                    sse += (y[t] - base - s) ** 2
+                    new_level = a * (y[t] - s) + (1 - a) * base
+                    trend = b * (new_level - level) + (1 - b) * DAMPING * trend
+                    level = new_level
+                    if seasonal:
+                        season[t % SEASON] = g * (y[t] - level) + (1 - g) * s
+                if sse < best_sse:
+                    fc, damp = [], 0.0
+                    for h in range(1, horizon + 1):
+                        damp += DAMPING ** h
+                        fc.append(max(level + damp * trend + season[(months + h - 1) % SEASON], 0.0))
+                    best_sse, best_fc = sse, fc
+    return np.array(best_fc)
+
+
+def _bench(n: int, months: int, horizon: int, sample: int) -> None:
+    y = _series(n, months, np.random.default_rng(0))
+
+    t0 = time.perf_counter()
+    fit = fit_series(y)
+    t1 = time.perf_counter()
+    fc = fit.forecast(horizon)
+    t2 = time.perf_counter()
+
+    sample = min(sample, n)
+    t3 = time.perf_counter()
+    loop_fc = np.array([_loop_fit(row, horizon) for row in y[:sample]])
+    loop_s = (time.perf_counter() - t3) / sample * n
+
+    err = np.abs(loop_fc - fc[:sample]).max() if sample else 0.0
+    print(f"{n:>10,} {months:>7} {fit.method:>13} {t1 - t0:>9.2f} {(t2 - t1) * 1000:>12.1f} "
+          f"{loop_s:>12.1f} {loop_s / (t1 - t0):>8.0f}x {err:>10.2e}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--series", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--months", type=int, nargs="+", default=[12, 36])
+    parser.add_argument("--horizon", type=int, default=3)
+    parser.add_argument("--loop-sample", type=int, default=200,
+                        help="series fitted by the Python loop (extrapolated to all)")
+    args = parser.parse_args()
+
+    print(f"{'series':>10} {'months':>7} {'method':>13} {'fit s':>9} {'forecast ms':>12} "
+          f"{'loop s (est)':>12} {'speedup':>9} {'max |diff|':>10}")
+    for n in args.series:
+        for months in args.months:
+            _bench(n, months, args.horizon, args.loop_sample)
+
+
+if __name__ == "__main__":
+    main()
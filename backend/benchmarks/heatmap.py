@@ -0,0 +1,120 @@
+import argparse
+import math
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+# Generation time and size of utils.heatmap rasters for synthetic
+# neighborhoods, split into surface (binning + Gaussian blur), quantization
+# and PNG encoding. A smaller run is compared against the exact kernel mean
+# (every point against every pixel centre) as a correctness check.
+#
+#   python benchmarks/heatmap.py                              # 100k neighborhoods
+#   python benchmarks/heatmap.py --points 10000 1000000 --resolutions 512
+#   python benchmarks/heatmap.py --check-points 0             # skip the exact check
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from utils.heatmap import (  # noqa: E402
+    KM_PER_DEG_LAT, KM_PER_DEG_LNG, encode_png, quantize, risk_surface,
+)
+
+LAT0, LAT1 = 26.20, 26.60
+LNG0, LNG1 = 49.90, 50.30
+
+
+def _ms(samples):
+    return statistics.median(samples) * 1000
+
+
+def _points(n: int, rng):
+    centres = rng.uniform([LAT0, LNG0], [LAT1, LNG1], size=(8, 2))
+    pts = np.vstack([
+        rng.uniform([LAT0, LNG0], [LAT1, LNG1], size=(n - n // 2, 2)),
+        centres[rng.integers(0, 8, n // 2)] + rng.normal(0, 0.01, size=(n // 2, 2)),
+    ])
+    lat, lng = pts[:, 0], pts[:, 1]
+    # Smooth trend plus noise, in 0..100 like R
+    r = np.clip(50 + 30 * np.sin(lat * 40) * np.cos(lng * 30) + rng.normal(0, 10, n), 0, 100)
+    return lat, lng, r
+
+
+def _bench(n: int, resolutions, repeat: int) -> None:
+    lat, lng, r = _points(n, np.random.default_rng(0))
+    print(f"\n{n:,} neighborhoods")
+    print(f"{'resolution':<12} {'pixels':>10} {'surface ms':>11} {'quantize ms':>12} {'png ms':>8} "
+          f"{'png KB':>8} {'uint8 KB':>9}")
+    for res in resolutions:
+        t_s, t_q, t_p = [], [], []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            surface, _ = risk_surface(lat, lng, r, res)
+            t1 = time.perf_counter()
+            q = quantize(surface)
+            t2 = time.perf_counter()
+            png = encode_png(q)
+            t3 = time.perf_counter()
+            t_s.append(t1 - t0)
+            t_q.append(t2 - t1)
+            t_p.append(t3 - t2)
+        h, w = q.shape
+        print(f"{f'{w}x{h}':<12} {w * h:>10,} {_ms(t_s):>11.1f} {_ms(t_q):>12.1f} {_ms(t_p):>8.1f} "
+              f"{len(png) / 1024:>8.1f} {q.nbytes / 1024:>9.1f}")
+
+
+def _exact(lat, lng, r, bounds, shape, bandwidth_km):
+    """Kernel mean at every pixel centre, O(points * pixels)."""
+    min_lng, min_lat, max_lng, max_lat = bounds
+    h, w = shape
+    kx = KM_PER_DEG_LNG * math.cos(math.radians((lat.min() + lat.max()) / 2))
+    px_lng = min_lng + (np.arange(w) + 0.5) * (max_lng - min_lng) / w
+    px_lat = max_lat - (np.arange(h) + 0.5) * (max_lat - min_lat) / h
+    gx = (px_lng - min_lng) * kx
+    gy = (px_lat - min_lat) * KM_PER_DEG_LAT
+    x = (lng - min_lng) * kx
+    y = (lat - min_lat) * KM_PER_DEG_LAT
+    # Separable: K(pixel, point) = Ky(row, point) * Kx(col, point)
+    ky = np.exp(-((gy[:, None] - y[None, :]) ** 2) / (2 * bandwidth_km ** 2))
+    kxm = np.exp(-((gx[:, None] - x[None, :]) ** 2) / (2 * bandwidth_km ** 2))
+    num = ky @ (kxm * r).T
+    den = ky @ kxm.T
+    return num / np.maximum(den, 1e-300)
+
+
+def _check(n: int, res: int) -> None:
+    lat, lng, r = _points(n, np.random.default_rng(1))
+    bw = 1.0
+    t0 = time.perf_counter()
+    surface, bounds = risk_surface(lat, lng, r, res, bandwidth_km=bw)
+    t1 = time.perf_counter()
+    exact = _exact(lat, lng, r, bounds, surface.shape, bw)
+    t2 = time.perf_counter()
+
+    ok = ~np.isnan(surface)
+    err = np.abs(surface[ok] - exact[ok])
+    print(f"\nexact check: {n:,} points, {surface.shape[1]}x{surface.shape[0]}, bandwidth {bw} km")
+    print(f"  binned {(t1 - t0) * 1000:.1f} ms, exact {(t2 - t1) * 1000:.1f} ms")
+    print(f"  |R binned - R exact|: median {np.median(err):.3f}, p99 {np.percentile(err, 99):.3f}, "
+          f"max {err.max():.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--resolutions", type=int, nargs="+", default=[256, 512, 1024])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--check-points", type=int, default=5_000)
+    parser.add_argument("--check-resolution", type=int, default=256)
+    args = parser.parse_args()
+
+    for n in args.points:
+        _bench(n, args.resolutions, args.repeat)
+    if args.check_points:
+        _check(args.check_points, args.check_resolution)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import argparse
+import os
+import statistics
+import sys
+
+from sqlalchemy import text
+
+# EXPLAIN ANALYZE timings: name-string joins vs integer-key joins on
+# crime_form_data-shaped data.
+#
+# Everything runs on TEMP tables filled with synthetic rows, so the real
+# tables are never touched. Needs DATABASE_URL (Postgres).
+#
+#   python benchmarks/integer_joins.py                 # 1M incidents
+#   python benchmarks/integer_joins.py --rows 200000 --runs 5
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from database import engine  # noqa: E402
+
+SETUP = """
+CREATE TEMP TABLE b_neighborhoods AS
+SELECT g AS id, 'Dammam Area ' || lpad(g::text, 4, '0') AS name
+FROM generate_series(1, :n_neighborhoods) g;
+ALTER TABLE b_neighborhoods ADD PRIMARY KEY (id);
+CREATE UNIQUE INDEX ON b_neighborhoods (name);
+
+CREATE TEMP TABLE b_weights AS
+SELECT g AS id, 'Category ' || lpad(g::text, 2, '0') AS main_category,
+       1 + g % 10 AS weight, 1 + g % 10 AS classification_id
+FROM generate_series(1, :n_categories) g;
+ALTER TABLE b_weights ADD PRIMARY KEY (id);
+CREATE UNIQUE INDEX ON b_weights (main_category);
+
+CREATE TEMP TABLE b_crime AS
+SELECT
+  g AS id,
+  n.id AS neighborhood_id, n.name AS neighbourhood_name,
+  w.id AS category_id, w.main_category,
+  DATE '2020-01-01' + (g % 2000) AS date
+FROM generate_series(1, :rows) g
+JOIN b_neighborhoods n ON n.id = 1 + (hashint4(g) & 2147483647) % :n_neighborhoods
+JOIN b_weights w ON w.id = 1 + (hashint4(g + 7) & 2147483647) % :n_categories;
+ALTER TABLE b_crime ADD PRIMARY KEY (id);
+CREATE INDEX ON b_crime (neighbourhood_name, id);
+CREATE INDEX ON b_crime (main_category, id);
+CREATE INDEX ON b_crime (neighborhood_id, id);
+CREATE INDEX ON b_crime (category_id, id);
+ANALYZE b_neighborhoods; ANALYZE b_weights; ANALYZE b_crime;
+"""
+
+# (label, before: string joins, after: integer joins)
+QUERIES = [
+    (
+        "dominant category, one neighbourhood",
+        """
+        SELECT c.main_category, cw.weight, COUNT(*) AS cnt
+        FROM b_crime c
+        JOIN b_weights cw ON cw.main_category = c.main_category
+        WHERE c.neighbourhood_name = 'Dammam Area 0007'
+        GROUP BY c.main_category, cw.weight
+        ORDER BY cnt DESC, c.main_category
+        LIMIT 1
+        """,
+        """
+        SELECT cw.main_category, cw.weight, t.cnt
+        FROM (
+            SELECT category_id, COUNT(*) AS cnt
+            FROM b_crime
+            WHERE neighborhood_id = 7
+            GROUP BY category_id
+        ) t
+        JOIN b_weights cw ON cw.id = t.category_id
+        ORDER BY t.cnt DESC, cw.main_category
+        LIMIT 1
+        """,
+    ),
+    (
+        "monthly rebuild aggregate",
+        """
+        SELECT n.id, cw.classification_id,
+               EXTRACT(YEAR FROM c.date)::int, EXTRACT(MONTH FROM c.date)::int, COUNT(*)
+        FROM b_crime c
+        JOIN b_neighborhoods n ON n.name = c.neighbourhood_name
+        JOIN b_weights cw ON cw.main_category = c.main_category
+        GROUP BY 1, 2, 3, 4
+        """,
+        """
+        SELECT c.neighborhood_id, cw.classification_id,
+               EXTRACT(YEAR FROM c.date)::int, EXTRACT(MONTH FROM c.date)::int, COUNT(*)
+        FROM b_crime c
+        JOIN b_weights cw ON cw.id = c.category_id
+        GROUP BY 1, 2, 3, 4
+        """,
+    ),
+    (
+        "per-neighbourhood x category histogram",
+        """
+        SELECT c.neighbourhood_name, c.main_category, cw.weight, COUNT(*)
+        FROM b_crime c
+        JOIN b_weights cw ON cw.main_category = c.main_category
+        GROUP BY c.neighbourhood_name, c.main_category, cw.weight
+        """,
+        """
+        SELECT c.neighborhood_id, c.category_id, COUNT(*)
+        FROM b_crime c
+        GROUP BY c.neighborhood_id, c.category_id
+        """,
+    ),
+]
+
+
+def _explain_ms(conn, sql: str) -> float:
+    plan = conn.execute(text("EXPLAIN (ANALYZE, FORMAT JSON) " + sql)).scalar()
+    return float(plan[0]["Execution Time"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--neighborhoods", type=int, default=400)
+    parser.add_argument("--categories", type=int, default=12)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        print(f"Building {args.rows:,} synthetic incidents...")
+        for stmt in filter(str.strip, SETUP.split(";")):
+            conn.execute(text(stmt), {
+                "rows": args.rows,
+                "n_neighborhoods": args.neighborhoods,
+                "n_categories": args.categories,
+            })
+
+        print(f"\n{'query':<42} {'string ms':>10} {'integer ms':>11} {'speedup':>8}")
+        for label, before, after in QUERIES:
+            # one warm-up run each, then the median of --runs
+            _explain_ms(conn, before)
+            _explain_ms(conn, after)
+            b = statistics.median(_explain_ms(conn, before) for _ in range(args.runs))
+            a = statistics.median(_explain_ms(conn, after) for _ in range(args.runs))
+            print(f"{label:<42} {b:>10.1f} {a:>11.1f} {b / a:>7.1f}x")
+
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+from io import BytesIO
+
+# Render time and peak RSS of the season report's full table section, built
+# the old way (iterrows + one Table + 3 style commands per label cell) and
+# with utils.pdf_tables (NumPy-formatted columns, fixed-size chunks, one style
+# range per run of equal labels).
+#
+# Each (impl, rows) pair runs in a fresh subprocess so peak RSS is its own.
+#
+#   python benchmarks/pdf_table.py                         # 1k, 10k, 50k rows
+#   python benchmarks/pdf_table.py --rows 1000 5000 --impl chunked
+#   python benchmarks/pdf_table.py --legacy-max 10000      # skip slow legacy runs
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+DEFAULT_ROWS = [1_000, 10_000, 50_000]
+IMPLS = ["legacy", "chunked"]
+LABELS = ["safe", "moderate", "dangerous", "very_dangerous"]
+
+COLS = ["name", "r1", "r2", "r", "formula_label", "predicted_label", "confidence",
+        "unemployment_score", "income_score", "vitality_score"]
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _synthetic_df(n: int):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    r = np.sort(rng.random(n) * 100)[::-1]
+    return pd.DataFrame({
+        "name": [f"Dammam Area {i:05d}" for i in range(n)],
+        "r1": r, "r2": r, "r": r,
+        "formula_label": np.select([r > 80, r >= 60, r >= 40],
+                                   ["very_dangerous", "dangerous", "moderate"], "safe"),
+        "predicted_label": rng.choice(LABELS, n),
+        "confidence": rng.random(n),
+        "unemployment_score": rng.choice([1, 3, 5], n),
+        "income_score": rng.choice([1, 3, 5], n),
+        "vitality_score": rng.choice([1, 3, 5], n),
+    })
+
+
+def _style():
+    from reportlab.lib import colors
+
+    base = [
+        ("BACKGROUND",   (0, 0), (-1, 0),  colors.HexColor("#374151")),
+        ("TEXTCOLOR",    (0, 0), (-1, 0),  colors.whitesmoke),
+        ("FONTNAME",     (0, 0), (-1, 0),  "Helvetica-Bold"),
+        ("FONTSIZE",     (0, 0), (-1, 0),  8),
+        ("ALIGN",        (0, 0), (-1, -1), "CENTER"),
+        ("VALIGN",       (0, 0), (-1, -1), "MIDDLE"),
+        ("GRID",         (0, 0), (-1, -1), 0.4, colors.HexColor("#d1d5db")),
+        ("FONTSIZE",     (0, 1), (-1, -1), 7),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f9fafb")]),
+        ("TOPPADDING",   (0, 0), (-1, -1), 3),
+        ("BOTTOMPADDING",(0, 0), (-1, -1), 3),
+    ]
+    label_bg = {
+        "very_dangerous": colors.HexColor("#ef4444"),
+        "dangerous":      colors.HexColor("#f97316"),
+        "moderate":       colors.HexColor("#eab308"),
+        "safe":           colors.HexColor("#22c55e"),
+    }
+    return base, label_bg
+
+
+def _legacy_flowables(show, col_widths):
+    """The table code of export_season_pdf before utils.pdf_tables."""
+    from reportlab.lib import colors
+    from reportlab.platypus import Table, TableStyle
+
+    base, label_bg = _style()
+    table_data = [[c.replace("_", " ").title() for c in COLS]]
+    label_cell_indices = []
+    for row_i, (_, r) in enumerate(show.iterrows(), start=1):
+        row = []
+        for col_i, c in enumerate(COLS):
+            v = r.get(c)
+            if c in {"r1", "r2", "r"}:
+                row.append(f"{float(v):.2f}")
+            elif c == "confidence" and v is not None:
+                row.append(f"{float(v) * 100:.1f}%")
+            elif c in {"formula_label", "predicted_label"}:
+                row.append(str(v) if v is not None else "—")
+                label_cell_indices.append((row_i, col_i))
+            else:
+                row.append(str(v) if v is not None else "—")
+        table_data.append(row)
+
+    tbl = Table(table_data, repeatRows=1, colWidths=col_widths)
+    tbl_style = TableStyle(base)
+    for (ri, ci) in label_cell_indices:
+        bg = label_bg.get(table_data[ri][ci], colors.HexColor("#94a3b8"))
+        tbl_style.add("BACKGROUND", (ci, ri), (ci, ri), bg)
+        tbl_style.add("TEXTCOLOR",  (ci, ri), (ci, ri), colors.white)
+        tbl_style.add("FONTNAME",   (ci, ri), (ci, ri), "Helvetica-Bold")
+    tbl.setStyle(tbl_style)
+    return [tbl]
+
+
+def _chunked_flowables(show, col_widths):
+    from utils.pdf_tables import chunked_tables, format_fixed, format_text
+
+    base, label_bg = _style()
+    columns = []
+    for c in COLS:
+        if c in {"r1", "r2", "r"}:
+            columns.append(format_fixed(show[c].to_numpy(), "%.2f"))
+        elif c == "confidence":
+            columns.append(format_fixed(show[c].to_numpy(), "%.1f%%", scale=100.0))
+        else:
+            columns.append(format_text(show[c].to_numpy()))
+    header = [c.replace("_", " ").title() for c in COLS]
+    return list(chunked_tables(header, columns, col_widths, base,
+                               label_cols=[4, 5], label_bg=label_bg))
+
+
+def _child(impl: str, n_rows: int) -> None:
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate
+
+    show = _synthetic_df(n_rows)
+    col_widths = [10.27 / len(COLS) * inch] * len(COLS)
+    baseline = _peak_rss_mb()
+
+    t0 = time.perf_counter()
+    build = _legacy_flowables if impl == "legacy" else _chunked_flowables
+    story = build(show, col_widths)
+    t1 = time.perf_counter()
+
+    buf = BytesIO()
+    doc = SimpleDocTemplate(buf, pagesize=landscape(A4), topMargin=0.5 * inch,
+                            bottomMargin=0.5 * inch, leftMargin=0.4 * inch,
+                            rightMargin=0.4 * inch)
+    doc.build(story)
+    t2 = time.perf_counter()
+
+    print(f"{(t1 - t0) * 1000:.0f} {(t2 - t1) * 1000:.0f} "
+          f"{_peak_rss_mb() - baseline:.1f} {len(buf.getvalue()) / 1024:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--impl", choices=IMPLS, nargs="+", default=IMPLS)
+    parser.add_argument("--legacy-max", type=int, default=None,
+                        help="skip legacy runs above this many rows")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child[0], int(args.child[1]))
+        return
+
+    print(f"{'impl':<8} {'rows':>8} {'build ms':>9} {'layout ms':>10} {'peak +MB':>9} {'PDF KB':>8}")
+    for n in args.rows:
+        for impl in args.impl:
+            if impl == "legacy" and args.legacy_max is not None and n > args.legacy_max:
+                print(f"{impl:<8} {n:>8,} {'skipped':>9}")
+                continue
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", impl, str(n)],
+                check=True, capture_output=True, text=True,
+            ).stdout.split()
+            build_ms, layout_ms, peak, size = out
+            print(f"{impl:<8} {n:>8,} {build_ms:>9} {layout_ms:>10} {peak:>9} {size:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+# Latency of POST /api/risk/preview-weights once the yearly totals are cached:
+# re-scoring every (year, neighborhood) for a candidate weight vector, the
+# label diff, and JSON encoding, on synthetic totals.
+#
+#   python benchmarks/preview_weights.py                   # 10k neighborhoods x 10 years
+#   python benchmarks/preview_weights.py --neighborhoods 1000 100000 --years 5
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from api.risk_new import WeightPreview, preview_response  # noqa: E402
+from utils.responses import FastJSONResponse  # noqa: E402
+from utils.scoring import formula_scores  # noqa: E402
+
+
+def _totals(n: int, years: int, classes: int, rng) -> dict:
+    counts = rng.poisson(rng.uniform(1, 40, (1, n, classes)), (years, n, classes)).astype(np.float64)
+    weights = rng.integers(1, 6, classes).astype(np.float64)
+    r2 = rng.choice([1, 3, 5], (n, 7)).sum(axis=1) / 7.0 * 20.0
+    return {
+        "years": np.arange(2025 - years + 1, 2026),
+        "ids": np.arange(1, n + 1),
+        "names": [f"Area {i:06d}" for i in range(1, n + 1)],
+        "class_ids": np.arange(1, classes + 1),
+        "counts": counts,
+        "weights": weights,
+        "r2": r2,
+        "current": formula_scores(counts, weights, r2),
+    }
+
+
+def _ms(samples):
+    return statistics.median(samples) * 1000
+
+
+def _bench(n: int, years: int, classes: int, repeat: int) -> None:
+    rng = np.random.default_rng(0)
+    totals = _totals(n, years, classes, rng)
+    print(f"\n{n:,} neighborhoods x {years} years x {classes} classifications")
+    print(f"{'layout':<10} {'score ms':>9} {'response ms':>12} {'json ms':>8} {'total ms':>9} {'KB':>8} {'changed':>8}")
+
+    for layout in ("columnar", "records"):
+        t_score, t_resp, t_json, size, changed = [], [], [], 0, 0
+        for _ in range(repeat):
+            body = WeightPreview(weights={int(c): float(rng.integers(1, 6)) for c in totals["class_ids"][:3]})
+            w = totals["weights"].copy()
+            w[:3] = list(body.weights.values())
+
+            t0 = time.perf_counter()
+            formula_scores(totals["counts"], w, totals["r2"])
+            t1 = time.perf_counter()
+            out = preview_response(totals, body, layout)
+            t2 = time.perf_counter()
+            content = FastJSONResponse(out).body
+            t3 = time.perf_counter()
+
+            t_score.append(t1 - t0)
+            t_resp.append(t2 - t1)
+            t_json.append(t3 - t2)
+            size, changed = len(content), out["summary"]["changed"]
+        total = _ms(t_resp) + _ms(t_json)
+        print(f"{layout:<10} {_ms(t_score):>9.1f} {_ms(t_resp):>12.1f} {_ms(t_json):>8.1f} {total:>9.1f} "
+              f"{size / 1024:>8.0f} {changed:>8,}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--neighborhoods", type=int, nargs="+", default=[10_000])
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--classes", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    for n in args.neighborhoods:
+        _bench(n, args.years, args.classes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+# Latency of utils.spatial.SpatialIndex on synthetic neighborhoods spread over
+# a metro-sized area, against a brute-force NumPy scan of all points. Results
+# of both are compared, so this doubles as a correctness check.
+#
+#   python benchmarks/spatial_index.py                    # 100k neighborhoods
+#   python benchmarks/spatial_index.py --points 10000 1000000 --queries 2000
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from utils.spatial import SpatialIndex, haversine_km  # noqa: E402
+
+# Roughly the Dammam metropolitan area
+LAT0, LAT1 = 26.20, 26.60
+LNG0, LNG1 = 49.90, 50.30
+
+# Viewport sizes as a fraction of the area's side
+VIEWPORTS = [("street (1%)", 0.01), ("district (5%)", 0.05), ("city (25%)", 0.25)]
+
+
+def _us(samples):
+    return statistics.median(samples) * 1e6
+
+
+def _bench(n: int, queries: int, k: int) -> None:
+    rng = np.random.default_rng(0)
+    # Clustered like real cities: half uniform, half around a few centres
+    centres = rng.uniform([LAT0, LNG0], [LAT1, LNG1], size=(8, 2))
+    pts = np.vstack([
+        rng.uniform([LAT0, LNG0], [LAT1, LNG1], size=(n - n // 2, 2)),
+        centres[rng.integers(0, 8, n // 2)] + rng.normal(0, 0.01, size=(n // 2, 2)),
+    ])
+    lat, lng = pts[:, 0], pts[:, 1]
+    ids = np.arange(1, n + 1)
+
+    t0 = time.perf_counter()
+    index = SpatialIndex(ids, [f"n{i}" for i in ids], lat, lng)
+    build_ms = (time.perf_counter() - t0) * 1000
+    print(f"\n{n:,} neighborhoods  (build {build_ms:.0f} ms, grid {index.rows}x{index.cols})")
+    print(f"{'query':<22} {'index us':>10} {'scan us':>10} {'avg hits':>9}")
+
+    for label, frac in VIEWPORTS:
+        w, h = (LNG1 - LNG0) * frac, (LAT1 - LAT0) * frac
+        lo = rng.uniform([LNG0, LAT0], [LNG1 - w, LAT1 - h], size=(queries, 2))
+        boxes = [(a, b, a + w, b + h) for a, b in lo]
+
+        t_idx, t_scan, hits = [], [], 0
+        for box in boxes:
+            t = time.perf_counter()
+            got = index.ids_within(box)
+            t_idx.append(time.perf_counter() - t)
+
+            t = time.perf_counter()
+            want = ids[(lng >= box[0]) & (lng <= box[2]) & (lat >= box[1]) & (lat <= box[3])]
+            t_scan.append(time.perf_counter() - t)
+
+            assert np.array_equal(np.sort(got), want), box
+            hits += len(got)
+        print(f"{'bbox ' + label:<22} {_us(t_idx):>10.1f} {_us(t_scan):>10.1f} {hits / queries:>9.0f}")
+
+    targets = rng.uniform([LAT0, LNG0], [LAT1, LNG1], size=(queries, 2))
+    t_idx, t_scan = [], []
+    for qlat, qlng in targets:
+        t = time.perf_counter()
+        _, dist = index.nearest(qlat, qlng, k)
+        t_idx.append(time.perf_counter() - t)
+
+        t = time.perf_counter()
+        want = np.sort(haversine_km(qlat, qlng, lat, lng))[:k]
+        t_scan.append(time.perf_counter() - t)
+
+        # Projection vs great-circle: same neighbours up to metre-level ties
+        assert np.allclose(np.sort(dist), want, atol=1e-3), (qlat, qlng)
+    print(f"{f'nearest k={k}':<22} {_us(t_idx):>10.1f} {_us(t_scan):>10.1f} {k:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    for n in args.points:
+        _bench(n, args.queries, args.k)
+
+
+if __name__ == "__main__":
+    main()
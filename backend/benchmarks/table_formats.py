@@ -0,0 +1,125 @@
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Encode time and payload size of the /api/risk and /api/reports/season
+# output formats, on a synthetic risk DataFrame (no database needed):
+#
+#   json (stdlib)   records -> FastAPI's jsonable_encoder + json.dumps (the old path)
+#   json (orjson)   records -> FastJSONResponse
+#   json columnar   ?layout=columnar
+#   arrow           Accept: application/vnd.apache.arrow.stream
+#   parquet         ?format=parquet
+#
+# "decode ms" is the client side: bytes back into a pandas DataFrame.
+#
+#   python benchmarks/table_formats.py                       # 10k neighborhoods
+#   python benchmarks/table_formats.py --neighborhoods 1000 100000 --runs 5
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from api.risk_new import SCORE_COLS, _labels_by_threshold, _risk_records  # noqa: E402
+from utils.export import encode_dataframe  # noqa: E402
+from utils.responses import FastJSONResponse  # noqa: E402
+
+CLASSES = ["dangerous", "moderate", "safe", "very_dangerous"]
+
+
+def _synthetic_risk_df(n: int, n_classes: int = 10) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "name": [f"Dammam Area {i:05d}" for i in range(1, n + 1)],
+        "lat": 26.3 + rng.random(n) * 0.3,
+        "lng": 49.9 + rng.random(n) * 0.3,
+    })
+    for c in SCORE_COLS:
+        df[c] = rng.choice([1, 3, 5], n)
+    for cid in range(1, n_classes + 1):
+        df[f"crime_c{cid}"] = rng.poisson(50, n)
+    df["r1"] = rng.random(n) * 100
+    df["r2"] = df[SCORE_COLS].sum(axis=1) / 7.0 * 20.0
+    df["r"] = (df["r1"] + df["r2"]) / 2.0
+    df["formula_label"] = _labels_by_threshold(df["r"].to_numpy())
+    probs = rng.dirichlet(np.ones(len(CLASSES)), n)
+    for j, c in enumerate(CLASSES):
+        df[f"p_{c}"] = probs[:, j]
+    df["confidence"] = probs.max(axis=1)
+    df["predicted_label"] = np.asarray(CLASSES)[probs.argmax(axis=1)]
+    return df
+
+
+def _encode_stdlib(df):
+    from fastapi.encoders import jsonable_encoder
+    return json.dumps(jsonable_encoder(_risk_records(df))).encode("utf-8")
+
+
+def _encode_orjson(df):
+    return FastJSONResponse(_risk_records(df)).body
+
+
+def _encode_columnar(df):
+    cols = ["id", "name", "lat", "lng", "r1", "r2", "r",
+            "formula_label", "predicted_label", "confidence"]
+    df = df.round({"r1": 2, "r2": 2, "r": 2})
+    return FastJSONResponse({c: df[c].to_numpy() for c in cols}).body
+
+
+def _decode_json(b):
+    # Works for both layouts: list of objects or {column: [values...]}
+    return pd.DataFrame(json.loads(b))
+
+
+def _decode_arrow(b):
+    import pyarrow as pa
+    return pa.ipc.open_stream(b).read_all().to_pandas()
+
+
+def _decode_parquet(b):
+    return pd.read_parquet(io.BytesIO(b))
+
+
+FORMATS = [
+    ("json (stdlib)", _encode_stdlib, _decode_json),
+    ("json (orjson)", _encode_orjson, _decode_json),
+    ("json columnar", _encode_columnar, _decode_json),
+    ("arrow", lambda df: encode_dataframe(df, "arrow"), _decode_arrow),
+    ("parquet", lambda df: encode_dataframe(df, "parquet"), _decode_parquet),
+]
+
+
+def _median_ms(fn, arg, runs: int):
+    out = fn(arg)  # warm-up
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        out = fn(arg)
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(times), out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--neighborhoods", type=int, nargs="+", default=[10_000])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    for n in args.neighborhoods:
+        df = _synthetic_risk_df(n)
+        print(f"\n{n:,} neighborhoods")
+        print(f"{'format':<16} {'encode ms':>10} {'size KB':>10} {'decode ms':>10}")
+        for label, encode, decode in FORMATS:
+            enc_ms, payload = _median_ms(encode, df, args.runs)
+            dec_ms, _ = _median_ms(decode, payload, args.runs)
+            print(f"{label:<16} {enc_ms:>10.1f} {len(payload) / 1024:>10.1f} {dec_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
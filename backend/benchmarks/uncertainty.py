@@ -0,0 +1,54 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Time of utils.uncertainty.monte_carlo_scores on synthetic counts, per worker
+# count, with the peak size of one chunk of draws. Results are identical for
+# every worker count (per-chunk seeds).
+#
+#   python benchmarks/uncertainty.py                       # 1k and 10k neighborhoods, 1000 draws
+#   python benchmarks/uncertainty.py --neighborhoods 40 100000 --samples 200 --workers 1 4
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from utils import uncertainty  # noqa: E402
+
+
+def _bench(n: int, classes: int, samples: int, workers: list) -> None:
+    rng = np.random.default_rng(0)
+    counts = rng.poisson(rng.uniform(0, 30, (n, 1)), (n, classes)).astype(np.float64)
+    weights = rng.integers(1, 6, classes).astype(np.float64)
+    r2 = rng.choice([1, 3, 5], (n, 7)).sum(axis=1) / 7.0 * 20.0
+
+    bounds = uncertainty._chunk_bounds(samples, n, classes)
+    chunk_mb = np.diff(bounds).max() * n * classes * 8 / 2**20
+    reference = None
+    for w in workers:
+        uncertainty.UNCERTAINTY_WORKERS = w
+        t0 = time.perf_counter()
+        out = uncertainty.monte_carlo_scores(counts, weights, r2, samples)
+        elapsed = time.perf_counter() - t0
+        same = reference is None or all(np.array_equal(out[k], reference[k]) for k in out)
+        reference = reference or out
+        print(f"{n:>10,} {samples:>8,} {w:>8} {len(bounds) - 1:>7} {chunk_mb:>9.1f} {elapsed:>8.2f} "
+              f"{'yes' if same else 'NO':>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--neighborhoods", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--classes", type=int, default=10)
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, uncertainty.UNCERTAINTY_WORKERS])
+    args = parser.parse_args()
+
+    print(f"{'nbhds':>10} {'draws':>8} {'workers':>8} {'chunks':>7} {'chunk MB':>9} {'s':>8} {'same':>6}")
+    for n in args.neighborhoods:
+        _bench(n, args.classes, args.samples, sorted(set(args.workers)))
+
+
+if __name__ == "__main__":
+    main()
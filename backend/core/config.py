@@ -11,6 +11,25 @@ SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
+# ── Rendered report cache ────────────────────────────────────────────────────
+# Finished PDFs are kept on local disk and evicted least-recently-used once
+# the directory grows past REPORT_CACHE_MAX_MB.
+REPORT_CACHE_DIR = os.getenv(
+    "REPORT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), ".report_cache"),
+)
+REPORT_CACHE_MAX_MB = int(os.getenv("REPORT_CACHE_MAX_MB", "200"))
+
+# Reports rendered concurrently by the background job queue
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "2"))
+
+# ── Model selection ──────────────────────────────────────────────────────────
+# train_risk_model --select keeps the most accurate candidate whose
+# predict_proba stays within both budgets: one row (the /api/predict path)
+# and a 10k-row batch (/api/risk, reports, scenarios).
+MODEL_LATENCY_BUDGET_MS = float(os.getenv("MODEL_LATENCY_BUDGET_MS", "20"))
+MODEL_BATCH_BUDGET_MS = float(os.getenv("MODEL_BATCH_BUDGET_MS", "1000"))
+
 # ── CORS ──────────────────────────────────────────────────────────────────────
 # The regex in main.py covers ALL *.vercel.app previews automatically.
 # Only add origins here for local dev or non-Vercel custom domains.
@@ -9,8 +9,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from core.config import CORS_ORIGINS
 
 # Routers
-from api import neighborhoods_new, risk_new, predict, reports
-from api import auth, users
+from api import neighborhoods_new, risk_new, predict, reports, forecast, anomalies, scenarios
+from api import auth, users, crimes, neighbourhoods
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -64,6 +64,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Heatmap overlay placement (see /api/risk/heatmap)
+    expose_headers=["X-Heatmap-Bounds", "X-Heatmap-Size"],
 )
 
 
@@ -79,8 +81,13 @@ async def hello():
 
 # ─── Routers ──────────────────────────────────────────────────────────────────
 app.include_router(neighborhoods_new.router)  # GET + POST /api/neighborhoods, POST /api/retrain
-app.include_router(risk_new.router)           # GET /api/risk
+app.include_router(risk_new.router)           # GET /api/risk, /api/risk/clusters, /api/risk/heatmap, POST /api/risk/preview-weights
 app.include_router(predict.router)            # GET /api/predict
-app.include_router(reports.router)            # GET /api/reports/season, /api/reports/export
+app.include_router(forecast.router)           # GET /api/forecast
+app.include_router(anomalies.router)          # GET /api/anomalies
+app.include_router(scenarios.router)          # POST /api/scenarios
+app.include_router(reports.router)            # GET /api/reports/season, /api/reports/export, /api/reports/jobs
 app.include_router(auth.router)               # POST /auth/login, GET /auth/me
-app.include_router(users.router)              # GET /api/users
\ No newline at end of file
+app.include_router(users.router)              # GET /api/users
+app.include_router(crimes.router)             # /api/crime-forms, /api/crime-form, /api/crime/meta
+app.include_router(neighbourhoods.router)     # /api/neighbourhoods/crime-weights, /api/neighbourhood/{name}/crime-weight
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""crime_counts data version
+
+Revision ID: 2c7f4e1a9d63
+Revises: 9f1e5d7b3a48
+Create Date: 2026-10-19 09:41:27.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c7f4e1a9d63'
+down_revision: Union[str, Sequence[str], None] = '9f1e5d7b3a48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Results derived from crime_monthly_counts (rendered reports, risk
+    # scores) are invalidated on every write to it, including the
+    # incremental incident deltas
+    op.execute("""
+        CREATE TRIGGER trg_crime_monthly_counts_data_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON crime_monthly_counts
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version('crime_counts')
+    """)
+    op.execute("""
+        INSERT INTO data_versions (name, version)
+        VALUES ('crime_counts', 1)
+        ON CONFLICT (name) DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS trg_crime_monthly_counts_data_version ON crime_monthly_counts")
+    op.execute("DELETE FROM data_versions WHERE name = 'crime_counts'")
@@ -0,0 +1,52 @@
+"""crime_form_data listing indexes
+
+Revision ID: 3d8f0b6e2c17
+Revises: 7c2e91d4a3b5
+Create Date: 2026-10-18 10:04:27.881934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d8f0b6e2c17'
+down_revision: Union[str, Sequence[str], None] = '7c2e91d4a3b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, columns) - each filter column paired with id so that
+# "WHERE col = ... ORDER BY id DESC LIMIT n" is a single index range scan
+INDEXES = [
+    ('ix_crime_form_data_neighbourhood_id', ['neighbourhood_name', 'id']),
+    ('ix_crime_form_data_category_id', ['main_category', 'id']),
+    ('ix_crime_form_data_date_id', ['date', 'id']),
+    ('ix_crime_form_data_climate_id', ['climate', 'id']),
+    ('ix_crime_form_data_time_of_year_id', ['time_of_year', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY so the table stays writable while the indexes build
+    with op.get_context().autocommit_block():
+        for name, cols in INDEXES:
+            op.create_index(
+                name, 'crime_form_data', cols,
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+    # Refresh planner statistics; the list endpoint's total estimate uses them
+    op.execute("ANALYZE crime_form_data")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name='crime_form_data',
+                postgresql_concurrently=True, if_exists=True,
+            )
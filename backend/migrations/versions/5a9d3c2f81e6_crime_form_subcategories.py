@@ -0,0 +1,58 @@
+"""crime form subcategories
+
+Revision ID: 5a9d3c2f81e6
+Revises: b41c7a9e05d2
+Create Date: 2026-10-18 13:21:55.730148
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a9d3c2f81e6'
+down_revision: Union[str, Sequence[str], None] = 'b41c7a9e05d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'crime_form_subcategories',
+        sa.Column('crime_form_id', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['crime_form_id'], ['crime_form_data.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['category_id'], ['crime_categories.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('crime_form_id', 'category_id', name='pk_crime_form_subcategories'),
+    )
+
+    # Backfill from the comma-joined crime_form_data.subcategories strings.
+    # Names are matched within the record's main category; names with no
+    # crime_categories row are left out (they remain in the display string).
+    op.execute(r"""
+        INSERT INTO crime_form_subcategories (crime_form_id, category_id)
+        SELECT c.id, MIN(cc.id)
+        FROM crime_form_data c
+        CROSS JOIN LATERAL regexp_split_to_table(c.subcategories, '\s*,\s*') AS s(name)
+        JOIN crime_categories cc
+          ON cc.main_category = c.main_category
+         AND cc.subcategory = btrim(s.name)
+        GROUP BY c.id, cc.main_category, cc.subcategory
+        ON CONFLICT DO NOTHING
+    """)
+
+    # Built after the backfill: one sort instead of per-row index maintenance
+    op.create_index(
+        'ix_crime_form_subcategories_category_form',
+        'crime_form_subcategories', ['category_id', 'crime_form_id'],
+    )
+    op.execute("ANALYZE crime_form_subcategories")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_crime_form_subcategories_category_form', table_name='crime_form_subcategories')
+    op.drop_table('crime_form_subcategories')
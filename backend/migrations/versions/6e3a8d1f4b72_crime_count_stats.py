@@ -0,0 +1,112 @@
+"""crime count stats
+
+Revision ID: 6e3a8d1f4b72
+Revises: 2c7f4e1a9d63
+Create Date: 2026-10-19 14:12:05.341876
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e3a8d1f4b72'
+down_revision: Union[str, Sequence[str], None] = '2c7f4e1a9d63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'crime_count_stats',
+        sa.Column('neighborhood_id', sa.Integer(), nullable=False),
+        sa.Column('classification_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Integer(), nullable=False),
+        sa.Column('n', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('mean', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('m2', sa.Float(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['neighborhood_id'], ['neighborhoods.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['classification_id'], ['crime_classifications.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('neighborhood_id', 'classification_id', 'month'),
+    )
+
+    # Welford update per written row: an UPDATE removes the old count from
+    # its cell's stats and adds the new one. SET expressions see the row
+    # before the update, so each one is written in terms of the old n/mean.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION crime_count_stats_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE'
+               AND OLD.crime_count = NEW.crime_count
+               AND OLD.neighborhood_id = NEW.neighborhood_id
+               AND OLD.classification_id = NEW.classification_id
+               AND OLD.month = NEW.month THEN
+                RETURN NULL;
+            END IF;
+
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE crime_count_stats s SET
+                    n = s.n - 1,
+                    mean = CASE WHEN s.n > 1
+                                THEN (s.n * s.mean - OLD.crime_count) / (s.n - 1) ELSE 0 END,
+                    m2 = CASE WHEN s.n > 1
+                              THEN GREATEST(s.m2 - (OLD.crime_count - s.mean)
+                                   * (OLD.crime_count - (s.n * s.mean - OLD.crime_count) / (s.n - 1)), 0)
+                              ELSE 0 END
+                WHERE s.neighborhood_id = OLD.neighborhood_id
+                  AND s.classification_id = OLD.classification_id
+                  AND s.month = OLD.month;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO crime_count_stats AS s (neighborhood_id, classification_id, month, n, mean, m2)
+                VALUES (NEW.neighborhood_id, NEW.classification_id, NEW.month, 1, NEW.crime_count, 0)
+                ON CONFLICT (neighborhood_id, classification_id, month) DO UPDATE SET
+                    n = s.n + 1,
+                    mean = s.mean + (NEW.crime_count - s.mean) / (s.n + 1),
+                    m2 = s.m2 + (NEW.crime_count - s.mean)
+                         * (NEW.crime_count - (s.mean + (NEW.crime_count - s.mean) / (s.n + 1)));
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_crime_monthly_counts_stats
+        AFTER INSERT OR UPDATE OR DELETE ON crime_monthly_counts
+        FOR EACH ROW EXECUTE FUNCTION crime_count_stats_apply()
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION crime_count_stats_truncate() RETURNS trigger AS $$
+        BEGIN
+            TRUNCATE crime_count_stats;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_crime_monthly_counts_stats_truncate
+        AFTER TRUNCATE ON crime_monthly_counts
+        FOR EACH STATEMENT EXECUTE FUNCTION crime_count_stats_truncate()
+    """)
+
+    op.execute("""
+        INSERT INTO crime_count_stats (neighborhood_id, classification_id, month, n, mean, m2)
+        SELECT neighborhood_id, classification_id, month,
+               COUNT(*), AVG(crime_count), COALESCE(VAR_POP(crime_count) * COUNT(*), 0)
+        FROM crime_monthly_counts
+        GROUP BY neighborhood_id, classification_id, month
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS trg_crime_monthly_counts_stats_truncate ON crime_monthly_counts")
+    op.execute("DROP TRIGGER IF EXISTS trg_crime_monthly_counts_stats ON crime_monthly_counts")
+    op.execute("DROP FUNCTION IF EXISTS crime_count_stats_truncate()")
+    op.execute("DROP FUNCTION IF EXISTS crime_count_stats_apply()")
+    op.drop_table('crime_count_stats')
@@ -0,0 +1,63 @@
+"""incident monthly aggregation
+
+Revision ID: 7c2e91d4a3b5
+Revises: 1f6881cafd18
+Create Date: 2026-10-18 09:12:41.503217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e91d4a3b5'
+down_revision: Union[str, Sequence[str], None] = '1f6881cafd18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # crime_weights.main_category -> crime_classifications mapping
+    op.add_column(
+        'crime_weights',
+        sa.Column('classification_id', sa.Integer(), nullable=True),
+    )
+    op.create_foreign_key(
+        'fk_crime_weights_classification',
+        'crime_weights', 'crime_classifications',
+        ['classification_id'], ['id'],
+        ondelete='SET NULL',
+    )
+    # Match on name first, everything else falls back to "Other" (code 10)
+    op.execute("""
+        UPDATE crime_weights cw
+        SET classification_id = cc.id
+        FROM crime_classifications cc
+        WHERE lower(cc.name) = lower(cw.main_category)
+    """)
+    op.execute("""
+        UPDATE crime_weights
+        SET classification_id = (SELECT id FROM crime_classifications WHERE code = 10)
+        WHERE classification_id IS NULL
+    """)
+
+    # Share of each monthly count that comes from crime_form_data incidents
+    op.add_column(
+        'crime_monthly_counts',
+        sa.Column('incident_count', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        UPDATE crime_monthly_counts
+        SET crime_count = GREATEST(crime_count - incident_count, 0)
+        WHERE incident_count <> 0
+    """)
+    op.drop_column('crime_monthly_counts', 'incident_count')
+    op.drop_constraint('fk_crime_weights_classification', 'crime_weights', type_='foreignkey')
+    op.drop_column('crime_weights', 'classification_id')
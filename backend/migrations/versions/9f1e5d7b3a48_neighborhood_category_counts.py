@@ -0,0 +1,43 @@
+"""neighborhood category counts
+
+Revision ID: 9f1e5d7b3a48
+Revises: e6b2f47a9c30
+Create Date: 2026-10-18 16:48:30.117502
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f1e5d7b3a48'
+down_revision: Union[str, Sequence[str], None] = 'e6b2f47a9c30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'neighborhood_category_counts',
+        sa.Column('neighborhood_id', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('crime_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['neighborhood_id'], ['neighborhoods.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['category_id'], ['crime_weights.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('neighborhood_id', 'category_id'),
+    )
+    op.execute("""
+        INSERT INTO neighborhood_category_counts (neighborhood_id, category_id, crime_count)
+        SELECT neighborhood_id, category_id, COUNT(*)
+        FROM crime_form_data
+        WHERE neighborhood_id IS NOT NULL AND category_id IS NOT NULL
+        GROUP BY neighborhood_id, category_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('neighborhood_category_counts')
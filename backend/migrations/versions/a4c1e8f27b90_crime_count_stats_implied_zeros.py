@@ -0,0 +1,171 @@
+"""crime count stats implied zeros
+
+Revision ID: a4c1e8f27b90
+Revises: 6e3a8d1f4b72
+Create Date: 2026-10-19 16:40:27.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c1e8f27b90'
+down_revision: Union[str, Sequence[str], None] = '6e3a8d1f4b72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Years each neighbourhood's series covers, per month-of-year: any row of
+    # that (year, month) covers it. Rows are never removed, so a cell that
+    # drops back to 0 (or never had a row) is an implied zero of a covered year.
+    op.create_table(
+        'crime_count_years',
+        sa.Column('neighborhood_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Integer(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['neighborhood_id'], ['neighborhoods.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('neighborhood_id', 'month', 'year'),
+    )
+
+    # crime_count_stats now only holds non-zero counts: an explicit 0 row (a
+    # cell brought down by GREATEST(..., 0)) and a missing row are the same
+    # zero, and /api/anomalies adds the zeros back from crime_count_years.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION crime_count_stats_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE'
+               AND OLD.crime_count = NEW.crime_count
+               AND OLD.neighborhood_id = NEW.neighborhood_id
+               AND OLD.classification_id = NEW.classification_id
+               AND OLD.year = NEW.year
+               AND OLD.month = NEW.month THEN
+                RETURN NULL;
+            END IF;
+
+            IF TG_OP = 'INSERT'
+               OR (TG_OP = 'UPDATE' AND (OLD.neighborhood_id, OLD.year, OLD.month)
+                                        <> (NEW.neighborhood_id, NEW.year, NEW.month)) THEN
+                INSERT INTO crime_count_years (neighborhood_id, month, year)
+                VALUES (NEW.neighborhood_id, NEW.month, NEW.year)
+                ON CONFLICT DO NOTHING;
+            END IF;
+
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                IF OLD.crime_count <> 0 THEN
+                    UPDATE crime_count_stats s SET
+                        n = s.n - 1,
+                        mean = CASE WHEN s.n > 1
+                                    THEN (s.n * s.mean - OLD.crime_count) / (s.n - 1) ELSE 0 END,
+                        m2 = CASE WHEN s.n > 1
+                                  THEN GREATEST(s.m2 - (OLD.crime_count - s.mean)
+                                       * (OLD.crime_count - (s.n * s.mean - OLD.crime_count) / (s.n - 1)), 0)
+                                  ELSE 0 END
+                    WHERE s.neighborhood_id = OLD.neighborhood_id
+                      AND s.classification_id = OLD.classification_id
+                      AND s.month = OLD.month;
+                END IF;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                IF NEW.crime_count <> 0 THEN
+                    INSERT INTO crime_count_stats AS s (neighborhood_id, classification_id, month, n, mean, m2)
+                    VALUES (NEW.neighborhood_id, NEW.classification_id, NEW.month, 1, NEW.crime_count, 0)
+                    ON CONFLICT (neighborhood_id, classification_id, month) DO UPDATE SET
+                        n = s.n + 1,
+                        mean = s.mean + (NEW.crime_count - s.mean) / (s.n + 1),
+                        m2 = s.m2 + (NEW.crime_count - s.mean)
+                             * (NEW.crime_count - (s.mean + (NEW.crime_count - s.mean) / (s.n + 1)));
+                END IF;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION crime_count_stats_truncate() RETURNS trigger AS $$
+        BEGIN
+            TRUNCATE crime_count_stats, crime_count_years;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        INSERT INTO crime_count_years (neighborhood_id, month, year)
+        SELECT DISTINCT neighborhood_id, month, year
+        FROM crime_monthly_counts
+    """)
+    op.execute("DELETE FROM crime_count_stats")
+    op.execute("""
+        INSERT INTO crime_count_stats (neighborhood_id, classification_id, month, n, mean, m2)
+        SELECT neighborhood_id, classification_id, month,
+               COUNT(*), AVG(crime_count), COALESCE(VAR_POP(crime_count) * COUNT(*), 0)
+        FROM crime_monthly_counts
+        WHERE crime_count <> 0
+        GROUP BY neighborhood_id, classification_id, month
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION crime_count_stats_apply() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE'
+               AND OLD.crime_count = NEW.crime_count
+               AND OLD.neighborhood_id = NEW.neighborhood_id
+               AND OLD.classification_id = NEW.classification_id
+               AND OLD.month = NEW.month THEN
+                RETURN NULL;
+            END IF;
+
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE crime_count_stats s SET
+                    n = s.n - 1,
+                    mean = CASE WHEN s.n > 1
+                                THEN (s.n * s.mean - OLD.crime_count) / (s.n - 1) ELSE 0 END,
+                    m2 = CASE WHEN s.n > 1
+                              THEN GREATEST(s.m2 - (OLD.crime_count - s.mean)
+                                   * (OLD.crime_count - (s.n * s.mean - OLD.crime_count) / (s.n - 1)), 0)
+                              ELSE 0 END
+                WHERE s.neighborhood_id = OLD.neighborhood_id
+                  AND s.classification_id = OLD.classification_id
+                  AND s.month = OLD.month;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO crime_count_stats AS s (neighborhood_id, classification_id, month, n, mean, m2)
+                VALUES (NEW.neighborhood_id, NEW.classification_id, NEW.month, 1, NEW.crime_count, 0)
+                ON CONFLICT (neighborhood_id, classification_id, month) DO UPDATE SET
+                    n = s.n + 1,
+                    mean = s.mean + (NEW.crime_count - s.mean) / (s.n + 1),
+                    m2 = s.m2 + (NEW.crime_count - s.mean)
+                         * (NEW.crime_count - (s.mean + (NEW.crime_count - s.mean) / (s.n + 1)));
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION crime_count_stats_truncate() RETURNS trigger AS $$
+        BEGIN
+            TRUNCATE crime_count_stats;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.drop_table('crime_count_years')
+
+    op.execute("DELETE FROM crime_count_stats")
+    op.execute("""
+        INSERT INTO crime_count_stats (neighborhood_id, classification_id, month, n, mean, m2)
+        SELECT neighborhood_id, classification_id, month,
+               COUNT(*), AVG(crime_count), COALESCE(VAR_POP(crime_count) * COUNT(*), 0)
+        FROM crime_monthly_counts
+        GROUP BY neighborhood_id, classification_id, month
+    """)
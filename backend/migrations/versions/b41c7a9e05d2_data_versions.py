@@ -0,0 +1,71 @@
+"""data versions
+
+Revision ID: b41c7a9e05d2
+Revises: 3d8f0b6e2c17
+Create Date: 2026-10-18 11:37:02.416589
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41c7a9e05d2'
+down_revision: Union[str, Sequence[str], None] = '3d8f0b6e2c17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# table -> data_versions.name bumped on every INSERT/UPDATE/DELETE/TRUNCATE
+VERSIONED_TABLES = {
+    'crime_weights': 'crime_meta',
+    'crime_categories': 'crime_meta',
+    'crime_classifications': 'crime_meta',
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'data_versions',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_data_version() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO data_versions (name, version, updated_at)
+            VALUES (TG_ARGV[0], 1, now())
+            ON CONFLICT (name) DO UPDATE
+            SET version = data_versions.version + 1, updated_at = now();
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Statement-level: one bump per write statement, not per row
+    for table, name in VERSIONED_TABLES.items():
+        op.execute(f"""
+            CREATE TRIGGER trg_{table}_data_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version('{name}')
+        """)
+
+    op.execute("""
+        INSERT INTO data_versions (name, version)
+        VALUES ('crime_meta', 1)
+        ON CONFLICT (name) DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_data_version ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS bump_data_version()")
+    op.drop_table('data_versions')
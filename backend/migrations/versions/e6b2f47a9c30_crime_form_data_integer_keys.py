@@ -0,0 +1,78 @@
+"""crime_form_data integer keys
+
+Revision ID: e6b2f47a9c30
+Revises: 5a9d3c2f81e6
+Create Date: 2026-10-18 15:02:13.294871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b2f47a9c30'
+down_revision: Union[str, Sequence[str], None] = '5a9d3c2f81e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('crime_form_data', sa.Column('neighborhood_id', sa.Integer(), nullable=True))
+    op.add_column('crime_form_data', sa.Column('category_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_crime_form_data_neighborhood', 'crime_form_data', 'neighborhoods',
+        ['neighborhood_id'], ['id'], ondelete='SET NULL',
+    )
+    op.create_foreign_key(
+        'fk_crime_form_data_category', 'crime_form_data', 'crime_weights',
+        ['category_id'], ['id'], ondelete='SET NULL',
+    )
+
+    # Backfill; names with no match stay NULL (the string columns are kept)
+    op.execute("""
+        UPDATE crime_form_data c
+        SET neighborhood_id = n.id
+        FROM neighborhoods n
+        WHERE n.name = c.neighbourhood_name
+    """)
+    op.execute("""
+        UPDATE crime_form_data c
+        SET category_id = cw.id
+        FROM crime_weights cw
+        WHERE cw.main_category = c.main_category
+    """)
+
+    # Integer keyset indexes replace the string ones
+    op.drop_index('ix_crime_form_data_neighbourhood_id', table_name='crime_form_data', if_exists=True)
+    op.drop_index('ix_crime_form_data_category_id', table_name='crime_form_data', if_exists=True)
+    op.create_index('ix_crime_form_data_neighborhood_fk', 'crime_form_data', ['neighborhood_id', 'id'])
+    op.create_index('ix_crime_form_data_category_fk', 'crime_form_data', ['category_id', 'id'])
+    op.execute("ANALYZE crime_form_data")
+
+    # Name -> id resolution cache is invalidated on neighborhoods writes
+    op.execute("""
+        CREATE TRIGGER trg_neighborhoods_data_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON neighborhoods
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version('neighborhoods')
+    """)
+    op.execute("""
+        INSERT INTO data_versions (name, version)
+        VALUES ('neighborhoods', 1)
+        ON CONFLICT (name) DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS trg_neighborhoods_data_version ON neighborhoods")
+    op.drop_index('ix_crime_form_data_category_fk', table_name='crime_form_data')
+    op.drop_index('ix_crime_form_data_neighborhood_fk', table_name='crime_form_data')
+    op.create_index('ix_crime_form_data_neighbourhood_id', 'crime_form_data', ['neighbourhood_name', 'id'])
+    op.create_index('ix_crime_form_data_category_id', 'crime_form_data', ['main_category', 'id'])
+    op.drop_constraint('fk_crime_form_data_category', 'crime_form_data', type_='foreignkey')
+    op.drop_constraint('fk_crime_form_data_neighborhood', 'crime_form_data', type_='foreignkey')
+    op.drop_column('crime_form_data', 'category_id')
+    op.drop_column('crime_form_data', 'neighborhood_id')
@@ -1,13 +1,27 @@
 from .classification import CrimeClassification
+from .crime import CrimeCategory, CrimeWeight, CrimeFormData, CrimeFormSubcategory
+from .data_version import DataVersion
 from .neighborhood import Neighborhood
+from .neighbourhood import Neighbourhood
 from .monthly_counts import CrimeMonthlyCount
+from .category_counts import NeighborhoodCategoryCount
+from .count_stats import CrimeCountStat, CrimeCountYear
 from .risk_score import RiskScore
 from .user import User
 
 __all__ = [
     "CrimeClassification",
+    "CrimeCategory",
+    "CrimeWeight",
+    "CrimeFormData",
+    "CrimeFormSubcategory",
+    "DataVersion",
     "Neighborhood",
+    "Neighbourhood",
     "CrimeMonthlyCount",
+    "NeighborhoodCategoryCount",
+    "CrimeCountStat",
+    "CrimeCountYear",
     "RiskScore",
     "User",
-]
\ No newline at end of file
+]
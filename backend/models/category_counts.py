@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from database import Base
+
+# Per-neighbourhood histogram of crime_form_data incidents by main category.
+# Maintained incrementally by utils.aggregation on every incident write, so the
+# dominant category of any / every neighbourhood is a lookup, not a GROUP BY.
+
+class NeighborhoodCategoryCount(Base):
+    __tablename__ = "neighborhood_category_counts"
+
+    neighborhood_id = Column(Integer, ForeignKey("neighborhoods.id", ondelete="CASCADE"), primary_key=True)
+    category_id = Column(Integer, ForeignKey("crime_weights.id", ondelete="CASCADE"), primary_key=True)
+    crime_count = Column(Integer, nullable=False, default=0, server_default="0")
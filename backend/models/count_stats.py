@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, BigInteger, Float, ForeignKey
+from database import Base
+
+# Running mean / variance of crime_monthly_counts.crime_count over the years,
+# per neighbourhood x classification x month-of-year (Welford: n, mean and M2,
+# the sum of squared deviations). Maintained by a row-level Postgres trigger on
+# every write to crime_monthly_counts, so the seasonal norm of any cell is a
+# lookup, never a scan of the history.
+#
+# Only non-zero counts are folded in; the zeros are implied by
+# crime_count_years, the (year, month-of-year) pairs each neighbourhood has
+# rows for, which the same trigger keeps.
+
+class CrimeCountStat(Base):
+    __tablename__ = "crime_count_stats"
+
+    neighborhood_id = Column(Integer, ForeignKey("neighborhoods.id", ondelete="CASCADE"), primary_key=True)
+    classification_id = Column(Integer, ForeignKey("crime_classifications.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Integer, primary_key=True)
+    n = Column(BigInteger, nullable=False, default=0, server_default="0")
+    mean = Column(Float, nullable=False, default=0.0, server_default="0")
+    m2 = Column(Float, nullable=False, default=0.0, server_default="0")
+
+
+class CrimeCountYear(Base):
+    __tablename__ = "crime_count_years"
+
+    neighborhood_id = Column(Integer, ForeignKey("neighborhoods.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Integer, primary_key=True)
+    year = Column(Integer, primary_key=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Index, PrimaryKeyConstraint
 from database import Base
 
 # Stores the relationship between main crime categories and subcategories
@@ -16,6 +16,8 @@ class CrimeCategory(Base):
 # Stores severity weight (1-10) for each main crime category
 # Higher weight = more severe crime
 # Used to calculate neighbourhood risk levels
+# classification_id maps the category onto crime_classifications so that
+# incidents can be folded into crime_monthly_counts (NULL = not aggregated)
 
 class CrimeWeight(Base):
     """Weight per main crime category (1-10)."""
@@ -25,28 +27,62 @@ class CrimeWeight(Base):
     id = Column(Integer, primary_key=True, index=True)
     main_category = Column(String, unique=True, nullable=False)
     weight = Column(Integer, nullable=False)
+    classification_id = Column(
+        Integer, ForeignKey("crime_classifications.id", ondelete="SET NULL"), nullable=True
+    )
 
 # Stores actual crime incident records entered by users
 # main_category and crime_weight are copied from CrimeWeight table
 # subcategories: comma-separated list of selected subcategories
 # Additional context: offender income, climate, season
 # date: when the crime occurred
+# Composite (filter column, id) indexes back the keyset-paginated,
+# filtered listing in GET /api/crime-forms (ORDER BY id DESC)
 
 class CrimeFormData(Base):
     """Data entered on the crime information form (Insert page)."""
 
     __tablename__ = "crime_form_data"
+    __table_args__ = (
+        Index("ix_crime_form_data_neighborhood_fk", "neighborhood_id", "id"),
+        Index("ix_crime_form_data_category_fk", "category_id", "id"),
+        Index("ix_crime_form_data_date_id", "date", "id"),
+        Index("ix_crime_form_data_climate_id", "climate", "id"),
+        Index("ix_crime_form_data_time_of_year_id", "time_of_year", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     main_category = Column(String, nullable=False)
     crime_weight = Column(Integer, nullable=False)
     # Comma-separated list of selected subcategories for this record
+    # (display copy; filtering and counting use crime_form_subcategories)
     subcategories = Column(String, nullable=False)
     neighbourhood_name = Column(String, nullable=False)
+    # Integer keys used by every join / aggregate; the name columns above are
+    # kept as entered (NULL here = name did not resolve when the row was written)
+    neighborhood_id = Column(Integer, ForeignKey("neighborhoods.id", ondelete="SET NULL"), nullable=True)
+    category_id = Column(Integer, ForeignKey("crime_weights.id", ondelete="SET NULL"), nullable=True)
     date = Column(Date, nullable=False)
     # Offender income level: low / middle / high
     offender_income_level = Column(String, nullable=False)
     # Climate at time of crime: hot / cold / moderate
     climate = Column(String, nullable=False)
     # Time of year: summer / winter / spring / autumn
-    time_of_year = Column(String, nullable=False)
\ No newline at end of file
+    time_of_year = Column(String, nullable=False)
+
+# Normalized subcategories of each crime record: one row per
+# (crime_form_data row, crime_categories row) pair.
+# The (category_id, crime_form_id) index answers "which / how many incidents
+# involved subcategory X" without scanning crime_form_data.
+
+class CrimeFormSubcategory(Base):
+    """Link between a crime record and one of its subcategories."""
+
+    __tablename__ = "crime_form_subcategories"
+    __table_args__ = (
+        PrimaryKeyConstraint("crime_form_id", "category_id", name="pk_crime_form_subcategories"),
+        Index("ix_crime_form_subcategories_category_form", "category_id", "crime_form_id"),
+    )
+
+    crime_form_id = Column(Integer, ForeignKey("crime_form_data.id", ondelete="CASCADE"), nullable=False)
+    category_id = Column(Integer, ForeignKey("crime_categories.id", ondelete="CASCADE"), nullable=False)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, BigInteger, DateTime, func
+from database import Base
+
+# Monotonic version counter per group of tables.
+# Bumped by Postgres triggers (bump_data_version) on every write statement, so
+# process-wide caches can tell in one primary-key lookup whether they are stale.
+
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
@@ -13,4 +13,7 @@ class CrimeMonthlyCount(Base):
 
     year = Column(Integer, nullable=False)
     month = Column(Integer, nullable=False)
-    crime_count = Column(Integer, nullable=False)
\ No newline at end of file
+    crime_count = Column(Integer, nullable=False)
+    # Portion of crime_count contributed by crime_form_data incidents
+    # (maintained by utils.aggregation; the rest is the seeded baseline)
+    incident_count = Column(Integer, nullable=False, default=0, server_default="0")
\ No newline at end of file
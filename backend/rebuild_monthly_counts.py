@@ -0,0 +1,36 @@
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from database import engine
+from utils.aggregation import rebuild_incident_counts
+
+load_dotenv()
+
+# Full rebuild of the incident share of crime_monthly_counts.
+# The API keeps crime_monthly_counts in sync incrementally on every
+# crime_form_data write; run this only to recover from drift, e.g. after
+# editing crime_form_data or crime_weights.classification_id by hand:
+#
+#   python rebuild_monthly_counts.py
+
+
+def main():
+    with Session(engine) as db:
+        stats = rebuild_incident_counts(db)
+        db.commit()
+
+    print("✅ Rebuilt incident counts")
+    print(f"Keys resolved:    {stats['keys_resolved']}")
+    print(f"Cells reset:      {stats['cells_reset']}")
+    print(f"Cells rebuilt:    {stats['cells_rebuilt']}")
+    print(f"Incidents:        {stats['incidents']}")
+    print(f"Aggregated:       {stats['aggregated']}")
+    if stats["skipped"]:
+        print(
+            f"⚠️ Skipped:        {stats['skipped']} "
+            "(unknown neighbourhood, unmapped category or out-of-range year)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,38 @@
+import argparse
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+
 import joblib
+import numpy as np
 import pandas as pd
 from sqlalchemy import text
 from dotenv import load_dotenv
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 from sklearn.ensemble import RandomForestClassifier
+from core.config import MODEL_BATCH_BUDGET_MS, MODEL_LATENCY_BUDGET_MS
 from database import engine
+from utils.explain import explain_model, explanation_path, supports_explanation
+from utils.model_selection import BATCH_ROWS, candidate_models, evaluate_candidates, pick_model
+from utils.scoring import formula_scores, label_names, r2_score
+from utils.spatial import LAG_K, knn_weights, lag_sources, spatial_lag
 
 load_dotenv()
 
 YEAR = 2025
 MODEL_OUT = "risk_model.joblib"
+SELECTION_REPORT_OUT = os.path.splitext(MODEL_OUT)[0] + ".selection.json"
+EXPLANATION_OUT = explanation_path(MODEL_OUT)
 CLASS_ORDER = ["safe", "moderate", "dangerous", "very_dangerous"]
 
 
-def label_by_threshold(r_value: float) -> str:
-    if r_value > 80:
-        return "very_dangerous"
-    if r_value >= 60:
-        return "dangerous"
-    if r_value >= 40:
-        return "moderate"
-    return "safe"
-
-
-def build_monthly_dataset(year):
+def build_monthly_dataset(year, lag_k=None):
     with engine.connect() as conn:
         r = conn.execute(text(
-            "SELECT id AS neighborhood_id, population_density_score, divorce_ratio_score, "
+            "SELECT id AS neighborhood_id, latitude::float8 AS latitude, longitude::float8 AS longitude, "
+            "population_density_score, divorce_ratio_score, "
             "unmarried_over_30_score, university_education_score, unemployment_score, "
             "income_score, vitality_score FROM neighborhoods ORDER BY id"
         ))
@@ -38,6 +43,9 @@ def build_monthly_dataset(year):
         wdf = pd.DataFrame(r.fetchall(), columns=r.keys())
     wmap = dict(zip(wdf["classification_id"], wdf["weight"]))
 
+    # Monthly frames keep ndf's row order, so one k-NN matrix serves them all
+    W = knn_weights(ndf["latitude"], ndf["longitude"], lag_k) if lag_k else None
+
     rows_out = []
     for month in range(1, 13):
         with engine.connect() as conn:
@@ -72,24 +80,25 @@ def build_monthly_dataset(year):
             "university_education_score", "unemployment_score", "income_score", "vitality_score",
         ]
 
-        def weighted_sum(row):
-            s = 0.0
-            for cid, w in wmap.items():
-                col = f"crime_c{int(cid)}"
-                s += float(row.get(col, 0.0)) * float(w)
-            return s
-
-        df["weighted_sum"] = df.apply(weighted_sum, axis=1)
-
-        # ── R1 normalised to [0, 100] against the month's max weighted sum
-        max_ws = df["weighted_sum"].max()
-        df["r1"] = (df["weighted_sum"] / max_ws * 100.0) if max_ws > 0 else 0.0
-
-        df["r2"] = df[demo_cols].mean(axis=1) * 20.0
-        df["r"]  = (df["r1"] + df["r2"]) / 2.0
-
-        df["label"] = df["r"].apply(label_by_threshold)
+        # ── R1 against the month's max weighted sum, R2, R and the label, as
+        #    the API scores them (utils.scoring)
+        crime_cols = [c for c in df.columns if c.startswith("crime_c")]
+        weights = np.array([float(wmap.get(int(c[len("crime_c"):]), 0)) for c in crime_cols])
+        counts = df[crime_cols].to_numpy(dtype=np.float64)
+        df["weighted_sum"] = counts @ weights
+        r2 = r2_score(df[demo_cols].to_numpy(dtype=np.float64))
+        r1, r, codes = formula_scores(counts, weights, r2)
+        df["r1"] = r1
+        df["r2"] = r2
+        df["r"] = r
+
+        df["label"] = label_names(codes)
         df["month"] = month
+
+        # ── Spatial lag: mean counts and R of the k nearest neighborhoods
+        if W is not None:
+            lag = spatial_lag(W, df, lag_sources(df))
+            df = pd.concat([df, lag], axis=1)
         rows_out.append(df)
 
     out = pd.concat(rows_out, ignore_index=True)
@@ -103,15 +112,66 @@ def build_monthly_dataset(year):
     return out
 
 
+def select_model(X_train, y_train, X_test, y_test, args):
+    """Cross-validate every candidate in parallel, pick one under the latency budgets, save the report."""
+    rows, fitted = evaluate_candidates(
+        candidate_models(), X_train, y_train, X_test, y_test, folds=args.cv_folds, n_jobs=args.jobs,
+    )
+    best = pick_model(rows, args.latency_budget_ms, args.batch_budget_ms)
+
+    print(f"\n=== Model selection ({args.cv_folds}-fold CV, budgets {args.latency_budget_ms:g} ms/row, "
+          f"{args.batch_budget_ms:g} ms/{BATCH_ROWS:,} rows) ===")
+    print(f"{'model':<10} {'cv acc':>7} {'± std':>6} {'test acc':>9} {'1-row ms':>9} "
+          f"{'batch ms':>9} {'size KB':>9}")
+    for r in rows:
+        mark = "  <- selected" if r is best else ""
+        print(f"{r['model']:<10} {r['cv_accuracy']:>7.4f} {r['cv_accuracy_std']:>6.3f} {r['test_accuracy']:>9.4f} "
+              f"{r['single_row_ms']:>9.2f} {r['batch_ms']:>9.1f} {r['artifact_bytes'] / 1024:>9.0f}{mark}")
+    if best["single_row_ms"] > args.latency_budget_ms or best["batch_ms"] > args.batch_budget_ms:
+        print("⚠️ No candidate is within the latency budgets; keeping the one closest to them")
+
+    with open(SELECTION_REPORT_OUT, "w") as f:
+        json.dump({
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "artifact": MODEL_OUT,
+            "selected": best["model"],
+            "latency_budget_ms": args.latency_budget_ms,
+            "batch_budget_ms": args.batch_budget_ms,
+            "batch_rows": BATCH_ROWS,
+            "cv_folds": args.cv_folds,
+            "train_rows": len(X_train),
+            "test_rows": len(X_test),
+            "candidates": rows,
+        }, f, indent=2)
+    print(f"✅ Saved selection report -> {SELECTION_REPORT_OUT}")
+    return best["model"], fitted[best["model"]]
+
+
 def main():
-    df = build_monthly_dataset(YEAR)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--spatial-lag", action="store_true",
+                        help="add neighbour-averaged crime counts and R as features")
+    parser.add_argument("--lag-k", type=int, default=LAG_K, help="neighbours per spatial lag")
+    parser.add_argument("--select", action="store_true",
+                        help="cross-validate candidate models and keep the best within the latency budgets")
+    parser.add_argument("--latency-budget-ms", type=float, default=MODEL_LATENCY_BUDGET_MS,
+                        help="single-row predict_proba budget for --select")
+    parser.add_argument("--batch-budget-ms", type=float, default=MODEL_BATCH_BUDGET_MS,
+                        help=f"predict_proba budget for a {BATCH_ROWS:,}-row batch for --select")
+    parser.add_argument("--cv-folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel fits for --select (-1 = all cores)")
+    args = parser.parse_args()
+    lag_k = args.lag_k if args.spatial_lag else None
+
+    df = build_monthly_dataset(YEAR, lag_k)
 
     crime_cols = [c for c in df.columns if c.startswith("crime_c")]
+    lag_cols = [c for c in df.columns if c.startswith("lag_")]
     feature_cols = [
         "month",
         "population_density_score", "divorce_ratio_score", "unmarried_over_30_score",
         "university_education_score", "unemployment_score", "income_score", "vitality_score",
-    ] + crime_cols
+    ] + crime_cols + lag_cols
 
     X = df[feature_cols]
     y = df["label"].astype(str)
@@ -120,27 +180,48 @@ def main():
         X, y, test_size=0.25, random_state=1337, stratify=y
     )
 
-    rf = RandomForestClassifier(
-        n_estimators=700, random_state=1337, class_weight="balanced", min_samples_leaf=2
-    )
-    rf.fit(X_train, y_train)
+    if args.select:
+        name, rf = select_model(X_train, y_train, X_test, y_test, args)
+        model_name = f"{name}_monthly"
+    else:
+        rf = RandomForestClassifier(
+            n_estimators=700, random_state=1337, class_weight="balanced", min_samples_leaf=2
+        )
+        rf.fit(X_train, y_train)
+        model_name = "RandomForest_monthly"
 
     pred = rf.predict(X_test)
     acc = accuracy_score(y_test, pred)
 
-    print("\n=== Random Forest (monthly trained) ===")
+    print(f"\n=== {model_name} ===")
     print("Accuracy:", round(acc, 4))
     print("Confusion matrix:\n", confusion_matrix(y_test, pred, labels=CLASS_ORDER))
     print(classification_report(y_test, pred, labels=CLASS_ORDER))
 
+    # ── Path-decomposition table and global importance, served with ?explain=true.
+    # Saved beside the bundle (written first, so a new bundle never meets an
+    # old sidecar) and matched to it by model_id.
+    model_id = uuid.uuid4().hex
+    if supports_explanation(rf):
+        explanation = explain_model(rf, X)
+        print("Global importance (mean |contribution|):")
+        for col, v in sorted(explanation["global_importance"].items(), key=lambda kv: -kv[1])[:10]:
+            print(f"  {col:<30} {v:.3f}")
+        joblib.dump({"model_id": model_id, "explanation": explanation}, EXPLANATION_OUT)
+        print(f"✅ Saved explanation -> {EXPLANATION_OUT}")
+    elif os.path.exists(EXPLANATION_OUT):
+        os.remove(EXPLANATION_OUT)
+
     joblib.dump(
         {
-            "model_name": "RandomForest_monthly",
+            "model_name": model_name,
+            "model_id": model_id,
             "model": rf,
             "feature_cols": feature_cols,
             "classes": list(rf.classes_),
             "class_order_expected": CLASS_ORDER,
             "year": YEAR,
+            "spatial_lag_k": lag_k,
         },
         MODEL_OUT,
     )
@@ -0,0 +1,251 @@
+from collections import Counter
+from datetime import date
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from utils.crime_meta import get_crime_meta
+
+# Incremental aggregation of crime_form_data incidents into crime_monthly_counts.
+#
+# Every incident maps to one monthly cell:
+#   neighborhood_id -> neighborhoods.id
+#   category_id     -> crime_weights.classification_id
+#   date            -> (year, month)
+# Writes to crime_form_data turn into +1 / -1 deltas on those cells, applied in
+# the same transaction as the incident itself. Both crime_count (what /api/risk
+# and the reports read) and incident_count (the incident share of it) move
+# together, so the seeded baseline is never touched and rebuild_incident_counts()
+# can recompute the incident share from scratch.
+#
+# The same deltas keep neighborhood_category_counts (incidents per
+# neighbourhood x main category) current for the crime-weight endpoints.
+
+# (neighborhood_id, category_id, date) of one crime_form_data row
+Incident = Tuple[Optional[int], Optional[int], date]
+
+# (neighborhood_id, classification_id, year, month)
+MonthKey = Tuple[int, int, int, int]
+
+# (neighborhood_id, category_id)
+HistogramKey = Tuple[int, int]
+
+# Matches the CHECK constraint on crime_monthly_counts.year
+MIN_YEAR = 2000
+MAX_YEAR = 2100
+
+
+def month_keys(
+    db: Session,
+    incidents: Iterable[Tuple[Optional[int], Optional[int], date]],
+) -> list[Optional[MonthKey]]:
+    """
+    Resolve (neighborhood_id, category_id, date) tuples to monthly cells.
+    Incidents with no neighborhood, an unmapped category, or a date outside
+    the allowed year range resolve to None and are not aggregated.
+    """
+    _, meta = get_crime_meta(db)
+    cid_by_category = meta.classification_by_category_id
+
+    keys: list[Optional[MonthKey]] = []
+    for nid, category_id, d in incidents:
+        cid = cid_by_category.get(category_id)
+        if nid is None or cid is None or not (MIN_YEAR <= d.year <= MAX_YEAR):
+            keys.append(None)
+        else:
+            keys.append((int(nid), int(cid), d.year, d.month))
+    return keys
+
+
+def incident_of(record) -> Incident:
+    """Incident tuple of a CrimeFormData row (read it before mutating the row)."""
+    return (record.neighborhood_id, record.category_id, record.date)
+
+
+def apply_incident_changes(
+    db: Session,
+    changes: Iterable[Tuple[Optional[Incident], Optional[Incident]]],
+) -> None:
+    """
+    Apply (old, new) incident pairs to every aggregate: old=None is an insert,
+    new=None a delete, both set an update. Does not commit.
+    """
+    changes = list(changes)
+    incidents = [i for pair in changes for i in pair if i is not None]
+    key_of = dict(zip(incidents, month_keys(db, incidents)))
+
+    monthly: Counter = Counter()
+    histogram: Counter = Counter()
+    for old, new in changes:
+        for incident, sign in ((old, -1), (new, 1)):
+            if incident is None:
+                continue
+            monthly[key_of[incident]] += sign
+            nid, category_id, _ = incident
+            if nid is not None and category_id is not None:
+                histogram[(nid, category_id)] += sign
+
+    apply_deltas(db, monthly)
+    apply_histogram_deltas(db, histogram)
+
+
+def apply_deltas(db: Session, deltas: Counter) -> int:
+    """
+    Fold per-cell deltas into crime_monthly_counts with a single upsert.
+    Does not commit: callers commit together with the incident write.
+    Returns the number of cells touched.
+    """
+    params = [
+        {"nid": k[0], "cid": k[1], "year": k[2], "month": k[3], "delta": int(v)}
+        for k, v in deltas.items()
+        if k is not None and v != 0
+    ]
+    if not params:
+        return 0
+
+    # The incident share is clamped at 0 and crime_count moves by exactly the
+    # clamped change, so crime_count - incident_count (the seeded baseline,
+    # which rebuild_incident_counts relies on) is never disturbed by a
+    # delete that finds no incident left to remove.
+    db.execute(
+        text("""
+            INSERT INTO crime_monthly_counts
+              (neighborhood_id, classification_id, year, month, crime_count, incident_count)
+            VALUES (:nid, :cid, :year, :month, GREATEST(:delta, 0), GREATEST(:delta, 0))
+            ON CONFLICT (neighborhood_id, classification_id, year, month)
+            DO UPDATE SET
+              crime_count = GREATEST(
+                crime_monthly_counts.crime_count
+                + GREATEST(crime_monthly_counts.incident_count + :delta, 0)
+                - crime_monthly_counts.incident_count,
+                0
+              ),
+              incident_count = GREATEST(crime_monthly_counts.incident_count + :delta, 0)
+        """),
+        params,
+    )
+    return len(params)
+
+
+def apply_histogram_deltas(db: Session, deltas: Counter) -> int:
+    """Fold per-(neighbourhood, category) deltas into neighborhood_category_counts."""
+    params = [
+        {"nid": k[0], "cat": k[1], "delta": int(v)}
+        for k, v in deltas.items()
+        if v != 0
+    ]
+    if not params:
+        return 0
+
+    db.execute(
+        text("""
+            INSERT INTO neighborhood_category_counts (neighborhood_id, category_id, crime_count)
+            VALUES (:nid, :cat, GREATEST(:delta, 0))
+            ON CONFLICT (neighborhood_id, category_id)
+            DO UPDATE SET crime_count = GREATEST(neighborhood_category_counts.crime_count + :delta, 0)
+        """),
+        params,
+    )
+    return len(params)
+
+
+def rebuild_incident_counts(db: Session) -> dict:
+    """
+    Recompute the incident share of crime_monthly_counts, and the
+    neighbourhood category histograms, from crime_form_data.
+    Used for recovery when the incremental deltas are suspected to have drifted.
+    Does not commit.
+    """
+    # 0) Resolve integer keys of rows whose names did not match when written
+    #    (e.g. the neighbourhood was created after the incident)
+    resolved = db.execute(text("""
+        UPDATE crime_form_data c
+        SET neighborhood_id = n.id
+        FROM neighborhoods n
+        WHERE c.neighborhood_id IS NULL AND n.name = c.neighbourhood_name
+    """)).rowcount
+    resolved += db.execute(text("""
+        UPDATE crime_form_data c
+        SET category_id = cw.id
+        FROM crime_weights cw
+        WHERE c.category_id IS NULL AND cw.main_category = c.main_category
+    """)).rowcount
+
+    # 1) Re-aggregate all incidents and swap each cell's incident share for the
+    #    new one, in one write per cell: cells that lost all their incidents
+    #    are reset, the others take the new count. Cells whose share has not
+    #    changed are not written at all, so a rebuild with nothing to recover
+    #    does not fire the crime_monthly_counts row triggers.
+    reset, rebuilt = db.execute(
+        text("""
+            WITH agg AS (
+              SELECT
+                c.neighborhood_id,
+                cw.classification_id,
+                EXTRACT(YEAR FROM c.date)::int AS year,
+                EXTRACT(MONTH FROM c.date)::int AS month,
+                COUNT(*) AS incident_count
+              FROM crime_form_data c
+              JOIN crime_weights cw ON cw.id = c.category_id
+              WHERE c.neighborhood_id IS NOT NULL
+                AND cw.classification_id IS NOT NULL
+                AND EXTRACT(YEAR FROM c.date) BETWEEN :min_year AND :max_year
+              GROUP BY 1, 2, 3, 4
+            ),
+            reset AS (
+              UPDATE crime_monthly_counts m
+              SET crime_count = GREATEST(m.crime_count - m.incident_count, 0),
+                  incident_count = 0
+              WHERE m.incident_count <> 0
+                AND NOT EXISTS (
+                  SELECT 1 FROM agg a
+                  WHERE a.neighborhood_id = m.neighborhood_id
+                    AND a.classification_id = m.classification_id
+                    AND a.year = m.year AND a.month = m.month
+                )
+              RETURNING 1
+            ),
+            rebuilt AS (
+              INSERT INTO crime_monthly_counts
+                (neighborhood_id, classification_id, year, month, crime_count, incident_count)
+              SELECT neighborhood_id, classification_id, year, month, incident_count, incident_count
+              FROM agg
+              ON CONFLICT (neighborhood_id, classification_id, year, month)
+              DO UPDATE SET
+                crime_count = GREATEST(crime_monthly_counts.crime_count - crime_monthly_counts.incident_count, 0)
+                              + EXCLUDED.incident_count,
+                incident_count = EXCLUDED.incident_count
+              WHERE crime_monthly_counts.incident_count <> EXCLUDED.incident_count
+                 OR crime_monthly_counts.crime_count < crime_monthly_counts.incident_count
+              RETURNING 1
+            )
+            SELECT (SELECT COUNT(*) FROM reset), (SELECT COUNT(*) FROM rebuilt)
+        """),
+        {"min_year": MIN_YEAR, "max_year": MAX_YEAR},
+    ).fetchone()
+
+    # 2) Histograms are pure incident counts: rebuild them outright
+    db.execute(text("DELETE FROM neighborhood_category_counts"))
+    db.execute(text("""
+        INSERT INTO neighborhood_category_counts (neighborhood_id, category_id, crime_count)
+        SELECT neighborhood_id, category_id, COUNT(*)
+        FROM crime_form_data
+        WHERE neighborhood_id IS NOT NULL AND category_id IS NOT NULL
+        GROUP BY neighborhood_id, category_id
+    """))
+
+    totals = db.execute(text("""
+        SELECT
+          (SELECT COUNT(*) FROM crime_form_data) AS incidents,
+          (SELECT COALESCE(SUM(incident_count), 0) FROM crime_monthly_counts) AS aggregated
+    """)).fetchone()
+
+    return {
+        "keys_resolved": int(resolved or 0),
+        "cells_reset": int(reset or 0),
+        "cells_rebuilt": int(rebuilt or 0),
+        "incidents": int(totals.incidents),
+        "aggregated": int(totals.aggregated),
+        "skipped": int(totals.incidents) - int(totals.aggregated),
+    }
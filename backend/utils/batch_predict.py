@@ -0,0 +1,96 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# predict_proba over large stacked feature matrices.
+#
+# Big batches are cut into row chunks and scored in a spawn process pool; each
+# worker loads the model bundle from disk once per model version and keeps
+# it, so only the feature chunks and the probabilities cross the process
+# boundary. Small batches are scored in the calling thread.
+
+# Worker processes; 1 or less always predicts in-process
+PREDICT_WORKERS = int(os.getenv("PREDICT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Minimum rows per worker chunk: below two chunks' worth, the pool's
+# pickling and start-up cost more than the forest itself
+PREDICT_CHUNK_ROWS = 20_000
+
+
+_pool_lock = threading.Lock()
+_pool = None
+
+# In worker processes: (model_path, model_version) -> model
+_worker_models = {}
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the server process is multi-threaded and holds
+            # database connections that must not be inherited
+            _pool = ProcessPoolExecutor(
+                max_workers=PREDICT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def bundle_version(model_path: str) -> str:
+    """
+    Version of the model bundle at model_path, from its mtime and size: any
+    retrain rewrites the file and changes it. Keys every cache of results
+    derived from the model; "missing" if there is no bundle.
+    """
+    try:
+        st = os.stat(model_path)
+    except FileNotFoundError:
+        return "missing"
+    return f"{st.st_mtime_ns}-{st.st_size}"
+
+
+def _worker_predict(model_path: str, model_version: str, X: pd.DataFrame) -> np.ndarray:
+    key = (model_path, model_version)
+    model = _worker_models.get(key)
+    if model is None:
+        _worker_models.clear()
+        model = _worker_models[key] = joblib.load(model_path)["model"]
+    return model.predict_proba(X)
+
+
+def predict_proba(model, X: pd.DataFrame, model_path: str, model_version: str) -> np.ndarray:
+    """
+    model.predict_proba(X), fanned out over the worker pool when X is large.
+    model_path / model_version identify the bundle the workers load; they
+    must be the model passed in.
+    """
+    n_chunks = min(PREDICT_WORKERS, len(X) // PREDICT_CHUNK_ROWS)
+    if n_chunks > 1:
+        bounds = np.linspace(0, len(X), n_chunks + 1).astype(int)
+        try:
+            pool = _get_pool()
+            futures = [
+                pool.submit(_worker_predict, model_path, model_version, X.iloc[lo:hi])
+                for lo, hi in zip(bounds[:-1], bounds[1:])
+            ]
+            return np.vstack([f.result() for f in futures])
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed): start a fresh pool next time
+            # and score this batch in-process
+            _reset_pool()
+    return model.predict_proba(X)
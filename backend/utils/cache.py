@@ -0,0 +1,133 @@
+import threading
+import time
+from typing import Any, Callable, Hashable, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Process-wide caches invalidated by version counters.
+#
+# data_versions holds one counter per group of tables; Postgres triggers bump
+# it on every write statement (see the data_versions migration). A cache entry
+# remembers the version it was loaded at and is reused for as long as the
+# counter has not moved, so a hit costs one primary-key lookup.
+
+
+def data_version(db: Session, name: str) -> int:
+    v = db.execute(
+        text("SELECT version FROM data_versions WHERE name = :name"),
+        {"name": name},
+    ).scalar()
+    return int(v) if v is not None else 0
+
+
+def data_versions(db: Session, names) -> dict:
+    """Several counters in one round-trip: {name: version}."""
+    rows = db.execute(
+        text("SELECT name, version FROM data_versions WHERE name = ANY(:names)"),
+        {"names": list(names)},
+    ).fetchall()
+    found = {name: int(v) for name, v in rows}
+    return {name: found.get(name, 0) for name in names}
+
+
+class VersionedCache:
+    """Caches loader(db) until data_versions[name] changes."""
+
+    def __init__(self, name: str, loader: Callable[[Session], Any]):
+        self.name = name
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._version = None
+        self._value = None
+
+    def get(self, db: Session) -> Tuple[int, Any]:
+        """Return (version, value), reloading if the version has moved."""
+        # Read the version before loading: the loaded value is then at least
+        # as new as the version it is stored under.
+        version = data_version(db, self.name)
+        with self._lock:
+            if self._version == version:
+                return version, self._value
+
+        value = self._loader(db)
+        with self._lock:
+            # A slower loader that read an older version must not overwrite
+            # what a concurrent one stored for a newer version
+            if self._version is None or version >= self._version:
+                self._version, self._value = version, value
+        return version, value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version, self._value = None, None
+
+
+class KeyedVersionCache:
+    """
+    Caches loader() results per key, each remembering the data_versions of
+    the given names it was built at; an entry is reused while none of them
+    has moved. For derived results that are parameterized (year, season, ...)
+    and depend on several tables.
+    """
+
+    def __init__(self, names, max_entries: int = 32):
+        self.names = tuple(names)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: dict = {}
+
+    def get(self, db: Session, key: Hashable, loader: Callable[[], Any]) -> Any:
+        versions = tuple(data_versions(db, self.names).values())
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None and hit[0] == versions:
+                return hit[1]
+
+        value = loader()
+        with self._lock:
+            self._entries.pop(key, None)
+            while len(self._entries) >= self.max_entries:
+                # Oldest insertion first
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (versions, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class TTLCache:
+    """
+    Memoizes loader results per key for ttl seconds.
+    For aggregates that are cheap enough to recompute but too hot to run on
+    every request, where a few seconds of staleness is acceptable.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 64):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: dict = {}
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None and hit[0] > now:
+                return hit[1]
+
+        value = loader()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Drop expired entries first, then the oldest ones
+                self._entries = {k: e for k, e in self._entries.items() if e[0] > now}
+                while len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (now + self.ttl, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -1,10 +1,216 @@
-import matplotlib
-# 'Agg' is non-GUI backend for generating charts without display
-# Required for server-side chart generation
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-from collections import Counter
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from io import BytesIO
+from typing import Sequence
+
+# Object-oriented matplotlib only: every chart gets its own Figure with an
+# Agg canvas, nothing touches the pyplot state machine, so concurrent
+# requests in FastAPI's thread pool cannot draw into each other's figures.
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# ── Chart specs ──────────────────────────────────────────────────────────────
+# A chart is described by a plain, picklable spec dict:
+#   {"kind": "pie" | "bar" | "line", "title": ..., "labels": [...],
+#    "values": [...], "y_label": ..., "size": [w, h], "fmt": "png" | "svg", ...}
+# render_charts() renders a batch of specs in a process pool and caches the
+# output by the spec's content hash, so identical charts are drawn once.
+
+CHART_FORMATS = ("png", "svg")
+CHART_DPI = 150
+
+# Worker processes for render_charts(); 1 or less renders in the calling thread
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Rendered charts kept in memory (entries, not bytes: charts are ~50-150 KB)
+CHART_CACHE_SIZE = 256
+
+
+def chart_spec(kind: str, labels, values, title: str, y_label: str = "",
+               size=(8, 4), fmt: str = "png", **style) -> dict:
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"fmt must be one of {CHART_FORMATS}")
+    return {
+        "kind": kind,
+        "labels": [str(x) for x in labels],
+        "values": [float(x) for x in values],
+        "title": title,
+        "y_label": y_label,
+        "size": list(size),
+        "fmt": fmt,
+        **style,
+    }
+
+
+def spec_hash(spec: dict) -> str:
+    raw = json.dumps(spec, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _rotate_xticks(ax) -> None:
+    ax.tick_params(axis="x", labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
+
+
+def _draw_pie(fig: Figure, spec: dict) -> None:
+    ax = fig.add_subplot()
+    ax.set_title(spec["title"])
+    wedges, _, _ = ax.pie(
+        spec["values"],
+        labels=None if spec.get("legend_title") else spec["labels"],
+        autopct=spec.get("autopct", "%1.0f%%"),
+        colors=spec.get("colors"),
+        startangle=90,
+    )
+    if spec.get("legend_title"):
+        ax.legend(wedges, spec["labels"], title=spec["legend_title"],
+                  loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
+        ax.axis("equal")
+
+
+def _draw_bar(fig: Figure, spec: dict) -> None:
+    ax = fig.add_subplot()
+    ax.set_title(spec["title"])
+    ax.bar(spec["labels"], spec["values"], color=spec.get("colors"))
+    ax.set_ylabel(spec["y_label"])
+    _rotate_xticks(ax)
+
+
+def _draw_line(fig: Figure, spec: dict) -> None:
+    ax = fig.add_subplot()
+    ax.set_title(spec["title"])
+    ax.plot(spec["labels"], spec["values"], marker="o",
+            color=spec.get("color"), linewidth=spec.get("linewidth"))
+    ax.set_ylabel(spec["y_label"])
+    if spec.get("grid"):
+        ax.grid(True, alpha=0.3)
+    _rotate_xticks(ax)
+
+
+_DRAW = {"pie": _draw_pie, "bar": _draw_bar, "line": _draw_line}
+
+
+def render_chart(spec: dict) -> bytes:
+    """Render one spec to PNG or SVG bytes (safe to call from any thread or process)."""
+    fig = Figure(figsize=tuple(spec["size"]))
+    FigureCanvasAgg(fig)
+    _DRAW[spec["kind"]](fig, spec)
+    fig.tight_layout()
+
+    buf = BytesIO()
+    fig.savefig(buf, format=spec["fmt"], dpi=CHART_DPI,
+                bbox_inches="tight" if spec.get("tight_bbox") else None)
+    return buf.getvalue()
+
+
+# ── Batch rendering: content-hash cache + process pool ───────────────────────
+
+_cache_lock = threading.Lock()
+_cache: "OrderedDict[str, bytes]" = OrderedDict()
+
+_pool_lock = threading.Lock()
+_pool = None
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the server process is multi-threaded and holds
+            # database connections that must not be inherited
+            _pool = ProcessPoolExecutor(
+                max_workers=CHART_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _cache_get(key: str):
+    with _cache_lock:
+        data = _cache.get(key)
+        if data is not None:
+            _cache.move_to_end(key)
+        return data
+
+
+def _cache_put(key: str, data: bytes) -> None:
+    with _cache_lock:
+        _cache[key] = data
+        _cache.move_to_end(key)
+        while len(_cache) > CHART_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def render_charts(specs: Sequence[dict]) -> list:
+    """
+    Render a batch of specs, returning bytes in the same order.
+    Cached charts are returned as-is; two or more misses are rendered in
+    parallel in the worker pool.
+    """
+    keys = [spec_hash(s) for s in specs]
+    out = [_cache_get(k) for k in keys]
+    missing = {k: s for k, s, data in zip(keys, specs, out) if data is None}
+
+    rendered = {}
+    if len(missing) > 1 and CHART_WORKERS > 1:
+        try:
+            pool = _get_pool()
+            futures = {k: pool.submit(render_chart, s) for k, s in missing.items()}
+            rendered = {k: f.result() for k, f in futures.items()}
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed): start a fresh pool next time
+            # and finish this batch in-process
+            _reset_pool()
+            rendered = {}
+    for k, s in missing.items():
+        if k not in rendered:
+            rendered[k] = render_chart(s)
+
+    for k, data in rendered.items():
+        _cache_put(k, data)
+    return [data if data is not None else rendered[k] for k, data in zip(keys, out)]
+
+
+def chart_flowable(data: bytes, fmt: str, width: float, height: float):
+    """
+    reportlab flowable for rendered chart bytes. SVG charts are embedded as
+    vector drawings (needs svglib); PNG charts as images.
+    """
+    if fmt == "svg":
+        from svglib.svglib import svg2rlg
+
+        drawing = svg2rlg(BytesIO(data))
+        sx, sy = width / drawing.width, height / drawing.height
+        drawing.scale(sx, sy)
+        drawing.width, drawing.height = width, height
+        return drawing
+
+    from reportlab.platypus import Image
+    return Image(BytesIO(data), width=width, height=height)
+
+
+def svg_available() -> bool:
+    try:
+        import svglib  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
 
 # Counts occurrences of each crime category across all data rows
 # Creates a pie chart showing distribution of crime types
@@ -17,24 +223,15 @@ def create_pie_chart(data_rows):
     for row in data_rows:
         category = row.get('main_crime_category') or 'None'
         crime_counts[category] += 1
-    
+
     labels = list(crime_counts.keys())
     sizes = list(crime_counts.values())
     colors_list = ['#1d4ed8', '#f97316', '#22c55e', '#ef4444', '#0ea5e9', '#a855f7']
-    
-    fig, ax = plt.subplots(figsize=(8, 6))
-    wedges, texts, autotexts = ax.pie(sizes, labels=None, autopct='%1.1f%%',
-                                        colors=colors_list[:len(labels)], startangle=90)
-    
-    # Create legend on the left side
-    ax.legend(wedges, labels, title="Crime Categories", loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
-    ax.axis('equal')
-    
-    buf = BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight', dpi=150)
-    buf.seek(0)
-    plt.close()
-    return buf
+
+    spec = chart_spec("pie", labels, sizes, title="", size=(8, 6),
+                      autopct='%1.1f%%', colors=colors_list[:len(labels)],
+                      legend_title="Crime Categories", tight_bbox=True)
+    return BytesIO(render_chart(spec))
 
 # Creates bar chart for either population or crime weight
 # Report type determines which metric to display
@@ -44,7 +241,7 @@ def create_pie_chart(data_rows):
 def create_bar_chart(data_rows, report_type):
     """Create a bar chart for population or avg crime weight."""
     labels = [row.get('neighbourhood_name', '') for row in data_rows]
-    
+
     if report_type == 'crime':
         values = [float(row.get('population', 0)) for row in data_rows]
         ylabel = 'Population (thousands)'
@@ -53,22 +250,13 @@ def create_bar_chart(data_rows, report_type):
         values = [float(row.get('avg_crime_weight', 0)) for row in data_rows]
         ylabel = 'Avg Crime Weight'
         title = 'Avg Crime Weight per Neighbourhood'
-    
+
     colors_list = ['#4f46e5', '#f59e0b', '#f97373', '#22c55e', '#0ea5e9', '#a855f7']
     bar_colors = [colors_list[i % len(colors_list)] for i in range(len(labels))]
-    
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.bar(labels, values, color=bar_colors)
-    ax.set_ylabel(ylabel)
-    ax.set_title(title)
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    
-    buf = BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight', dpi=150)
-    buf.seek(0)
-    plt.close()
-    return buf
+
+    spec = chart_spec("bar", labels, values, title=title, y_label=ylabel,
+                      size=(10, 6), colors=bar_colors, tight_bbox=True)
+    return BytesIO(render_chart(spec))
 
 # Creates line chart for trends over neighbourhoods
 # Shows unemployment % for crime report
@@ -78,7 +266,7 @@ def create_bar_chart(data_rows, report_type):
 def create_line_chart(data_rows, report_type):
     """Create a line chart for unemployment or avg crime weight trend."""
     labels = [row.get('neighbourhood_name', '') for row in data_rows]
-    
+
     if report_type == 'crime':
         values = [float(row.get('unemployment_percent', 0)) for row in data_rows]
         ylabel = 'Unemployment %'
@@ -89,17 +277,8 @@ def create_line_chart(data_rows, report_type):
         ylabel = 'Avg Crime Weight'
         title = 'Avg Crime Weight Trend'
         color = '#ef4444'
-    
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.plot(labels, values, marker='o', color=color, linewidth=2)
-    ax.set_ylabel(ylabel)
-    ax.set_title(title)
-    plt.xticks(rotation=45, ha='right')
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    
-    buf = BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight', dpi=150)
-    buf.seek(0)
-    plt.close()
-    return buf
\ No newline at end of file
+
+    spec = chart_spec("line", labels, values, title=title, y_label=ylabel,
+                      size=(10, 6), color=color, linewidth=2, grid=True,
+                      tight_bbox=True)
+    return BytesIO(render_chart(spec))
@@ -0,0 +1,116 @@
+import math
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+# Zoom-aware clustering of map points on the Web Mercator tile quadtree.
+#
+# Points are binned into tiles at MAX_ZOOM; every coarser level is built from
+# the one below by merging the four children of each tile ((x, y) -> (x >> 1,
+# y >> 1)), so the whole pyramid costs one sort per level over the occupied
+# tiles, not over the points. Each tile carries count, sum/max of R, label
+# counts and the centroid of its points, which is where the cluster marker
+# is drawn.
+
+MAX_ZOOM = 18
+MAX_LAT = 85.05112878  # Web Mercator limit
+
+
+def tile_xy(lat, lng, zoom: int):
+    """Web Mercator tile coordinates of (arrays of) lat/lng at zoom."""
+    n = 1 << zoom
+    lat = np.clip(np.asarray(lat, dtype=np.float64), -MAX_LAT, MAX_LAT)
+    lng = np.asarray(lng, dtype=np.float64)
+    x = np.floor((lng + 180.0) / 360.0 * n).astype(np.int64)
+    lat_r = np.radians(lat)
+    y = np.floor((1.0 - np.log(np.tan(lat_r) + 1.0 / np.cos(lat_r)) / math.pi) / 2.0 * n).astype(np.int64)
+    return np.clip(x, 0, n - 1), np.clip(y, 0, n - 1)
+
+
+class ClusterLevel:
+    """Per-tile aggregates of one zoom level (parallel arrays, sorted by tile)."""
+
+    def __init__(self, zoom, x, y, count, r_sum, r_max, lat_sum, lng_sum, label_counts):
+        self.zoom = zoom
+        self.x, self.y = x, y
+        self.count = count
+        self.r_sum, self.r_max = r_sum, r_max
+        self.lat_sum, self.lng_sum = lat_sum, lng_sum
+        self.label_counts = label_counts  # shape (tiles, labels)
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def merged(self, zoom: int, x, y) -> "ClusterLevel":
+        """Re-bin every entry into tile (x[i], y[i]) at zoom, merging shared tiles."""
+        key = (x << 32) | y
+        uniq, inv = np.unique(key, return_inverse=True)
+        m = len(uniq)
+
+        def add(a):
+            out = np.zeros((m,) + a.shape[1:], dtype=a.dtype)
+            np.add.at(out, inv, a)
+            return out
+
+        r_max = np.full(m, -np.inf)
+        np.maximum.at(r_max, inv, self.r_max)
+        return ClusterLevel(
+            zoom, uniq >> 32, uniq & 0xFFFFFFFF,
+            add(self.count), add(self.r_sum), r_max,
+            add(self.lat_sum), add(self.lng_sum), add(self.label_counts),
+        )
+
+    def parent(self) -> "ClusterLevel":
+        return self.merged(self.zoom - 1, self.x >> 1, self.y >> 1)
+
+
+class ClusterPyramid:
+    def __init__(self, lat, lng, r, labels, label_order: Sequence[str], max_zoom: int = MAX_ZOOM):
+        self.label_order = list(label_order)
+        self.max_zoom = max_zoom
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        r = np.asarray(r, dtype=np.float64)
+
+        # One-hot label matrix; labels outside label_order are not counted
+        label_idx = {l: i for i, l in enumerate(self.label_order)}
+        li = np.array([label_idx.get(l, -1) for l in labels], dtype=np.int64)
+        onehot = np.zeros((len(lat), len(self.label_order)), dtype=np.int64)
+        known = np.flatnonzero(li >= 0)
+        onehot[known, li[known]] = 1
+
+        points = ClusterLevel(
+            max_zoom, None, None, np.ones(len(lat), dtype=np.int64),
+            r, r.copy(), lat, lng, onehot,
+        )
+        x, y = tile_xy(lat, lng, max_zoom)
+        self.levels: Dict[int, ClusterLevel] = {max_zoom: points.merged(max_zoom, x, y)}
+        for z in range(max_zoom - 1, -1, -1):
+            self.levels[z] = self.levels[z + 1].parent()
+
+    def query(self, zoom: int, bbox: Optional[tuple] = None) -> list:
+        """Clusters at zoom (clipped to 0..max_zoom), optionally within bbox."""
+        zoom = max(0, min(zoom, self.max_zoom))
+        lv = self.levels[zoom]
+        idx = np.arange(len(lv))
+        if bbox is not None:
+            min_lng, min_lat, max_lng, max_lat = bbox
+            # Tile y grows southwards: the north edge has the smaller y
+            (x0, x1), (y0, y1) = tile_xy([max_lat, min_lat], [min_lng, max_lng], zoom)
+            idx = idx[(lv.x >= x0) & (lv.x <= x1) & (lv.y >= y0) & (lv.y <= y1)]
+
+        return [
+            {
+                "tile": [zoom, int(x), int(y)],
+                "lat": float(ls / c),
+                "lng": float(gs / c),
+                "count": int(c),
+                "mean_r": round(float(rs / c), 2),
+                "max_r": round(float(rm), 2),
+                "labels": dict(zip(self.label_order, map(int, lc))),
+            }
+            for x, y, c, rs, rm, ls, gs, lc in zip(
+                lv.x[idx], lv.y[idx], lv.count[idx], lv.r_sum[idx], lv.r_max[idx],
+                lv.lat_sum[idx], lv.lng_sum[idx], lv.label_counts[idx],
+            )
+        ]
@@ -0,0 +1,82 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from models import CrimeCategory, CrimeWeight, CrimeClassification
+from utils.cache import VersionedCache
+
+# Reference data for crime incidents: main category weights, subcategories,
+# the category -> classification mapping and the crime_classifications table.
+# It changes almost never, so it is loaded once per data version
+# ("crime_meta", bumped by triggers on crime_weights, crime_categories and
+# crime_classifications) and shared across requests.
+
+
+@dataclass(frozen=True)
+class CrimeMeta:
+    # main_category -> weight (1-10)
+    weights: dict = field(default_factory=dict)
+    # main_category -> crime_weights.id
+    category_ids_by_name: dict = field(default_factory=dict)
+    # crime_weights.id -> crime_classifications.id (unmapped categories absent)
+    classification_by_category_id: dict = field(default_factory=dict)
+    # main_category -> crime_classifications.id (unmapped categories absent)
+    classification_by_category: dict = field(default_factory=dict)
+    # main_category -> [subcategory, ...]
+    subcategories: dict = field(default_factory=dict)
+    # (main_category, subcategory) -> crime_categories.id
+    category_ids: dict = field(default_factory=dict)
+    # crime_classifications.id -> {"code", "name", "weight"}
+    classifications: dict = field(default_factory=dict)
+
+    def weight(self, main_category: str) -> Optional[int]:
+        return self.weights.get(main_category)
+
+    def as_list(self) -> list[dict]:
+        """Shape returned by GET /api/crime/meta."""
+        return [
+            {
+                "main_category": main,
+                "weight": w,
+                "classification_id": self.classification_by_category.get(main),
+                "subcategories": self.subcategories.get(main, []),
+            }
+            for main, w in self.weights.items()
+        ]
+
+
+def _load_crime_meta(db: Session) -> CrimeMeta:
+    weights = db.query(CrimeWeight).order_by(CrimeWeight.id).all()
+    categories = db.query(CrimeCategory).order_by(CrimeCategory.id).all()
+    classifications = db.query(CrimeClassification).order_by(CrimeClassification.id).all()
+
+    subs_by_main: dict[str, list[str]] = {}
+    category_ids: dict[tuple, int] = {}
+    for c in categories:
+        subs_by_main.setdefault(c.main_category, []).append(c.subcategory)
+        category_ids.setdefault((c.main_category, c.subcategory), c.id)
+
+    return CrimeMeta(
+        weights={w.main_category: w.weight for w in weights},
+        category_ids_by_name={w.main_category: w.id for w in weights},
+        classification_by_category_id={
+            w.id: w.classification_id for w in weights if w.classification_id is not None
+        },
+        classification_by_category={
+            w.main_category: w.classification_id for w in weights if w.classification_id is not None
+        },
+        subcategories=subs_by_main,
+        category_ids=category_ids,
+        classifications={
+            c.id: {"code": c.code, "name": c.name, "weight": c.weight} for c in classifications
+        },
+    )
+
+
+_crime_meta_cache = VersionedCache("crime_meta", _load_crime_meta)
+
+
+def get_crime_meta(db: Session) -> tuple[int, CrimeMeta]:
+    """Return (version, CrimeMeta), served from the process-wide cache."""
+    return _crime_meta_cache.get(db)
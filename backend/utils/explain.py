@@ -0,0 +1,133 @@
+import os
+import threading
+
+import joblib
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Per-feature contributions of a random forest's probabilities (tree path
+# decomposition, Saabas).
+#
+# Along a decision path every split moves the node's class distribution from
+# the parent's to the child's; that move is credited to the split feature,
+# so each tree's probabilities are its root distribution plus one term per
+# feature. Those terms depend only on the node, so they are tabulated once
+# per forest: row = node (trees stacked as in decision_path), column =
+# feature * n_classes + class. The contributions of any batch are then
+# decision_path(X) @ table / n_trees, one sparse product, and
+# bias + contributions.sum(features) equals predict_proba(X).
+#
+# The table is about as large as the forest, so train_risk_model saves it in
+# a sidecar next to the model bundle (risk_model.explain.joblib), tagged with
+# the bundle's model_id; it is only read when an explanation is asked for.
+
+
+def supports_explanation(model) -> bool:
+    """Forests of classification trees (random forests, extra trees)."""
+    return hasattr(model, "n_classes_") and all(hasattr(e, "tree_") for e in getattr(model, "estimators_", [None]))
+
+
+def path_decomposition(forest, n_features: int) -> dict:
+    """{"bias": (n_classes,), "node_contributions": csr (nodes, n_features * n_classes)}."""
+    rows, cols, vals, bias = [], [], [], 0.0
+    offset = 0
+    for est in forest.estimators_:
+        t = est.tree_
+        value = t.value[:, 0, :]
+        value = value / value.sum(axis=1, keepdims=True)
+        n_nodes, k = value.shape
+
+        internal = np.flatnonzero(t.children_left >= 0)
+        parent = np.full(n_nodes, -1)
+        parent[t.children_left[internal]] = internal
+        parent[t.children_right[internal]] = internal
+        child = np.flatnonzero(parent >= 0)
+
+        delta = value[child] - value[parent[child]]
+        feature = t.feature[parent[child]]
+        rows.append(np.repeat(child + offset, k))
+        cols.append((feature[:, None] * k + np.arange(k)).ravel())
+        vals.append(delta.ravel())
+        bias = bias + value[0]
+        offset += n_nodes
+
+    k = forest.n_classes_
+    table = sparse.csr_matrix(
+        (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(offset, n_features * k),
+    )
+    return {"bias": bias / len(forest.estimators_), "node_contributions": table}
+
+
+def contributions(forest, decomposition: dict, X: pd.DataFrame) -> np.ndarray:
+    """Rows x features x classes; sums over features to predict_proba - bias."""
+    paths, _ = forest.decision_path(X)
+    k = len(decomposition["bias"])
+    out = (paths @ decomposition["node_contributions"]).toarray() / len(forest.estimators_)
+    return out.reshape(len(X), -1, k)
+
+
+def explanation_path(model_path: str) -> str:
+    """The explanation sidecar of a model bundle: risk_model.joblib -> risk_model.explain.joblib."""
+    root, ext = os.path.splitext(model_path)
+    return f"{root}.explain{ext}"
+
+
+def explain_model(forest, X: pd.DataFrame) -> dict:
+    """
+    What train_risk_model stores in the explanation sidecar: the path
+    decomposition, plus global importance (mean absolute contribution over
+    X, summed over classes, normalized to 1) per feature.
+    """
+    decomposition = path_decomposition(forest, X.shape[1])
+    mean_abs = np.abs(contributions(forest, decomposition, X)).sum(axis=2).mean(axis=0)
+    total = mean_abs.sum() or 1.0
+    decomposition["global_importance"] = dict(zip(X.columns, (mean_abs / total).tolist()))
+    return decomposition
+
+
+_lock = threading.Lock()
+# model version -> explanation of the current bundle
+_loaded = {}
+
+
+def _load_explanation(bundle: dict, model_path: str):
+    if bundle.get("explanation") is not None:  # bundles saved before the sidecar
+        return bundle["explanation"]
+    if not supports_explanation(bundle["model"]):
+        return None
+    try:
+        sidecar = joblib.load(explanation_path(model_path))
+    except FileNotFoundError:
+        sidecar = None
+    if sidecar is not None and bundle.get("model_id") is not None and sidecar["model_id"] == bundle["model_id"]:
+        return sidecar["explanation"]
+    # no sidecar, or one left by another model: only the table can be rebuilt
+    return path_decomposition(bundle["model"], len(bundle["feature_cols"]))
+
+
+def bundle_explanation(bundle: dict, model_version: str, model_path: str):
+    """
+    The explanation of the bundle loaded from model_path: its sidecar, read
+    once per model version, or the decomposition computed if there is no
+    matching sidecar; None if the model is not a forest.
+    """
+    with _lock:
+        if model_version in _loaded:
+            return _loaded[model_version]
+    hit = _load_explanation(bundle, model_path)
+    with _lock:
+        _loaded.clear()
+        _loaded[model_version] = hit
+    return hit
+
+
+def top_contributions(feature_cols, values, contrib, top=None) -> list:
+    """[{feature, value, contribution}] of one row and class, largest |contribution| first."""
+    order = np.argsort(-np.abs(contrib), kind="stable")[:top]
+    return [
+        {"feature": feature_cols[j], "value": float(values[j]), "contribution": round(float(contrib[j]), 4)}
+        for j in order
+    ]
@@ -0,0 +1,212 @@
+import csv
+import json
+from datetime import date
+from io import StringIO
+from typing import Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy import types as sqltypes
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+
+# Streaming encoders for tabular exports.
+# Each encoder takes an iterable of row batches (lists of tuples, as produced
+# by a server-side cursor's .partitions()) and yields encoded byte chunks,
+# one per batch (per row group for Parquet), so memory stays bounded by the
+# batch size no matter how many rows are exported. sql_types (the SQLAlchemy column types, one per column)
+# fixes the Parquet schema before the first batch; the text formats ignore it.
+
+EXPORT_FORMATS = {
+    "csv":     ("text/csv", "csv"),
+    "ndjson":  ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def _cell(v):
+    return v.isoformat() if isinstance(v, date) else v
+
+
+def encode_csv(columns: Sequence[str], batches: Iterable[Sequence[tuple]], sql_types=None) -> Iterator[bytes]:
+    buf = StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    yield buf.getvalue().encode("utf-8")
+
+    for batch in batches:
+        buf.seek(0)
+        buf.truncate(0)
+        writer.writerows([_cell(v) for v in row] for row in batch)
+        yield buf.getvalue().encode("utf-8")
+
+
+def encode_ndjson(columns: Sequence[str], batches: Iterable[Sequence[tuple]], sql_types=None) -> Iterator[bytes]:
+    for batch in batches:
+        lines = [
+            json.dumps({c: _cell(v) for c, v in zip(columns, row)}, ensure_ascii=False)
+            for row in batch
+        ]
+        if lines:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _ChunkSink:
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._pos = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        b = bytes(data)
+        self._chunks.append(b)
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+def _arrow_type(sql_type):
+    """pyarrow type for a SQLAlchemy column type; text for anything unmapped."""
+    import pyarrow as pa
+
+    if isinstance(sql_type, sqltypes.Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, sqltypes.BigInteger):
+        return pa.int64()
+    if isinstance(sql_type, sqltypes.Integer):
+        return pa.int32()
+    if isinstance(sql_type, (sqltypes.Float, sqltypes.Numeric)):
+        # Numeric included: decimals are exported as float64, as the API returns them
+        return pa.float64()
+    if isinstance(sql_type, sqltypes.DateTime):
+        return pa.timestamp("us", tz="UTC" if sql_type.timezone else None)
+    if isinstance(sql_type, sqltypes.Date):
+        return pa.date32()
+    return pa.string()
+
+
+def _arrow_array(pa, values, arrow_type):
+    try:
+        return pa.array(values, type=arrow_type)
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        if arrow_type != pa.string():
+            raise
+        # Text columns of unmapped types (or no sql_types): cells as text
+        return pa.array([v if v is None else str(_cell(v)) for v in values], type=arrow_type)
+
+
+# Rows per Parquet row group. Batches are buffered up to this size: the
+# writer keeps every row group's metadata until the footer is written, so
+# one group per batch made memory grow with the row count.
+PARQUET_ROW_GROUP_ROWS = 100_000
+
+
+def encode_parquet(columns: Sequence[str], batches: Iterable[Sequence[tuple]], sql_types=None) -> Iterator[bytes]:
+    """
+    One Parquet row group per PARQUET_ROW_GROUP_ROWS rows; requires pyarrow.
+    The schema comes from sql_types (all text if omitted), never from the
+    data, so a column that is all NULL in the first batch cannot fail a
+    later one mid-stream.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if sql_types is None:
+        sql_types = [None] * len(columns)
+    schema = pa.schema([(c, _arrow_type(t)) for c, t in zip(columns, sql_types)])
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    pending, pending_rows = [], 0
+    for batch in batches:
+        if not batch:
+            continue
+        arrays = [_arrow_array(pa, col, f.type) for col, f in zip(zip(*batch), schema)]
+        pending.append(pa.Table.from_arrays(arrays, schema=schema))
+        pending_rows += len(batch)
+        if pending_rows < PARQUET_ROW_GROUP_ROWS:
+            continue
+        writer.write_table(pa.concat_tables(pending), row_group_size=pending_rows)
+        pending, pending_rows = [], 0
+        chunk = sink.drain()
+        if chunk:
+            yield chunk
+
+    if pending:
+        writer.write_table(pa.concat_tables(pending), row_group_size=pending_rows)
+    writer.close()
+    yield sink.drain()
+
+
+ENCODERS = {
+    "csv": encode_csv,
+    "ndjson": encode_ndjson,
+    "parquet": encode_parquet,
+}
+
+
+# ── Whole-DataFrame responses ────────────────────────────────────────────────
+# For endpoints whose result is already a pandas DataFrame (risk, season
+# reports): the columns are handed to Arrow as-is, with no per-row Python work.
+# Clients pick the format with ?format= or the Accept header; JSON stays the
+# default.
+
+TABLE_FORMATS = {
+    "arrow":   ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": EXPORT_FORMATS["parquet"],
+}
+
+
+def negotiate_table_format(request: Request, fmt: Optional[str] = None) -> str:
+    """Return "json", "arrow" or "parquet"; ?format= wins over Accept."""
+    if fmt is not None:
+        if fmt != "json" and fmt not in TABLE_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"format must be one of: {['json', *TABLE_FORMATS]}",
+            )
+        return fmt
+
+    accept = request.headers.get("accept", "")
+    for name, (media_type, _) in TABLE_FORMATS.items():
+        if media_type in accept:
+            return name
+    return "json"
+
+
+def encode_dataframe(df, fmt: str) -> bytes:
+    """Encode a DataFrame as an Arrow IPC stream or a Parquet file; requires pyarrow."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    if fmt == "arrow":
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        pq.write_table(table, sink, compression="snappy")
+    return sink.getvalue().to_pybytes()
+
+
+def dataframe_response(df, fmt: str, filename: str) -> Response:
+    media_type, ext = TABLE_FORMATS[fmt]
+    return Response(
+        content=encode_dataframe(df, fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{ext}"'},
+    )
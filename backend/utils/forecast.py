@@ -0,0 +1,104 @@
+from typing import Optional
+
+import numpy as np
+
+# Exponential smoothing for many monthly count series at once.
+#
+# Every series shares one time axis, so the smoothing recursions run as one
+# NumPy update over all series per month: the Python loop is over months and
+# candidate parameters, never over series. The model is additive damped-trend
+# Holt-Winters when there are at least two full years of history and damped
+# Holt (level + trend) otherwise. Smoothing parameters are picked per series
+# from a small grid by in-sample one-step-ahead squared error.
+
+SEASON = 12
+DAMPING = 0.9
+
+ALPHAS = (0.1, 0.3, 0.5, 0.8)
+BETAS = (0.0, 0.1, 0.3)
+GAMMAS = (0.1, 0.3)
+
+
+class SmoothingFit:
+    """Final smoothing states of every series, ready to extrapolate."""
+
+    def __init__(self, method: str, n_obs: int, level, trend, season, alpha, beta, gamma, sse):
+        self.method = method
+        self.n_obs = n_obs
+        self.level, self.trend = level, trend
+        self.season = season  # (SEASON, series) or None
+        self.alpha, self.beta, self.gamma = alpha, beta, gamma
+        self.sse = sse
+
+    def __len__(self) -> int:
+        return len(self.level)
+
+    def forecast(self, horizon: int) -> np.ndarray:
+        """(series, horizon) forecasts for the months after the history, >= 0."""
+        h = np.arange(1, horizon + 1)
+        damp = np.cumsum(DAMPING ** h)  # phi + phi^2 + ... + phi^h
+        out = self.level[:, None] + self.trend[:, None] * damp[None, :]
+        if self.season is not None:
+            out += self.season[(self.n_obs + h - 1) % SEASON].T
+        return np.maximum(out, 0.0)
+
+
+def _initial_states(ym: np.ndarray, seasonal: bool):
+    """(level, trend, season) before the first month; ym is months x series."""
+    if seasonal:
+        first, second = ym[:SEASON].mean(axis=0), ym[SEASON:2 * SEASON].mean(axis=0)
+        return first, (second - first) / SEASON, ym[:SEASON] - first
+    trend = ym[1] - ym[0] if len(ym) > 1 else np.zeros(ym.shape[1])
+    return ym[0].copy(), trend, None
+
+
+def _run(ym: np.ndarray, seasonal: bool, alpha: float, beta: float, gamma: float):
+    """One parameter set over every series: (level, trend, season, sse)."""
+    level, trend, season = _initial_states(ym, seasonal)
+    sse = np.zeros(ym.shape[1])
+    for t, yt in enumerate(ym):
+        s = season[t % SEASON] if seasonal else 0.0
+        base = level + DAMPING * trend
+        err = yt - (base + s)
+        sse += err * err
+        new_level = alpha * (yt - s) + (1 - alpha) * base
+        trend = beta * (new_level - level) + (1 - beta) * DAMPING * trend
+        level = new_level
+        if seasonal:
+            season[t % SEASON] = gamma * (yt - level) + (1 - gamma) * s
+    return level, trend, season, sse
+
+
+def fit_series(y: np.ndarray, seasonal: Optional[bool] = None) -> SmoothingFit:
+    """
+    Fit every row of y (series x months, oldest first). seasonal defaults to
+    True when there are at least two years of months.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n, t = y.shape
+    if seasonal is None:
+        seasonal = t >= 2 * SEASON
+    # Month-major, so each month's values (and seasonal row) are contiguous
+    ym = np.ascontiguousarray(y.T)
+
+    best = None
+    for a in ALPHAS:
+        for b in BETAS:
+            for g in (GAMMAS if seasonal else (0.0,)):
+                level, trend, season, sse = _run(ym, seasonal, a, b, g)
+                if best is None:
+                    best = SmoothingFit(
+                        "holt_winters" if seasonal else "holt", t, level, trend, season,
+                        np.full(n, a), np.full(n, b), np.full(n, g), sse,
+                    )
+                    continue
+                better = sse < best.sse
+                best.level[better] = level[better]
+                best.trend[better] = trend[better]
+                if seasonal:
+                    best.season[:, better] = season[:, better]
+                best.alpha[better] = a
+                best.beta[better] = b
+                best.gamma[better] = g
+                best.sse[better] = sse[better]
+    return best
@@ -0,0 +1,119 @@
+import math
+from io import BytesIO
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+from scipy.ndimage import gaussian_filter
+
+# Continuous risk surface from point R values.
+#
+# The surface is a Gaussian kernel-weighted mean (Nadaraya-Watson): each pixel
+# is sum(K * R) / sum(K) over the points. Both sums are computed by binning
+# the points into the pixel grid (np.bincount) and blurring the two grids
+# with the same separable Gaussian, so the cost is O(points + pixels) rather
+# than O(points * pixels). Pixels whose kernel weight is below that of a lone
+# point at 2 bandwidths are left as no data.
+#
+# Rasters are quantized to uint8: v in 0..254 encodes R = v * 100 / 254, and
+# NO_DATA (255) marks pixels outside the data. The PNG is a palette image of
+# the same bytes, so both formats carry identical values.
+
+NO_DATA = 255
+LEVELS = 254
+R_MAX = 100.0
+
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LNG = 111.320  # at the equator
+
+# Colour ramp stops (R, colour), matching the label colours of the reports
+COLOR_STOPS = [
+    (0.0,   "#22c55e"),
+    (40.0,  "#eab308"),
+    (60.0,  "#f97316"),
+    (80.0,  "#ef4444"),
+    (100.0, "#991b1b"),
+]
+ALPHA = 180
+
+# (min_lng, min_lat, max_lng, max_lat)
+Bounds = Tuple[float, float, float, float]
+
+
+def _palette() -> Tuple[bytes, bytes]:
+    """(RGB palette, per-entry alpha) for the 256 quantized values."""
+    stops = np.array([s for s, _ in COLOR_STOPS])
+    rgb = np.array([[int(c[i:i + 2], 16) for i in (1, 3, 5)] for _, c in COLOR_STOPS], dtype=float)
+    r = np.arange(256) * R_MAX / LEVELS
+    pal = np.column_stack([np.interp(r, stops, rgb[:, i]) for i in range(3)]).round().astype(np.uint8)
+    alpha = np.full(256, ALPHA, dtype=np.uint8)
+    alpha[NO_DATA] = 0
+    return pal.tobytes(), alpha.tobytes()
+
+
+_PALETTE, _ALPHA = _palette()
+
+
+def risk_surface(
+    lat, lng, values, resolution: int, bandwidth_km: Optional[float] = None,
+) -> Tuple[np.ndarray, Bounds]:
+    """
+    Kernel-smoothed surface of values on a grid whose longer side has
+    resolution pixels. Row 0 is the northern edge. Returns (float32 grid with
+    NaN as no data, bounds). bandwidth_km defaults to the mean point spacing.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if not len(lat):
+        return np.full((1, 1), np.nan, dtype=np.float32), (0.0, 0.0, 0.0, 0.0)
+
+    kx = KM_PER_DEG_LNG * math.cos(math.radians((lat.min() + lat.max()) / 2))
+    span_w = (lng.max() - lng.min()) * kx
+    span_h = (lat.max() - lat.min()) * KM_PER_DEG_LAT
+    if bandwidth_km is None:
+        bandwidth_km = math.sqrt(max(span_w * span_h, 1.0) / len(lat))
+
+    # Pad by 3 bandwidths so the kernel tails are not cut at the edge
+    pad = 3 * bandwidth_km
+    min_lng, max_lng = lng.min() - pad / kx, lng.max() + pad / kx
+    min_lat, max_lat = lat.min() - pad / KM_PER_DEG_LAT, lat.max() + pad / KM_PER_DEG_LAT
+    width_km, height_km = span_w + 2 * pad, span_h + 2 * pad
+
+    px_km = max(width_km, height_km) / resolution
+    w = max(1, math.ceil(width_km / px_km))
+    h = max(1, math.ceil(height_km / px_km))
+
+    col = np.clip(((lng - min_lng) / (max_lng - min_lng) * w).astype(np.int64), 0, w - 1)
+    row = np.clip(((max_lat - lat) / (max_lat - min_lat) * h).astype(np.int64), 0, h - 1)
+    cell = row * w + col
+    weight = np.bincount(cell, minlength=w * h).astype(np.float64).reshape(h, w)
+    total = np.bincount(cell, weights=values, minlength=w * h).reshape(h, w)
+
+    sigma = bandwidth_km / px_km
+    den = gaussian_filter(weight, sigma, mode="constant")
+    num = gaussian_filter(total, sigma, mode="constant")
+
+    # Peak weight of a single point is ~1 / (2 pi sigma^2) (1 when sigma < 1 px)
+    peak = min(1.0, 1.0 / (2 * math.pi * sigma * sigma))
+    surface = np.full((h, w), np.nan, dtype=np.float32)
+    ok = den > peak * math.exp(-2)
+    surface[ok] = num[ok] / den[ok]
+    return surface, (float(min_lng), float(min_lat), float(max_lng), float(max_lat))
+
+
+def quantize(surface: np.ndarray) -> np.ndarray:
+    """uint8 raster: R scaled to 0..LEVELS, NO_DATA where NaN."""
+    q = np.full(surface.shape, NO_DATA, dtype=np.uint8)
+    ok = ~np.isnan(surface)
+    q[ok] = np.round(np.clip(surface[ok], 0.0, R_MAX) * (LEVELS / R_MAX)).astype(np.uint8)
+    return q
+
+
+def encode_png(q: np.ndarray) -> bytes:
+    """Palette PNG of a quantized raster; NO_DATA pixels are transparent."""
+    img = Image.fromarray(q)
+    img.putpalette(_PALETTE)  # "L" -> "P"
+    buf = BytesIO()
+    img.save(buf, format="PNG", transparency=_ALPHA, optimize=False)
+    return buf.getvalue()
@@ -0,0 +1,117 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Sequence
+
+# In-process background jobs on a bounded thread pool.
+#
+# A job is a list of independent tasks; each task is submitted to the shared
+# pool on its own, so one large job cannot starve the pool and tasks of a job
+# run in parallel up to the pool size. Results (or errors) are kept per task
+# until the job expires, and finished jobs are dropped after ttl seconds or
+# when more than max_jobs are held. Tasks should return small handles (e.g.
+# a cache key), not large payloads: results live as long as the job.
+#
+# Running jobs are never dropped; when max_jobs of them are unfinished,
+# submit() refuses new work with JobQueueFull.
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    """max_jobs jobs are still queued or running."""
+
+
+class Job:
+    def __init__(self, total: int, meta: Optional[list] = None):
+        self.id = uuid.uuid4().hex
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.meta = meta if meta is not None else [None] * total
+        self.results: list = [None] * total
+        self.errors: list = [None] * total
+        self.task_status: list = [QUEUED] * total
+        self._lock = threading.Lock()
+
+    @property
+    def total(self) -> int:
+        return len(self.results)
+
+    @property
+    def completed(self) -> int:
+        return sum(s in (DONE, FAILED) for s in self.task_status)
+
+    @property
+    def status(self) -> str:
+        with self._lock:
+            statuses = set(self.task_status)
+        if statuses <= {DONE, FAILED}:
+            return FAILED if statuses == {FAILED} else DONE
+        if statuses == {QUEUED}:
+            return QUEUED
+        return RUNNING
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def _set(self, i: int, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.task_status[i] = status
+            self.results[i] = result
+            self.errors[i] = error
+            if all(s in (DONE, FAILED) for s in self.task_status):
+                self.finished_at = time.time()
+
+
+class JobQueue:
+    def __init__(self, workers: int, max_jobs: int = 100, ttl: float = 3600.0):
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs: dict = {}
+
+    def submit(self, tasks: Sequence[Callable[[], Any]], meta: Optional[list] = None) -> Job:
+        """Queue one job made of independent tasks; returns immediately."""
+        job = Job(len(tasks), meta)
+        with self._lock:
+            self._expire()
+            self._jobs[job.id] = job
+        for i, task in enumerate(tasks):
+            self._pool.submit(self._run, job, i, task)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @staticmethod
+    def _run(job: Job, i: int, task: Callable[[], Any]) -> None:
+        job._set(i, RUNNING)
+        try:
+            result = task()
+        except Exception as e:
+            job._set(i, FAILED, error=getattr(e, "detail", None) or str(e) or type(e).__name__)
+        else:
+            job._set(i, DONE, result=result)
+
+    def _expire(self) -> None:
+        """
+        Make room for one more job (call with _lock held): drop expired
+        finished jobs, then the oldest finished ones while max_jobs are held.
+        Raises JobQueueFull if all max_jobs are still unfinished.
+        """
+        now = time.time()
+        finished = sorted(
+            (j.finished_at, jid) for jid, j in self._jobs.items() if j.finished_at is not None
+        )
+        for finished_at, jid in finished:
+            if now - finished_at > self.ttl or len(self._jobs) >= self.max_jobs:
+                del self._jobs[jid]
+        if len(self._jobs) >= self.max_jobs:
+            raise JobQueueFull(f"{len(self._jobs)} jobs are still running")
@@ -0,0 +1,26 @@
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from utils.cache import VersionedCache
+
+# Name -> id resolution for neighborhoods, used on crime_form_data writes and
+# for name-based filters, so joins and aggregates can run on integer keys.
+# Cached per "neighborhoods" data version (bumped by a trigger on writes).
+
+
+def _load_neighborhood_ids(db: Session) -> dict:
+    return dict(db.execute(text("SELECT name, id FROM neighborhoods")).fetchall())
+
+
+_neighborhood_ids = VersionedCache("neighborhoods", _load_neighborhood_ids)
+
+
+def neighborhood_ids(db: Session) -> dict:
+    """{name: id} for every row in neighborhoods."""
+    return _neighborhood_ids.get(db)[1]
+
+
+def neighborhood_id(db: Session, name: str) -> Optional[int]:
+    return neighborhood_ids(db).get(name)
@@ -0,0 +1,134 @@
+import io
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.tree import DecisionTreeClassifier
+
+# Candidate models for train_risk_model --select, scored on cross-validated
+# accuracy and on what they cost to serve.
+#
+# Every (candidate, fold) fit, plus each candidate's fit on the whole
+# training split, is an independent job spread over the cores with joblib;
+# the models themselves are single-threaded, as they are when served.
+# Latency is then measured one model at a time on an otherwise idle process:
+# predict_proba for one row (the /api/predict path) and for a batch (the
+# /api/risk and report paths), and the pickled size of the fitted model.
+
+SEED = 1337
+
+# predict_proba calls timed per candidate for the single-row latency
+LATENCY_REPEATS = 50
+# Rows in the batch-latency test; the test split is tiled up to this size
+BATCH_ROWS = 10_000
+
+# CV accuracies are compared at this many decimals: fold means of equal
+# accuracies can differ in the last bits, which would decide ties by noise
+ACCURACY_DECIMALS = 6
+
+
+def candidate_models() -> dict:
+    return {
+        "rf_700": RandomForestClassifier(
+            n_estimators=700, random_state=SEED, class_weight="balanced", min_samples_leaf=2
+        ),
+        "rf_200": RandomForestClassifier(
+            n_estimators=200, random_state=SEED, class_weight="balanced", min_samples_leaf=2
+        ),
+        "rf_50": RandomForestClassifier(
+            n_estimators=50, random_state=SEED, class_weight="balanced", min_samples_leaf=2
+        ),
+        "hist_gb": HistGradientBoostingClassifier(random_state=SEED, class_weight="balanced"),
+        "tree_d6": DecisionTreeClassifier(
+            max_depth=6, random_state=SEED, class_weight="balanced", min_samples_leaf=2
+        ),
+        "tree_d10": DecisionTreeClassifier(
+            max_depth=10, random_state=SEED, class_weight="balanced", min_samples_leaf=2
+        ),
+    }
+
+
+def _fit_score(model, X, y, train_idx, test_idx):
+    """Fold accuracy, or (test_idx None) the model fitted on all of X."""
+    model = clone(model).fit(X.iloc[train_idx], y.iloc[train_idx])
+    if test_idx is None:
+        return model
+    return accuracy_score(y.iloc[test_idx], model.predict(X.iloc[test_idx]))
+
+
+def _median_ms(fn, repeats: int) -> float:
+    fn()  # warm-up
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times) * 1000)
+
+
+def _artifact_bytes(model) -> int:
+    buf = io.BytesIO()
+    joblib.dump(model, buf)
+    return buf.tell()
+
+
+def evaluate_candidates(
+    candidates: dict, X: pd.DataFrame, y: pd.Series, X_test: pd.DataFrame, y_test: pd.Series,
+    folds: int = 5, n_jobs: int = -1,
+):
+    """
+    (rows, fitted): one metrics dict per candidate, and each candidate
+    fitted on all of X.
+    """
+    splits = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=SEED).split(X, y))
+    full = (np.arange(len(X)), None)
+    jobs = [(name, split) for name in candidates for split in splits + [full]]
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_score)(candidates[name], X, y, *split) for name, split in jobs
+    )
+
+    scores = {name: [] for name in candidates}
+    fitted = {}
+    for (name, split), result in zip(jobs, results):
+        if split is full:
+            fitted[name] = result
+        else:
+            scores[name].append(result)
+
+    one_row = X_test.iloc[[0]]
+    batch = X_test.iloc[np.resize(np.arange(len(X_test)), BATCH_ROWS)]
+    rows = []
+    for name, model in fitted.items():
+        rows.append({
+            "model": name,
+            "cv_accuracy": round(float(np.mean(scores[name])), ACCURACY_DECIMALS),
+            "cv_accuracy_std": float(np.std(scores[name])),
+            "test_accuracy": float(accuracy_score(y_test, model.predict(X_test))),
+            "single_row_ms": _median_ms(lambda: model.predict_proba(one_row), LATENCY_REPEATS),
+            "batch_ms": _median_ms(lambda: model.predict_proba(batch), 3),
+            "artifact_bytes": _artifact_bytes(model),
+        })
+    return rows, fitted
+
+
+def _over_budget(row: dict, latency_budget_ms: float, batch_budget_ms: float) -> float:
+    """Largest latency / budget ratio; at most 1 within both budgets."""
+    return max(row["single_row_ms"] / latency_budget_ms, row["batch_ms"] / batch_budget_ms)
+
+
+def pick_model(rows: list, latency_budget_ms: float, batch_budget_ms: float) -> dict:
+    """
+    Highest CV accuracy among candidates within both the single-row and the
+    batch latency budgets; ties go to the smaller artifact, then the faster
+    batch. If none is within budget, the one exceeding its budgets least.
+    """
+    within = [r for r in rows if _over_budget(r, latency_budget_ms, batch_budget_ms) <= 1.0]
+    if not within:
+        return min(rows, key=lambda r: _over_budget(r, latency_budget_ms, batch_budget_ms))
+    return min(within, key=lambda r: (-r["cv_accuracy"], r["artifact_bytes"], r["batch_ms"]))
@@ -0,0 +1,117 @@
+from functools import partial
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+from reportlab.lib import colors
+from reportlab.platypus import Flowable, Table, TableStyle
+
+# Large reportlab tables, built in fixed-size chunks.
+#
+# One Table holding every row is re-split on each page break, copying the
+# rows that remain, and every styled cell adds its own TableStyle commands.
+# Here the rows are cut into chunk_rows-sized Tables (header repeated in
+# each), cell text is formatted column-wise with NumPy, and label colouring
+# is expressed as one style range per run of equal labels: the rows are
+# sorted by risk, so a label column is a handful of runs, not one command
+# per cell. Chunks are LazyTable placeholders: a chunk's Table only exists
+# while it is being laid out, so memory stays at the formatted cell text plus
+# one chunk.
+
+TABLE_CHUNK_ROWS = 250
+
+MISSING = "—"
+
+
+def format_fixed(values, fmt: str, scale: float = 1.0) -> np.ndarray:
+    """Format a numeric column with a %-format; None becomes MISSING."""
+    arr = np.asarray(values, dtype=object)
+    out = np.full(len(arr), MISSING, dtype=object)
+    mask = ~np.equal(arr, None)
+    if mask.any():
+        nums = arr[mask].astype(float) * scale
+        out[mask] = np.char.mod(fmt, nums)
+    return out
+
+
+def format_text(values) -> np.ndarray:
+    arr = np.asarray(values, dtype=object)
+    out = arr.astype(str).astype(object)
+    out[np.equal(arr, None)] = MISSING
+    return out
+
+
+def label_runs(labels: np.ndarray) -> List[Tuple[int, int, str]]:
+    """(first, last, label) for each run of equal consecutive labels."""
+    n = len(labels)
+    if n == 0:
+        return []
+    change = np.flatnonzero(labels[1:] != labels[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    ends = np.concatenate((change, [n])) - 1
+    return [(int(s), int(e), labels[s]) for s, e in zip(starts, ends)]
+
+
+class LazyTable(Flowable):
+    """Builds its Table on first layout; the Table is dropped with the placeholder."""
+
+    def __init__(self, build):
+        super().__init__()
+        self._build = build
+        self._table = None
+
+    def _get(self) -> Table:
+        if self._table is None:
+            self._table = self._build()
+            self._build = None
+        return self._table
+
+    def wrap(self, availWidth, availHeight):
+        return self._get().wrap(availWidth, availHeight)
+
+    def split(self, availWidth, availHeight):
+        return self._get().split(availWidth, availHeight)
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        return self._get().drawOn(canvas, x, y, _sW)
+
+
+def _chunk_table(header, columns, lo, hi, col_widths, base_style, label_cols, label_bg, default_bg) -> Table:
+    data = [list(header)]
+    data.extend(zip(*(col[lo:hi] for col in columns)))
+
+    style = TableStyle(list(base_style))
+    for ci in label_cols:
+        for first, last, label in label_runs(columns[ci][lo:hi]):
+            cells = ((ci, first + 1), (ci, last + 1))
+            style.add("BACKGROUND", *cells, label_bg.get(label, default_bg))
+            style.add("TEXTCOLOR", *cells, colors.white)
+            style.add("FONTNAME", *cells, "Helvetica-Bold")
+
+    tbl = Table(data, repeatRows=1, colWidths=col_widths)
+    tbl.setStyle(style)
+    return tbl
+
+
+def chunked_tables(
+    header: Sequence[str],
+    columns: Sequence[np.ndarray],
+    col_widths: Sequence[float],
+    base_style: Sequence[tuple],
+    label_cols: Sequence[int] = (),
+    label_bg: Dict[str, object] = None,
+    default_bg=colors.HexColor("#94a3b8"),
+    chunk_rows: int = TABLE_CHUNK_ROWS,
+) -> Iterator[LazyTable]:
+    """
+    Yield one LazyTable per chunk_rows body rows. columns are equal-length
+    arrays of cell strings; cells of label_cols get a background from label_bg.
+    """
+    label_bg = label_bg or {}
+    n = len(columns[0]) if columns else 0
+
+    for lo in range(0, n, chunk_rows):
+        hi = min(lo + chunk_rows, n)
+        yield LazyTable(partial(
+            _chunk_table, header, columns, lo, hi, col_widths, base_style,
+            label_cols, label_bg, default_bg,
+        ))
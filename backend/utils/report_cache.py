@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Optional
+
+# Size-bounded LRU cache of rendered files (PDF reports) in a disk directory.
+#
+# Entries are named by the SHA-256 of their key, so the key doubles as an
+# ETag. Every hit touches the file's mtime; once the directory grows past
+# max_bytes the least recently used files are deleted. Writes go through a
+# temp file + os.replace, so concurrent workers (or processes sharing the
+# directory) never see a half-written entry.
+
+
+def cache_key(*parts) -> str:
+    """Stable hex digest of JSON-serializable key parts."""
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class DiskLRUCache:
+    def __init__(self, directory: str, max_bytes: int, suffix: str = ""):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # evicted since the read; the bytes are still good
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        self.evict()
+
+    def evict(self) -> int:
+        """Delete least recently used entries until under max_bytes; returns the count."""
+        with self._lock:
+            entries = []
+            total = 0
+            with os.scandir(self.directory) as it:
+                for e in it:
+                    if not e.is_file() or not e.name.endswith(self.suffix) or e.name.endswith(".tmp"):
+                        continue
+                    st = e.stat()
+                    entries.append((st.st_mtime, st.st_size, e.path))
+                    total += st.st_size
+
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            return removed
+
+    def clear(self) -> None:
+        if not os.path.isdir(self.directory):
+            return
+        with self._lock:
+            for name in os.listdir(self.directory):
+                if name.endswith(self.suffix):
+                    try:
+                        os.unlink(os.path.join(self.directory, name))
+                    except FileNotFoundError:
+                        pass
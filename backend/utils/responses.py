@@ -0,0 +1,55 @@
+from decimal import Decimal
+from typing import Any, Sequence
+
+import numpy as np
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+# JSON responses encoded with orjson.
+#
+# Endpoints that return large lists build the payload themselves and return a
+# FastJSONResponse directly, which skips FastAPI's jsonable_encoder pass.
+# NumPy arrays/scalars are encoded natively, so no per-field float()
+# conversion is needed. Decimal is not: orjson calls _default for each one,
+# so queries feeding large responses cast Numeric columns with ::float8.
+#
+# layout=columnar returns {column: [values...]} (parallel arrays) instead of a
+# list of objects: field names are sent once, not once per row.
+
+LAYOUTS = ("records", "columnar")
+
+
+def _default(obj: Any):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, np.ndarray):
+        # Object / string arrays are not handled by OPT_SERIALIZE_NUMPY
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+
+
+def check_layout(layout: str) -> str:
+    if layout not in LAYOUTS:
+        raise HTTPException(status_code=400, detail=f"layout must be one of: {list(LAYOUTS)}")
+    return layout
+
+
+def columnar(columns: Sequence[str], rows: Sequence[tuple]) -> dict:
+    """Transpose row tuples into {column: [values...]}."""
+    if not rows:
+        return {c: [] for c in columns}
+    return {c: list(values) for c, values in zip(columns, zip(*rows))}
@@ -0,0 +1,42 @@
+import numpy as np
+
+# The formula score, the one implementation every endpoint uses.
+#
+# counts is (..., neighborhoods, classifications): one block per year,
+# month, season, scenario or resample. Each block is scored as a whole city:
+# weighted sums, R1 relative to the block's own maximum, R the mean of R1
+# and R2, and the fixed-threshold label.
+
+LABELS = ("safe", "moderate", "dangerous", "very_dangerous")
+
+
+def label_codes(r: np.ndarray) -> np.ndarray:
+    """Threshold labels as int8 indices into LABELS."""
+    return (r >= 40).astype(np.int8) + (r >= 60) + (r > 80)
+
+
+def label_names(codes: np.ndarray) -> np.ndarray:
+    """Label codes as an object array of LABELS strings."""
+    return np.asarray(LABELS, dtype=object)[codes]
+
+
+def r2_score(scores: np.ndarray) -> np.ndarray:
+    """R2 from the 7 demographic scores (last axis): their mean x 20, in [20, 100]."""
+    return scores.sum(axis=-1) / 7.0 * 20.0
+
+
+def formula_scores(counts: np.ndarray, weights: np.ndarray, r2: np.ndarray):
+    """
+    (r1, r, label codes), each shaped counts.shape[:-1], for one weight
+    vector; r2 (per neighborhood) broadcasts over the leading blocks.
+    """
+    return scores_from_sums(counts @ weights, r2)
+
+
+def scores_from_sums(ws: np.ndarray, r2: np.ndarray):
+    """formula_scores from weighted sums already taken (..., neighborhoods)."""
+    ws = np.asarray(ws, dtype=np.float64)
+    max_ws = ws.max(axis=-1, keepdims=True) if ws.size else ws
+    r1 = np.divide(ws * 100.0, max_ws, out=np.zeros(ws.shape), where=max_ws > 0)
+    r = (r1 + r2) / 2.0
+    return r1, r, label_codes(r)
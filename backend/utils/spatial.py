@@ -0,0 +1,241 @@
+import math
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+from scipy import sparse
+from scipy.spatial import cKDTree
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from utils.cache import VersionedCache
+
+# In-memory spatial index over neighborhoods.latitude / longitude.
+#
+# Points are bucketed into a uniform lat/lng grid and stored sorted by
+# row-major cell id, so a bounding box is one contiguous slice of the sorted
+# arrays per grid row: a query costs O(grid rows in the box + points found).
+# Nearest-neighbour queries use a KD-tree over an equirectangular projection
+# (longitude scaled by cos(latitude)), which is accurate at city scale.
+#
+# The same tree gives the sparse k-nearest-neighbour weight matrix W behind
+# the spatial-lag model features: lag_<col> = W @ col is the mean of col over
+# each neighborhood's k nearest neighbours. Building W is one k-NN query per
+# point, O(n k log n), with no pairwise distance matrix.
+#
+# The index (and the W matrices memoized on it) is rebuilt when the
+# 'neighborhoods' data version moves.
+
+# Target mean number of points per grid cell
+POINTS_PER_CELL = 16
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Neighbours per row of the spatial-lag weight matrix, and the feature prefix
+LAG_K = 6
+LAG_PREFIX = "lag_"
+
+# (min_lng, min_lat, max_lng, max_lat)
+BBox = Tuple[float, float, float, float]
+
+
+def parse_bbox(bbox: Optional[str]) -> Optional[BBox]:
+    """Parse "min_lng,min_lat,max_lng,max_lat"; None passes through."""
+    if bbox is None:
+        return None
+    try:
+        parts = [float(x) for x in bbox.split(",")]
+    except ValueError:
+        parts = []
+    if len(parts) != 4 or not all(math.isfinite(p) for p in parts):
+        raise HTTPException(status_code=400, detail="bbox must be 'min_lng,min_lat,max_lng,max_lat'")
+    min_lng, min_lat, max_lng, max_lat = parts
+    if min_lng > max_lng or min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="bbox minimums must not exceed maximums")
+    return min_lng, min_lat, max_lng, max_lat
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _knn_matrix(tree: Optional[cKDTree], n: int, k: int) -> sparse.csr_matrix:
+    """Row-standardized k-NN weights of the tree's points, self excluded."""
+    k = min(k, n - 1)
+    if tree is None or k <= 0:
+        return sparse.csr_matrix((n, n))
+    _, nbr = tree.query(tree.data, k=k + 1)
+    # Each point is normally its own first hit, but coincident points can
+    # come in any order: move self to the back of the row, keep k others
+    rows = np.arange(n)
+    keep = np.argsort(nbr == rows[:, None], axis=1, kind="stable")[:, :k]
+    cols = np.take_along_axis(nbr, keep, axis=1)
+    return sparse.csr_matrix(
+        (np.full(n * k, 1.0 / k), (np.repeat(rows, k), cols.ravel())), shape=(n, n),
+    )
+
+
+def _project(lat: np.ndarray, lng: np.ndarray, kx: float) -> np.ndarray:
+    return np.column_stack((lat, lng * kx))
+
+
+def knn_weights(lat, lng, k: int = LAG_K) -> sparse.csr_matrix:
+    """k-NN weight matrix of points in the given order (for offline use)."""
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    if not len(lat):
+        return sparse.csr_matrix((0, 0))
+    kx = math.cos(math.radians((lat.min() + lat.max()) / 2))
+    return _knn_matrix(cKDTree(_project(lat, lng, kx)), len(lat), k)
+
+
+def lag_sources(df: pd.DataFrame) -> list:
+    """Columns spatial-lag features are built from: crime counts and R."""
+    return [c for c in df.columns if c.startswith("crime_c")] + ["r"]
+
+
+def spatial_lag(W: sparse.spmatrix, df: pd.DataFrame, cols: Sequence[str]) -> pd.DataFrame:
+    """lag_<col> columns (W @ col) for cols; missing columns count as 0."""
+    values = df.reindex(columns=list(cols), fill_value=0).to_numpy(dtype=np.float64)
+    return pd.DataFrame(W @ values, index=df.index, columns=[LAG_PREFIX + c for c in cols])
+
+
+class SpatialIndex:
+    def __init__(self, ids, names, lat, lng):
+        ids = np.asarray(ids, dtype=np.int64)
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        names = np.asarray(names, dtype=object)
+        n = len(ids)
+
+        if n:
+            self.min_lat, self.max_lat = float(lat.min()), float(lat.max())
+            self.min_lng, self.max_lng = float(lng.min()), float(lng.max())
+        else:
+            self.min_lat = self.max_lat = self.min_lng = self.max_lng = 0.0
+
+        # ~sqrt(n / POINTS_PER_CELL) cells per side
+        side = max(1, int(math.sqrt(n / POINTS_PER_CELL)))
+        self.rows = self.cols = side
+        self.cell_h = max((self.max_lat - self.min_lat) / side, 1e-9)
+        self.cell_w = max((self.max_lng - self.min_lng) / side, 1e-9)
+
+        cell = self._row(lat) * self.cols + self._col(lng)
+        order = np.argsort(cell, kind="stable")
+        self.ids, self.names = ids[order], names[order]
+        self.lat, self.lng = lat[order], lng[order]
+        # cell_start[c] .. cell_start[c + 1] is the slice of cell c
+        self.cell_start = np.searchsorted(cell[order], np.arange(self.rows * self.cols + 1))
+
+        self._kx = math.cos(math.radians((self.min_lat + self.max_lat) / 2))
+        self._tree = cKDTree(_project(self.lat, self.lng, self._kx)) if n else None
+        self._weights = {}
+        self._id_order = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _row(self, lat):
+        return np.clip(((lat - self.min_lat) / self.cell_h).astype(np.int64), 0, self.rows - 1)
+
+    def _col(self, lng):
+        return np.clip(((lng - self.min_lng) / self.cell_w).astype(np.int64), 0, self.cols - 1)
+
+    def within(self, bbox: BBox) -> np.ndarray:
+        """Positions (into self.ids/lat/lng) of the points inside bbox."""
+        min_lng, min_lat, max_lng, max_lat = bbox
+        if (not len(self) or max_lat < self.min_lat or min_lat > self.max_lat
+                or max_lng < self.min_lng or min_lng > self.max_lng):
+            return np.empty(0, dtype=np.int64)
+
+        r0, r1 = self._row(np.array([min_lat, max_lat]))
+        c0, c1 = self._col(np.array([min_lng, max_lng]))
+        rows = np.arange(r0, r1 + 1) * self.cols
+        starts, ends = self.cell_start[rows + c0], self.cell_start[rows + c1 + 1]
+        pos = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+
+        # Cells on the border of the box are only partly inside
+        lat, lng = self.lat[pos], self.lng[pos]
+        keep = (lat >= min_lat) & (lat <= max_lat) & (lng >= min_lng) & (lng <= max_lng)
+        return pos[keep]
+
+    def ids_within(self, bbox: BBox) -> np.ndarray:
+        return self.ids[self.within(bbox)]
+
+    def nearest(self, lat: float, lng: float, k: int):
+        """(positions, distances_km) of the k nearest points, closest first."""
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        _, pos = self._tree.query([lat, lng * self._kx], k=k)
+        pos = np.atleast_1d(pos)
+        return pos, haversine_km(lat, lng, self.lat[pos], self.lng[pos])
+
+    def knn_weights(self, k: int = LAG_K) -> sparse.csr_matrix:
+        """k-NN weight matrix in position order, memoized per k."""
+        W = self._weights.get(k)
+        if W is None:
+            W = self._weights[k] = _knn_matrix(self._tree, len(self), k)
+        return W
+
+    def positions(self, ids) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, known) of ids; unknown ids get position 0 and known=False."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(self):
+            return np.zeros(len(ids), dtype=np.int64), np.zeros(len(ids), dtype=bool)
+        if self._id_order is None:
+            self._id_order = np.argsort(self.ids)
+        sorted_ids = self.ids[self._id_order]
+        i = np.minimum(np.searchsorted(sorted_ids, ids), len(self) - 1)
+        return self._id_order[i], sorted_ids[i] == ids
+
+    def lag_weights(self, ids, k: int = LAG_K) -> sparse.csr_matrix:
+        """
+        k-NN weights between the given neighborhoods, rows and columns in ids
+        order. Neighbours outside ids are dropped and rows re-standardized.
+        """
+        pos, known = self.positions(ids)
+        mask = sparse.diags(known.astype(np.float64))
+        sub = mask @ self.knn_weights(k)[pos][:, pos] @ mask
+        sums = np.asarray(sub.sum(axis=1)).ravel()
+        scale = np.divide(1.0, sums, out=np.zeros_like(sums), where=sums > 0)
+        return sparse.csr_matrix(sparse.diags(scale) @ sub)
+
+
+def _load_index(db: Session) -> SpatialIndex:
+    rows = db.execute(text("""
+        SELECT id, name, latitude::float8, longitude::float8
+        FROM neighborhoods
+    """)).fetchall()
+    if not rows:
+        return SpatialIndex([], [], [], [])
+    ids, names, lat, lng = zip(*rows)
+    return SpatialIndex(ids, names, lat, lng)
+
+
+_index_cache = VersionedCache("neighborhoods", _load_index)
+
+
+def get_spatial_index(db: Session) -> SpatialIndex:
+    _, index = _index_cache.get(db)
+    return index
+
+
+def add_spatial_lag(
+    db: Session, df: pd.DataFrame, feature_cols: Sequence[str], k: int = LAG_K, id_col: str = "id",
+) -> pd.DataFrame:
+    """
+    Add the lag_<col> columns that feature_cols asks for, computed over the
+    rows of df (one per neighborhood). No-op for models without lag features.
+    """
+    wanted = [c[len(LAG_PREFIX):] for c in feature_cols if c.startswith(LAG_PREFIX)]
+    if not wanted:
+        return df
+    W = get_spatial_index(db).lag_weights(df[id_col].to_numpy(), k)
+    lag = spatial_lag(W, df, wanted)
+    df[list(lag.columns)] = lag
+    return df
@@ -0,0 +1,122 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.scoring import LABELS, formula_scores
+
+# Monte Carlo intervals for the formula score.
+#
+# Every observed count is taken as the rate of a Poisson variable and the
+# count matrix is redrawn `samples` times; each redraw is scored as a whole
+# city (R1 stays relative to that draw's maximum). Draws are made in chunks
+# of (chunk, neighborhoods, classifications), and each chunk's R1 and R are
+# folded into per-neighborhood histograms of fixed BIN_WIDTH bins over
+# [0, 100] before the next one is drawn: memory is bounded by the chunk and
+# the histograms (2 x neighborhoods x 1001 bins), whatever the sample count,
+# and percentiles are read from the histograms to BIN_WIDTH. Chunks are
+# spread over a thread pool: the Poisson sampler and the matrix product run
+# without the GIL. Every chunk has its own seeded generator, so the result
+# depends only on the seed and the sample count, not on the number of
+# workers.
+
+UNCERTAINTY_SAMPLES = 1000
+MAX_UNCERTAINTY_SAMPLES = 10_000
+PERCENTILES = (5, 50, 95)
+
+# Threads drawing chunks; 1 draws in the calling thread
+UNCERTAINTY_WORKERS = int(os.getenv("UNCERTAINTY_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Upper bounds on one chunk: draws per chunk, and bytes of its int64 counts
+CHUNK_SAMPLES = 250
+CHUNK_BYTES = 64 * 1024 * 1024
+
+# Histogram resolution of R1 and R (both in [0, 100])
+BIN_WIDTH = 0.1
+N_BINS = int(round(100 / BIN_WIDTH)) + 1
+
+
+def _chunk_bounds(samples: int, n: int, c: int) -> np.ndarray:
+    """Chunk edges over the draws; independent of the worker count."""
+    per_chunk = max(1, min(CHUNK_SAMPLES, CHUNK_BYTES // max(n * c * 8, 1)))
+    return np.append(np.arange(0, samples, per_chunk), samples)
+
+
+def _bin(values: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(values / BIN_WIDTH), 0, N_BINS - 1).astype(np.int64)
+
+
+def _hist_percentiles(hist: np.ndarray, samples: int) -> np.ndarray:
+    """Nearest-rank PERCENTILES per row of a neighborhoods x N_BINS histogram."""
+    cum = np.cumsum(hist, axis=1, dtype=np.int32)
+    ranks = np.maximum(np.ceil(np.asarray(PERCENTILES) / 100.0 * samples), 1)
+    return np.stack([(cum < rank).sum(axis=1) * BIN_WIDTH for rank in ranks])
+
+
+def monte_carlo_scores(
+    counts: np.ndarray, weights: np.ndarray, r2: np.ndarray, samples: int, seed: int = 0,
+) -> dict:
+    """
+    counts is neighborhoods x classifications. Returns per-neighborhood
+    percentiles of R1 and R, to BIN_WIDTH ({"r1": (len(PERCENTILES), n), "r": ...}) and
+    "label_share", n x len(LABELS): the fraction of draws with each label.
+    """
+    n, c = counts.shape
+    lam = np.asarray(counts, dtype=np.float64)
+    bounds = _chunk_bounds(samples, n, c)
+    seeds = np.random.SeedSequence(seed).spawn(len(bounds) - 1)
+
+    hist_dtype = np.uint16 if samples <= np.iinfo(np.uint16).max else np.uint32
+    hists = {name: np.zeros(n * N_BINS, dtype=hist_dtype) for name in ("r1", "r")}
+    row_offset = np.arange(n, dtype=np.int64) * N_BINS
+    lock = threading.Lock()
+
+    def run(i: int) -> np.ndarray:
+        lo, hi = bounds[i], bounds[i + 1]
+        draws = np.random.default_rng(seeds[i]).poisson(lam, size=(hi - lo, n, c))
+        r1, r, codes = formula_scores(draws, weights, r2)
+        del draws
+        for name, values in (("r1", r1), ("r", r)):
+            cells, hits = np.unique(_bin(values) + row_offset, return_counts=True)
+            with lock:
+                hists[name][cells] += hits.astype(hist_dtype)
+        return (codes[..., None] == np.arange(len(LABELS), dtype=np.int8)).sum(axis=0)
+
+    if UNCERTAINTY_WORKERS > 1 and len(bounds) > 2:
+        with ThreadPoolExecutor(max_workers=UNCERTAINTY_WORKERS) as pool:
+            label_counts = sum(pool.map(run, range(len(bounds) - 1)))
+    else:
+        label_counts = sum(run(i) for i in range(len(bounds) - 1))
+
+    return {
+        "r1": _hist_percentiles(hists["r1"].reshape(n, N_BINS), samples),
+        "r": _hist_percentiles(hists["r"].reshape(n, N_BINS), samples),
+        "label_share": label_counts / samples,
+    }
+
+
+def uncertainty_frame(df: pd.DataFrame, weight_map: dict, samples: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Interval columns for a formula frame (crime_c{cid} counts, r2 and
+    formula_label), on df's index: r1_p5 ... r_p95, label_stability (share of
+    draws keeping formula_label) and one share_<label> per label.
+    """
+    crime_cols = [col for col in df.columns if col.startswith("crime_c")]
+    weights = np.array([float(weight_map.get(int(col[len("crime_c"):]), 0.0)) for col in crime_cols])
+    mc = monte_carlo_scores(
+        df[crime_cols].to_numpy(dtype=np.float64).reshape(len(df), len(crime_cols)),
+        weights, df["r2"].to_numpy(dtype=np.float64), samples, seed,
+    )
+
+    out = {}
+    for name in ("r1", "r"):
+        for p, values in zip(PERCENTILES, mc[name]):
+            out[f"{name}_p{p}"] = values
+    point = pd.Categorical(df["formula_label"], categories=LABELS).codes
+    share = mc["label_share"]
+    out["label_stability"] = share[np.arange(len(df)), point] if len(df) else np.zeros(0)
+    for j, label in enumerate(LABELS):
+        out[f"share_{label}"] = share[:, j]
+    return pd.DataFrame(out, index=df.index)
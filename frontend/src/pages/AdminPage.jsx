@@ -10,17 +10,24 @@ const AdminPage = () => {
   const role = user?.role;
 
   const [rows, setRows] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [total, setTotal] = useState(null);
   const [loading, setLoading] = useState(true);
   const [editingRecord, setEditingRecord] = useState(null);
   const [showInsertModal, setShowInsertModal] = useState(false);
 
-  const loadRows = async () => {
+  // Loads the first page, or appends the page after `cursor`
+  const loadRows = async (cursor = null) => {
     try {
-      const res = await fetch(`${import.meta.env.VITE_API_BASE_URL}/api/crime-forms`, {
+      const params = new URLSearchParams({ limit: '50' });
+      if (cursor !== null) params.set('cursor', cursor);
+      const res = await fetch(`${import.meta.env.VITE_API_BASE_URL}/api/crime-forms?${params}`, {
         headers: { Authorization: `Bearer ${token}` },
       });
       const data = await res.json();
-      setRows(data);
+      setRows((prev) => (cursor === null ? data.items : [...prev, ...data.items]));
+      setNextCursor(data.next_cursor);
+      if (cursor === null) setTotal(data.total);
     } catch (err) {
       console.error('Failed to load crime forms', err);
       toast.error('Failed to load crime data');
@@ -123,6 +130,24 @@ const AdminPage = () => {
         </table>
       )}
 
+      {!loading && (
+        <div className="flex items-center gap-4 mb-6 text-sm text-gray-600">
+          <span>
+            Showing {rows.length}
+            {total !== null && ` of ~${Math.max(total, rows.length)}`} records
+          </span>
+          {nextCursor !== null && (
+            <button
+              type="button"
+              className="text-blue-600 underline"
+              onClick={() => loadRows(nextCursor)}
+            >
+              Load more
+            </button>
+          )}
+        </div>
+      )}
+
       <UpdateFormPage
         isOpen={!!editingRecord}
         record={editingRecord}